@@ -0,0 +1,125 @@
+"""Compare thread and process execution modes for queued downloads.
+
+Serves a generated media file from the local fixture server (fixtures.py),
+queues N downloads of it in a scratch database and runs them through
+`QueueScheduler` in each execution mode. While jobs run, a ticker thread in the
+parent process measures how late it wakes up, which stands in for GUI-thread
+responsiveness under GIL contention.
+
+Usage:
+	python benchmarks/bench_execution_modes.py [--jobs 8] [--size-mb 32] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import FixtureConfig, MediaFixtureServer  # noqa: E402
+
+from vidharvester.database.manager import DatabaseManager  # noqa: E402
+from vidharvester.download.scheduler import QueueScheduler  # noqa: E402
+
+
+def measure_stalls(stop: threading.Event, period: float = 0.01) -> list:
+	lateness = []
+	while not stop.is_set():
+		t0 = time.perf_counter()
+		time.sleep(period)
+		lateness.append(time.perf_counter() - t0 - period)
+	return lateness
+
+
+def run_mode(mode: str, url: str, jobs: int, workdir: str) -> dict:
+	db = DatabaseManager(os.path.join(workdir, f"bench-{mode}.db"))
+	db.set_setting("execution_mode", mode)
+	db.set_setting("duplicate_policy", "force")
+	out_dir = os.path.join(workdir, f"out-{mode}")
+	for i in range(jobs):
+		db.add_queue_item(
+			{
+				"url": f"{url}?job={i}",
+				"mode": "video",
+				"format": "mp4",
+				"quality": "best",
+				"output_dir": out_dir,
+				"filename_template": f"{mode}-{i}.%(ext)s",
+			}
+		)
+
+	done = threading.Event()
+	results: dict = {}
+
+	def on_finished(qid: int, ok: bool) -> None:
+		results[qid] = ok
+		if len(results) == jobs:
+			done.set()
+
+	scheduler = QueueScheduler(
+		db, on_finished=on_finished, interval=0.1, max_concurrent=jobs
+	)
+	stop_ticker = threading.Event()
+	lateness: list = []
+	ticker = threading.Thread(target=lambda: lateness.extend(measure_stalls(stop_ticker)))
+	ticker.start()
+	t0 = time.perf_counter()
+	scheduler.start()
+	done.wait(timeout=600)
+	wall = time.perf_counter() - t0
+	stop_ticker.set()
+	ticker.join()
+	scheduler.stop()
+	lateness_ms = sorted(x * 1000 for x in lateness) or [0.0]
+	return {
+		"mode": mode,
+		"jobs": jobs,
+		"succeeded": sum(1 for ok in results.values() if ok),
+		"wall_seconds": round(wall, 3),
+		"ticker_lateness_ms": {
+			"median": round(statistics.median(lateness_ms), 2),
+			"p99": round(lateness_ms[int(len(lateness_ms) * 0.99) - 1], 2),
+			"max": round(lateness_ms[-1], 2),
+		},
+	}
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(
+		description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+	)
+	parser.add_argument("--jobs", type=int, default=8)
+	parser.add_argument("--size-mb", type=int, default=32)
+	parser.add_argument(
+		"--json", action="store_true", help="print machine-readable results only"
+	)
+	args = parser.parse_args()
+
+	config = FixtureConfig(progressive_mb=args.size_mb)
+	with tempfile.TemporaryDirectory() as workdir, MediaFixtureServer(config) as server:
+		url = f"{server.base_url}/progressive.mp4"
+		results = [run_mode(mode, url, args.jobs, workdir) for mode in ("thread", "process")]
+
+	if args.json:
+		print(json.dumps(results, indent=2))
+	else:
+		for r in results:
+			lat = r["ticker_lateness_ms"]
+			print(
+				f"{r['mode']:>8}: {r['succeeded']}/{r['jobs']} ok in {r['wall_seconds']:.2f}s, "
+				f"ticker lateness median {lat['median']} ms / p99 {lat['p99']} ms / "
+				f"max {lat['max']} ms"
+			)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,147 @@
+"""Measure cold-start cost: import time of the GUI modules and time to first paint.
+
+Each sample runs in a fresh interpreter. Import time comes from `-X importtime`
+for `vidharvester.gui.main_window`. First paint runs the real app with
+VIDHARVESTER_STARTUP_PROBE=1, which makes it print its timings and quit right
+after the main window first paints (offscreen when no display is available).
+
+Use --record to append the medians, tagged with VERSION and the git revision, to
+benchmarks/startup_history.jsonl so startup can be tracked across releases.
+
+Usage:
+	python benchmarks/bench_startup.py [--runs 5] [--record] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HISTORY = ROOT / "benchmarks" / "startup_history.jsonl"
+# Modules that should not be loaded before the window shows
+HEAVY_MODULES = ("yt_dlp", "requests", "bs4", "playwright", "psutil")
+
+
+def _env() -> dict:
+	env = dict(os.environ)
+	env["PYTHONPATH"] = os.pathsep.join(
+		filter(None, [str(ROOT / "src"), env.get("PYTHONPATH")])
+	)
+	headless = not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY")
+	if sys.platform.startswith("linux") and headless:
+		env.setdefault("QT_QPA_PLATFORM", "offscreen")
+	return env
+
+
+def import_time_ms(module: str) -> float:
+	proc = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", f"import {module}"],
+		capture_output=True, text=True, env=_env(), check=True,
+	)
+	pattern = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s*" + re.escape(module) + r"$")
+	for line in proc.stderr.splitlines():
+		m = pattern.search(line)
+		if m:
+			return int(m.group(1)) / 1000.0
+	raise RuntimeError(f"no importtime entry for {module}")
+
+
+def heavy_modules_loaded(module: str) -> list:
+	code = (
+		f"import sys, json, {module}; "
+		f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+	)
+	proc = subprocess.run(
+		[sys.executable, "-c", code],
+		capture_output=True,
+		text=True,
+		env=_env(),
+		check=True,
+	)
+	return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def first_paint() -> dict:
+	env = _env()
+	env["VIDHARVESTER_STARTUP_PROBE"] = "1"
+	t0 = time.perf_counter()
+	proc = subprocess.run(
+		[sys.executable, str(ROOT / "run.py")],
+		capture_output=True,
+		text=True,
+		env=env,
+		timeout=120,
+	)
+	wall = (time.perf_counter() - t0) * 1000
+	for line in reversed(proc.stdout.splitlines()):
+		if line.startswith("{"):
+			timings = json.loads(line)
+			timings["process_wall_ms"] = round(wall, 1)
+			return timings
+	raise RuntimeError(f"app did not report startup timings:\n{proc.stderr[-2000:]}")
+
+
+def _git_rev() -> str:
+	try:
+		return subprocess.run(
+			["git", "rev-parse", "--short", "HEAD"],
+			capture_output=True,
+			text=True,
+			cwd=ROOT,
+			check=True,
+		).stdout.strip()
+	except Exception:
+		return "unknown"
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(
+		description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+	)
+	parser.add_argument("--runs", type=int, default=5)
+	parser.add_argument("--module", default="vidharvester.gui.main_window")
+	parser.add_argument(
+		"--skip-paint",
+		action="store_true",
+		help="only measure imports (no Qt platform needed)",
+	)
+	parser.add_argument(
+		"--record", action="store_true", help=f"append results to {HISTORY.name}"
+	)
+	parser.add_argument(
+		"--json", action="store_true", help="print machine-readable results only"
+	)
+	args = parser.parse_args()
+
+	imports = [import_time_ms(args.module) for _ in range(args.runs)]
+	result = {
+		"timestamp": datetime.datetime.utcnow().isoformat(),
+		"version": (ROOT / "VERSION").read_text().strip(),
+		"revision": _git_rev(),
+		"runs": args.runs,
+		"module": args.module,
+		"import_ms": round(statistics.median(imports), 1),
+		"heavy_modules_at_import": heavy_modules_loaded(args.module),
+	}
+	if not args.skip_paint:
+		paints = [first_paint() for _ in range(args.runs)]
+		for key in ("window_created_ms", "first_paint_ms", "process_wall_ms"):
+			result[key] = round(statistics.median(p[key] for p in paints), 1)
+
+	if args.record:
+		with HISTORY.open("a", encoding="utf-8") as fh:
+			fh.write(json.dumps(result) + "\n")
+	print(json.dumps(result, indent=None if args.json else 2))
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
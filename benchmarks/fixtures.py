@@ -0,0 +1,259 @@
+"""Local stand-in media servers for the benchmark suite.
+
+`MediaFixtureServer` serves synthetic content over HTTP on 127.0.0.1:
+
+- ``/progressive.mp4``: a single file with Range support
+- ``/hls/master.m3u8``: an HLS master playlist with two variants of TS segments
+- ``/dash/manifest.mpd``: a DASH manifest with one video and one audio representation
+- ``/page.html``: an HTML page embedding the above, for the fallback link parser
+
+Payload bytes are random (downloaders only concatenate them). Throttling, added
+latency and faults are set per server through `FixtureConfig`.
+"""
+from __future__ import annotations
+
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class FixtureConfig:
+	progressive_mb: int = 16
+	segment_kb: int = 256
+	segments: int = 20
+	segment_seconds: float = 4.0
+	throttle_bytes_per_s: Optional[int] = None  # per connection; None = unthrottled
+	latency_ms: float = 0.0  # added before each response
+	fail_rate: float = 0.0  # probability of a 503 response
+	truncate_rate: float = 0.0  # probability of cutting a body short
+	seed: int = 1234
+
+
+_HLS_VARIANTS = {"720p": (1280, 720, 2_500_000), "360p": (640, 360, 800_000)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+	server: "MediaFixtureServer"  # type: ignore[assignment]
+	protocol_version = "HTTP/1.1"
+
+	def log_message(self, fmt, *args):
+		pass
+
+	def do_HEAD(self):  # noqa: N802
+		self._handle(head=True)
+
+	def do_GET(self):  # noqa: N802
+		self._handle(head=False)
+
+	def _handle(self, head: bool) -> None:
+		cfg = self.server.config
+		self.server.count_request()
+		if cfg.latency_ms:
+			time.sleep(cfg.latency_ms / 1000.0)
+		if cfg.fail_rate and self.server.rng_random() < cfg.fail_rate:
+			self._send(503, b"unavailable", "text/plain", head)
+			return
+		resolved = self.server.resolve(self.path.split("?", 1)[0])
+		if resolved is None:
+			self._send(404, b"not found", "text/plain", head)
+			return
+		body, content_type = resolved
+		self._send_ranged(body, content_type, head)
+
+	def _send(
+		self,
+		status: int,
+		body: bytes,
+		content_type: str,
+		head: bool,
+		extra: Optional[Dict[str, str]] = None,
+	):
+		self.send_response(status)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(body)))
+		for k, v in (extra or {}).items():
+			self.send_header(k, v)
+		self.end_headers()
+		if not head:
+			self._write(body)
+
+	def _send_ranged(self, body: bytes, content_type: str, head: bool) -> None:
+		match = re.match(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+		if not match or (not match.group(1) and not match.group(2)):
+			self._send(200, body, content_type, head, {"Accept-Ranges": "bytes"})
+			return
+		size = len(body)
+		if match.group(1):
+			start = int(match.group(1))
+			end = int(match.group(2)) if match.group(2) else size - 1
+		else:
+			start, end = max(0, size - int(match.group(2))), size - 1
+		if start >= size:
+			self._send(416, b"", content_type, head, {"Content-Range": f"bytes */{size}"})
+			return
+		end = min(end, size - 1)
+		self._send(
+			206,
+			body[start:end + 1],
+			content_type,
+			head,
+			{"Accept-Ranges": "bytes", "Content-Range": f"bytes {start}-{end}/{size}"},
+		)
+
+	def _write(self, body: bytes) -> None:
+		cfg = self.server.config
+		truncate = cfg.truncate_rate and self.server.rng_random() < cfg.truncate_rate
+		if truncate and len(body) > 1:
+			body = body[: len(body) // 2]
+			self.close_connection = True
+		chunk = 64 * 1024
+		try:
+			for offset in range(0, len(body), chunk):
+				part = body[offset:offset + chunk]
+				self.wfile.write(part)
+				self.server.count_bytes(len(part))
+				if cfg.throttle_bytes_per_s:
+					time.sleep(len(part) / cfg.throttle_bytes_per_s)
+		except (BrokenPipeError, ConnectionResetError):
+			pass
+
+
+class MediaFixtureServer(ThreadingHTTPServer):
+	daemon_threads = True
+
+	def __init__(self, config: Optional[FixtureConfig] = None) -> None:
+		super().__init__(("127.0.0.1", 0), _Handler)
+		self.config = config or FixtureConfig()
+		self._rng = random.Random(self.config.seed)
+		self._stats_lock = threading.Lock()
+		self.requests_served = 0
+		self.bytes_served = 0
+		self._thread: Optional[threading.Thread] = None
+		cfg = self.config
+		self._progressive = os.urandom(cfg.progressive_mb * 1024 * 1024)
+		self._segment = os.urandom(cfg.segment_kb * 1024)
+
+	# Lifecycle
+	@property
+	def base_url(self) -> str:
+		return f"http://127.0.0.1:{self.server_address[1]}"
+
+	def start(self) -> "MediaFixtureServer":
+		self._thread = threading.Thread(
+			target=self.serve_forever, name="media-fixture", daemon=True
+		)
+		self._thread.start()
+		return self
+
+	def stop(self) -> None:
+		self.shutdown()
+		self.server_close()
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *exc):
+		self.stop()
+
+	# Stats (called from handler threads)
+	def rng_random(self) -> float:
+		with self._stats_lock:
+			return self._rng.random()
+
+	def count_request(self) -> None:
+		with self._stats_lock:
+			self.requests_served += 1
+
+	def count_bytes(self, n: int) -> None:
+		with self._stats_lock:
+			self.bytes_served += n
+
+	# Content
+	def resolve(self, path: str) -> Optional[Tuple[bytes, str]]:
+		cfg = self.config
+		if path == "/progressive.mp4":
+			return self._progressive, "video/mp4"
+		if path == "/page.html":
+			return self._page().encode(), "text/html; charset=utf-8"
+		if path == "/hls/master.m3u8":
+			return self._hls_master().encode(), "application/vnd.apple.mpegurl"
+		m = re.fullmatch(r"/hls/(\w+)/index\.m3u8", path)
+		if m and m.group(1) in _HLS_VARIANTS:
+			return self._hls_media().encode(), "application/vnd.apple.mpegurl"
+		m = re.fullmatch(r"/hls/(\w+)/seg(\d+)\.ts", path)
+		if m and m.group(1) in _HLS_VARIANTS and int(m.group(2)) < cfg.segments:
+			return self._segment, "video/mp2t"
+		if path == "/dash/manifest.mpd":
+			return self._dash_manifest().encode(), "application/dash+xml"
+		m = re.fullmatch(r"/dash/(video|audio)/(init|seg(\d+))\.m4s", path)
+		if m and (m.group(2) == "init" or int(m.group(3)) < cfg.segments):
+			return (self._segment[:1024] if m.group(2) == "init" else self._segment), "video/mp4"
+		return None
+
+	def _page(self) -> str:
+		return (
+			"<html><body>"
+			'<video src="/progressive.mp4"></video>'
+			'<video><source src="/hls/master.m3u8"></video>'
+			f'<script>var player = {{"dash": "{self.base_url}/dash/manifest.mpd"}};</script>'
+			'<a href="https://adserver.example/ad.mp4">ad</a>'
+			"</body></html>"
+		)
+
+	def _hls_master(self) -> str:
+		lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+		for name, (w, h, bw) in _HLS_VARIANTS.items():
+			lines.append(
+				f"#EXT-X-STREAM-INF:BANDWIDTH={bw},RESOLUTION={w}x{h},"
+				'CODECS="avc1.64001f,mp4a.40.2"'
+			)
+			lines.append(f"{name}/index.m3u8")
+		return "\n".join(lines) + "\n"
+
+	def _hls_media(self) -> str:
+		cfg = self.config
+		lines = [
+			"#EXTM3U",
+			"#EXT-X-VERSION:3",
+			f"#EXT-X-TARGETDURATION:{int(cfg.segment_seconds + 0.999)}",
+			"#EXT-X-MEDIA-SEQUENCE:0",
+		]
+		for i in range(cfg.segments):
+			lines.append(f"#EXTINF:{cfg.segment_seconds:.3f},")
+			lines.append(f"seg{i}.ts")
+		lines.append("#EXT-X-ENDLIST")
+		return "\n".join(lines) + "\n"
+
+	def _dash_manifest(self) -> str:
+		cfg = self.config
+		duration = cfg.segments * cfg.segment_seconds
+		timescale = 1000
+		seg = int(cfg.segment_seconds * timescale)
+		return f"""<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static"
+	mediaPresentationDuration="PT{duration:.1f}S" minBufferTime="PT2S"
+	profiles="urn:mpeg:dash:profile:isoff-on-demand:2011">
+	<Period>
+		<AdaptationSet mimeType="video/mp4" contentType="video">
+			<Representation id="video" bandwidth="2000000" width="1280" height="720"
+				codecs="avc1.64001f">
+				<SegmentTemplate timescale="{timescale}" duration="{seg}" startNumber="0"
+					initialization="video/init.m4s" media="video/seg$Number$.m4s"/>
+			</Representation>
+		</AdaptationSet>
+		<AdaptationSet mimeType="audio/mp4" contentType="audio">
+			<Representation id="audio" bandwidth="128000" codecs="mp4a.40.2"
+				audioSamplingRate="44100">
+				<SegmentTemplate timescale="{timescale}" duration="{seg}" startNumber="0"
+					initialization="audio/init.m4s" media="audio/seg$Number$.m4s"/>
+			</Representation>
+		</AdaptationSet>
+	</Period>
+</MPD>
+"""
@@ -0,0 +1,404 @@
+"""Headless benchmark suite for VidHarvester.
+
+Starts local fixture servers (see fixtures.py) and drives the real components
+without a GUI:
+
+- download.*       DownloadJob (behind DownloadWorker) on progressive MP4, HLS and DASH
+- queue.scheduler  QueueScheduler (behind QueueRunner) with concurrent items
+- fallback.*       DownloadJob._detect_media_links on an HTML page
+- capture_server.* POST /capture round trips against extension_server
+- database.*       DatabaseManager queue/history operations
+
+Results (throughput, latency percentiles, CPU seconds, peak RSS) are printed as
+JSON. With --thresholds, every "metric.path": {"max"|"min": value} entry is checked
+against the flattened results and the exit status is 1 if any regresses.
+
+Usage:
+	python benchmarks/run_suite.py [--only download,database] [--throttle-kbps 0]
+		[--fail-rate 0.0] [--output results.json]
+		[--thresholds benchmarks/thresholds.json]
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import FixtureConfig, MediaFixtureServer  # noqa: E402
+
+from vidharvester.database.manager import DatabaseManager  # noqa: E402
+from vidharvester.download.engine import DownloadJob, DownloadOptions  # noqa: E402
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+	if not samples_ms:
+		return {}
+	ordered = sorted(samples_ms)
+
+	def pick(q: float) -> float:
+		return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+	return {
+		"p50_ms": pick(0.50),
+		"p95_ms": pick(0.95),
+		"p99_ms": pick(0.99),
+		"max_ms": round(ordered[-1], 3),
+		"mean_ms": round(statistics.fmean(ordered), 3),
+	}
+
+
+def peak_rss_mb() -> float:
+	try:
+		import psutil
+
+		info = psutil.Process().memory_info()
+		return round(getattr(info, "peak_wset", info.rss) / 1024 / 1024, 1)
+	except ImportError:
+		import resource
+
+		peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+
+
+@contextmanager
+def measured(result: dict):
+	wall0, cpu0 = time.perf_counter(), time.process_time()
+	yield
+	result["wall_s"] = round(time.perf_counter() - wall0, 3)
+	result["cpu_s"] = round(time.process_time() - cpu0, 3)
+	result["peak_rss_mb"] = peak_rss_mb()
+
+
+def timed(fn: Callable[[], object], repeat: int) -> List[float]:
+	samples = []
+	for _ in range(repeat):
+		t0 = time.perf_counter()
+		fn()
+		samples.append((time.perf_counter() - t0) * 1000)
+	return samples
+
+
+def _dir_bytes(path: str) -> int:
+	return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def _options(out_dir: str, quality: str = "best") -> DownloadOptions:
+	return DownloadOptions(
+		output_directory=out_dir,
+		mode="video",
+		format_str="mp4",
+		quality=quality,
+		filename_template="%(id)s.%(ext)s",
+		progress_rate_hz=10,
+	)
+
+
+# Scenarios
+def bench_download(server: MediaFixtureServer, workdir: str) -> Dict[str, dict]:
+	cases = {
+		"progressive": (f"{server.base_url}/progressive.mp4", "best"),
+		"hls": (f"{server.base_url}/hls/master.m3u8", "best"),
+		"dash": (f"{server.base_url}/dash/manifest.mpd", "bestvideo/best"),
+	}
+	results = {}
+	for name, (url, quality) in cases.items():
+		out_dir = os.path.join(workdir, f"download-{name}")
+		outcome: list = []
+		job = DownloadJob(
+			url,
+			_options(out_dir, quality),
+			on_finished=lambda ok, msg: outcome.append((ok, msg)),
+		)
+		r: dict = {}
+		with measured(r):
+			job.run()
+		ok, msg = outcome[0] if outcome else (False, "no result")
+		size = _dir_bytes(out_dir) if os.path.isdir(out_dir) else 0
+		r.update(
+			ok=ok,
+			message=msg,
+			bytes=size,
+			throughput_mb_s=round(size / 1024 / 1024 / r["wall_s"], 2) if r["wall_s"] else 0.0,
+		)
+		results[name] = r
+	return results
+
+
+def bench_queue(
+	server: MediaFixtureServer, workdir: str, items: int = 8, concurrency: int = 4
+) -> Dict[str, dict]:
+	from vidharvester.download.scheduler import QueueScheduler
+
+	db = DatabaseManager(os.path.join(workdir, "queue-bench.db"))
+	db.set_setting("duplicate_policy", "force")
+	out_dir = os.path.join(workdir, "queue-out")
+	started: Dict[int, float] = {}
+	latencies: List[float] = []
+	results: Dict[int, bool] = {}
+	done = threading.Event()
+	for i in range(items):
+		db.add_queue_item(
+			{
+				"url": f"{server.base_url}/progressive.mp4?item={i}",
+				"mode": "video",
+				"format": "mp4",
+				"quality": "best",
+				"output_dir": out_dir,
+				"filename_template": f"item-{i}.%(ext)s",
+			}
+		)
+
+	def on_started(qid: int) -> None:
+		started[qid] = time.perf_counter()
+
+	def on_finished(qid: int, ok: bool) -> None:
+		now = time.perf_counter()
+		latencies.append((now - started.get(qid, now)) * 1000)
+		results[qid] = ok
+		if len(results) == items:
+			done.set()
+
+	scheduler = QueueScheduler(
+		db,
+		on_started=on_started,
+		on_finished=on_finished,
+		interval=0.05,
+		max_concurrent=concurrency,
+	)
+	r: dict = {"items": items, "concurrency": concurrency}
+	with measured(r):
+		scheduler.start()
+		done.wait(timeout=600)
+	scheduler.stop()
+	r["succeeded"] = sum(results.values())
+	r["items_per_s"] = round(items / r["wall_s"], 3) if r["wall_s"] else 0.0
+	out_mb = _dir_bytes(out_dir) / 1024 / 1024 if os.path.isdir(out_dir) else 0.0
+	r["throughput_mb_s"] = round(out_mb / r["wall_s"], 2) if out_mb else 0.0
+	r["item_latency"] = percentiles(latencies)
+	return {"scheduler": r}
+
+
+def bench_fallback(
+	server: MediaFixtureServer, workdir: str, repeat: int = 50
+) -> Dict[str, dict]:
+	job = DownloadJob(f"{server.base_url}/page.html", _options(workdir))
+	found: list = []
+	r: dict = {"repeat": repeat}
+
+	def detect():
+		found.append(len(job._detect_media_links(job.url, job.options.user_agent)))
+
+	with measured(r):
+		samples = timed(detect, repeat)
+	r["candidates"] = found[-1] if found else 0
+	r["latency"] = percentiles(samples)
+	return {"detect_media_links": r}
+
+
+def _free_port() -> int:
+	with socket.socket() as s:
+		s.bind(("127.0.0.1", 0))
+		return s.getsockname()[1]
+
+
+def bench_capture_server(
+	server: MediaFixtureServer, workdir: str, repeat: int = 200
+) -> Dict[str, dict]:
+	from vidharvester.capture.extension_server import start_server
+
+	# The server logs every request to stdout, which would interleave with the JSON output
+	logging.getLogger("capture.server").setLevel(logging.WARNING)
+	port = _free_port()
+	received: list = []
+	start_server(port, received.append)
+	body = json.dumps(
+		{
+			"url": f"{server.base_url}/hls/master.m3u8",
+			"page_url": f"{server.base_url}/page.html",
+		}
+	)
+
+	def post():
+		con = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+		con.request(
+			"POST", "/capture", body=body, headers={"Content-Type": "application/json"}
+		)
+		con.getresponse().read()
+		con.close()
+
+	r: dict = {"repeat": repeat}
+	with measured(r):
+		samples = timed(post, repeat)
+	r["received"] = len(received)
+	r["latency"] = percentiles(samples)
+	return {"post_capture": r}
+
+
+def bench_database(
+	server: MediaFixtureServer, workdir: str, rows: int = 500
+) -> Dict[str, dict]:
+	db = DatabaseManager(os.path.join(workdir, "db-bench.db"))
+	item = {
+		"url": f"{server.base_url}/progressive.mp4",
+		"mode": "video",
+		"format": "mp4",
+		"quality": "best",
+		"output_dir": workdir,
+		"filename_template": "%(title)s.%(ext)s",
+	}
+	counter = iter(range(10**9))
+	results: Dict[str, dict] = {}
+	cases = [
+		("add_queue_item", lambda: db.add_queue_item(item), rows),
+		("fetch_queue_pending", lambda: db.fetch_queue(["pending"]), 50),
+		("fetch_queue_page", lambda: db.fetch_queue_page(0, 200), 50),
+		(
+			"add_history",
+			lambda: db.add_history(
+				f"{item['url']}?n={next(counter)}",
+				None,
+				"Benchmark clip",
+				"mp4",
+				1,
+				"bench",
+			),
+			rows,
+		),
+		("find_duplicate", lambda: db.find_duplicate(item["url"]), 200),
+		("search_history", lambda: db.search_history("benchmark clip"), 50),
+	]
+	for name, fn, repeat in cases:
+		r: dict = {"repeat": repeat}
+		with measured(r):
+			r["latency"] = percentiles(timed(fn, repeat))
+		results[name] = r
+	return results
+
+
+SCENARIOS: Dict[str, Callable[[MediaFixtureServer, str], Dict[str, dict]]] = {
+	"download": bench_download,
+	"queue": bench_queue,
+	"fallback": bench_fallback,
+	"capture_server": bench_capture_server,
+	"database": bench_database,
+}
+
+
+# Thresholds
+def flatten(data: dict, prefix: str = "") -> Dict[str, object]:
+	flat: Dict[str, object] = {}
+	for key, value in data.items():
+		path = f"{prefix}{key}"
+		if isinstance(value, dict):
+			flat.update(flatten(value, path + "."))
+		else:
+			flat[path] = value
+	return flat
+
+
+def check_thresholds(results: dict, thresholds: Dict[str, dict]) -> List[str]:
+	"""Threshold violations of the scenarios that ran or crashed.
+
+	Scenarios not selected with --only are skipped.
+	"""
+	flat = flatten(results["scenarios"])
+	failures = []
+	for path, bound in thresholds.items():
+		scenario = path.split(".", 1)[0]
+		if scenario in results["errors"]:
+			failures.append(f"{path}: scenario failed")
+			continue
+		if scenario not in results["scenarios"]:
+			continue  # not selected with --only
+		value = flat.get(path)
+		if not isinstance(value, (int, float)):
+			failures.append(f"{path}: metric missing")
+			continue
+		if "max" in bound and value > bound["max"]:
+			failures.append(f"{path} = {value} > max {bound['max']}")
+		if "min" in bound and value < bound["min"]:
+			failures.append(f"{path} = {value} < min {bound['min']}")
+	return failures
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(
+		description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+	)
+	parser.add_argument(
+		"--only", default="", help="comma-separated scenario names (default: all)"
+	)
+	parser.add_argument(
+		"--throttle-kbps", type=int, default=0, help="per-connection throttle, 0 = none"
+	)
+	parser.add_argument("--latency-ms", type=float, default=0.0)
+	parser.add_argument(
+		"--fail-rate", type=float, default=0.0, help="probability of a 503 per request"
+	)
+	parser.add_argument(
+		"--truncate-rate", type=float, default=0.0, help="probability of a cut-short body"
+	)
+	parser.add_argument("--progressive-mb", type=int, default=16)
+	parser.add_argument("--output", help="also write the JSON results to this file")
+	parser.add_argument("--thresholds", help="JSON file of regression thresholds")
+	args = parser.parse_args()
+
+	config = FixtureConfig(
+		progressive_mb=args.progressive_mb,
+		throttle_bytes_per_s=args.throttle_kbps * 1024 or None,
+		latency_ms=args.latency_ms,
+		fail_rate=args.fail_rate,
+		truncate_rate=args.truncate_rate,
+	)
+	selected = [s for s in args.only.split(",") if s] or list(SCENARIOS)
+	results: dict = {
+		"timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+		"version": (ROOT / "VERSION").read_text().strip(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"fixture": vars(config),
+		"scenarios": {},
+		"errors": {},
+	}
+	with tempfile.TemporaryDirectory() as workdir, MediaFixtureServer(config) as server:
+		for name in selected:
+			try:
+				results["scenarios"][name] = SCENARIOS[name](server, workdir)
+			except Exception as exc:
+				results["errors"][name] = f"{type(exc).__name__}: {exc}"
+		results["fixture_requests"] = server.requests_served
+		results["fixture_bytes"] = server.bytes_served
+
+	# A crashed scenario fails the run whether or not it has thresholds
+	status = 1 if results["errors"] else 0
+	if args.thresholds:
+		thresholds = json.loads(Path(args.thresholds).read_text())
+		results["regressions"] = check_thresholds(results, thresholds)
+		if results["regressions"]:
+			status = 1
+
+	text = json.dumps(results, indent=2, default=str)
+	if args.output:
+		Path(args.output).write_text(text + "\n")
+	print(text)
+	return status
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -3,6 +3,11 @@
 
 const CAPTURE_URL = 'http://127.0.0.1:8089/capture';
 
+function contentType(details) {
+  const header = (details.responseHeaders || []).find(h => h.name.toLowerCase() === 'content-type');
+  return header ? header.value : '';
+}
+
 // Listen for completed web requests
 browser.webRequest.onCompleted.addListener(
   (details) => {
@@ -20,10 +25,12 @@ browser.webRequest.onCompleted.addListener(
         body: JSON.stringify({ 
           url: url,
           tabUrl: details.originUrl || '',
+          contentType: contentType(details),
           timestamp: Date.now()
         })
       }).catch(err => console.warn('VidHarvester capture failed:', err));
     }
   },
-  { urls: ['<all_urls>'] }
+  { urls: ['<all_urls>'] },
+  ['responseHeaders']
 );
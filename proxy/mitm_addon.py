@@ -15,7 +15,7 @@ class MediaDetector:
 			or ("application/dash+xml" in ct)
 			or re.search(r"\.m3u8|\.mpd|\.mp4|\.webm", url, re.I)
 		):
-			payload = {"url": url, "page_url": flow.request.headers.get("Referer")}
+			payload = {"url": url, "page_url": flow.request.headers.get("Referer"), "content_type": ct or None}
 			try:
 				requests.post(LOCAL_API, json=payload, timeout=2)
 			except Exception:
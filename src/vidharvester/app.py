@@ -1,40 +1,28 @@
 from __future__ import annotations
 
-import sys
+import time
 
-from PyQt6 import QtWidgets, QtCore
+_LAUNCHED_AT = time.perf_counter()
 
-from vidharvester.gui.main_window import MainWindow
-from vidharvester.gui.theme_manager import ThemeManager
-from vidharvester.capture.extension_server import start_server
+import multiprocessing  # noqa: E402
+import sys  # noqa: E402
 
 
 CAPTURE_PORT = 8089
 
 
-class CaptureBridge(QtCore.QObject):
-	payload_received = QtCore.pyqtSignal(dict)
-
-
 def main():
-	app = QtWidgets.QApplication(sys.argv)
-	app.setApplicationName("VidHarvester")
-
-	# Set app/tray icon
-	app.setWindowIcon(ThemeManager.build_app_icon("dark"))
-	window = MainWindow()
-	window.show()
-
-	bridge = CaptureBridge()
-	bridge.payload_received.connect(window.on_capture_received)
+	# Required for process-pool downloads in frozen (PyInstaller) builds
+	multiprocessing.freeze_support()
+	# `vidharvester serve` runs headless; keep PyQt out of that path entirely.
+	if len(sys.argv) > 1 and sys.argv[1] == "serve":
+		from vidharvester.daemon import main as serve_main
 
-	# Start local capture server and forward payloads via Qt signal (thread-safe)
-	def forward(payload: dict):
-		bridge.payload_received.emit(payload)
+		sys.exit(serve_main(sys.argv[2:]))
 
-	start_server(CAPTURE_PORT, forward)
+	from vidharvester.gui.application import run
 
-	sys.exit(app.exec())
+	sys.exit(run(CAPTURE_PORT, launched_at=_LAUNCHED_AT))
 
 
 if __name__ == "__main__":
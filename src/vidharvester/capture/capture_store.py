@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.utils.logger import get_logger
+
+
+_log = get_logger("capture.store")
+
+DEFAULT_MAX_CAPTURES = 10_000
+# A batch is written once it has this many captures or its first one is this old
+BATCH_SIZE = 500
+BATCH_SECONDS = 0.25
+
+
+def max_captures(db: DatabaseManager) -> int:
+	"""How many captures to keep (`max_captures` setting).
+
+	Beyond that, the least recently seen are pruned.
+	"""
+	try:
+		value = int(
+			db.get_setting("max_captures", str(DEFAULT_MAX_CAPTURES)) or DEFAULT_MAX_CAPTURES
+		)
+	except ValueError:
+		value = DEFAULT_MAX_CAPTURES
+	return max(100, value)
+
+
+def capture_record(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+	"""Database fields from a /capture payload (proxy addon or browser extension).
+
+	Returns None when the payload has no URL.
+	"""
+	url = str(payload.get("url") or "").strip()
+	if not url:
+		return None
+	page_url = payload.get("page_url") or payload.get("tabUrl") or None
+	content_type = payload.get("content_type") or payload.get("contentType") or None
+	if content_type:
+		content_type = str(content_type).split(";", 1)[0].strip().lower() or None
+	return {
+		"url": url,
+		"page_url": str(page_url) if page_url else None,
+		"content_type": content_type,
+		"seen_at": datetime.utcnow().isoformat(),
+	}
+
+
+class CaptureWriter:
+	"""Persists captured URLs from any thread in batches on a background thread.
+
+	`add` only queues the capture, so the capture server's request threads and the
+	GUI thread never wait on SQLite. After each batch is written and the table pruned
+	to `max_captures`, `on_batch(new_count)` is called from the writer thread.
+
+	Captured URLs are never fetched here: anything can post to /capture. A manifest's
+	`streams` summary is stored when the user inspects or downloads it.
+	"""
+
+	def __init__(
+		self, db: DatabaseManager, on_batch: Optional[Callable[[int], None]] = None
+	) -> None:
+		self.db = db
+		self.on_batch = on_batch
+		self._pending: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+		self._thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+		self._thread.start()
+
+	def add(self, payload: Dict[str, Any]) -> bool:
+		record = capture_record(payload)
+		if record is None:
+			return False
+		self._pending.put(record)
+		return True
+
+	def close(self, timeout: float = 5.0) -> None:
+		"""Write out queued captures and stop the writer thread."""
+		self._pending.put(None)
+		self._thread.join(timeout)
+
+	def _run(self) -> None:
+		stopping = False
+		while not stopping:
+			first = self._pending.get()
+			if first is None:
+				break
+			batch: List[Dict[str, Any]] = [first]
+			deadline = time.monotonic() + BATCH_SECONDS
+			while len(batch) < BATCH_SIZE:
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					break
+				try:
+					record = self._pending.get(timeout=remaining)
+				except queue.Empty:
+					break
+				if record is None:
+					stopping = True
+					break
+				batch.append(record)
+			self._write(batch)
+
+	def _write(self, batch: List[Dict[str, Any]]) -> None:
+		try:
+			added = self.db.add_captures(batch)
+			self.db.prune_captures(max_captures(self.db))
+		except Exception as exc:
+			_log.error("Could not store %d capture(s): %s", len(batch), exc)
+			return
+		if self.on_batch is not None:
+			try:
+				self.on_batch(added)
+			except Exception as exc:
+				_log.exception("Capture batch callback failed: %s", exc)
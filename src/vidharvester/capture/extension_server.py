@@ -1,21 +1,28 @@
 from __future__ import annotations
 
+import hmac
 import json
+import logging
 import threading
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Callable, Optional
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from typing import Any, Callable, List, Optional
 
 from vidharvester.utils.logger import get_logger
 
 
 _log = get_logger("capture.server")
 
+# Where files are written is only set locally; over HTTP any web page could choose it
+LOCAL_ONLY_FIELDS = ("output_dir", "filename_template")
+
 
 class _CaptureRequestHandler(BaseHTTPRequestHandler):
 	"""HTTP handler for POST /capture coming from the browser extension.
 
 	The server instance must set `callback` attribute to a callable that accepts
-	`dict` payloads.
+	`dict` payloads. POST /queue is served when the server has an `enqueue` callable
+	and a `token`. POST /capture needs the token too when `capture_requires_token`
+	is set.
 	"""
 
 	server: HTTPServer  # type: ignore[assignment]
@@ -23,21 +30,77 @@ class _CaptureRequestHandler(BaseHTTPRequestHandler):
 	def _set_common_headers(self, status: int = 200):
 		self.send_response(status)
 		self.send_header("Content-Type", "application/json")
-		# Allow extension fetches
-		self.send_header("Access-Control-Allow-Origin", "*")
-		self.send_header("Access-Control-Allow-Headers", "content-type")
-		self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+		# No CORS headers: the extensions' host permissions let them post without, and
+		# web pages must neither read responses nor send the Authorization header
 		self.end_headers()
 
 	def do_OPTIONS(self):  # noqa: N802 (method name required by BaseHTTPRequestHandler)
 		self._set_common_headers(200)
 
 	def do_POST(self):  # noqa: N802
-		if self.path != "/capture":
+		protected = self.path.startswith("/queue") or (
+			self.path == "/capture" and getattr(self.server, "capture_requires_token", False)
+		)
+		if protected and not self._authorized():
+			self._set_common_headers(401)
+			self.wfile.write(b'{"ok": false, "error": "unauthorized"}')
+			return
+		if self.path == "/capture":
+			self._handle_capture()
+		elif self.path == "/queue":
+			self._handle_queue()
+		elif self.path in ("/queue/claim", "/queue/renew", "/queue/finish"):
+			self._handle_queue_service(self.path.rsplit("/", 1)[1])
+		else:
 			self._set_common_headers(404)
 			self.wfile.write(b'{"ok": false, "error": "not_found"}')
+
+	def _authorized(self) -> bool:
+		"""Protected endpoints are never open: without a server token they are refused."""
+		token = getattr(self.server, "token", None)
+		if not token:
+			return False
+		sent = self.headers.get("Authorization", "").encode("utf-8")
+		return hmac.compare_digest(sent, f"Bearer {token}".encode("utf-8"))
+
+	def _handle_queue_service(self, action: str) -> None:
+		"""Lease endpoints used by `RemoteQueue` workers on other nodes."""
+		service = getattr(self.server, "queue_service", None)
+		if service is None:
+			self._set_common_headers(404)
+			self.wfile.write(b'{"ok": false, "error": "queue_service_disabled"}')
+			return
+		payload = self._read_json()
+		if payload is None:
+			return
+		try:
+			worker_id = str(payload["worker_id"])
+			lease_seconds = float(payload.get("lease_seconds") or 60)
+			if action == "claim":
+				policy = str(payload.get("policy") or "fifo")
+				items = service.claim(worker_id, policy, int(payload["limit"]), lease_seconds)
+				result = {"items": items}
+			elif action == "renew":
+				ids = [int(q) for q in payload["ids"]]
+				result = {"ids": service.renew(worker_id, ids, lease_seconds)}
+			else:
+				status, note = service.finish(worker_id, int(payload["id"]), payload["report"])
+				result = {"status": status, "note": note}
+		except (KeyError, TypeError, ValueError) as exc:
+			self._set_common_headers(400)
+			body = {"ok": False, "error": f"bad_request: {exc}"}
+			self.wfile.write(json.dumps(body).encode("utf-8"))
 			return
+		except Exception as exc:
+			_log.exception("Queue service error: %s", exc)
+			self._set_common_headers(500)
+			self.wfile.write(b'{"ok": false, "error": "queue_service_failed"}')
+			return
+		self._set_common_headers(200)
+		self.wfile.write(json.dumps(dict(result, ok=True)).encode("utf-8"))
 
+	def _read_json(self) -> Any:
+		"""Parse the request body; on invalid JSON a 400 is sent and None returned."""
 		length_header = self.headers.get("Content-Length", "0")
 		try:
 			length = int(length_header)
@@ -45,14 +108,19 @@ class _CaptureRequestHandler(BaseHTTPRequestHandler):
 			length = 0
 		try:
 			raw = self.rfile.read(length) if length > 0 else b"{}"
-			payload = json.loads(raw.decode("utf-8") or "{}")
+			return json.loads(raw.decode("utf-8") or "{}")
 		except Exception as exc:
 			_log.error("Invalid JSON from extension: %s", exc)
 			self._set_common_headers(400)
 			self.wfile.write(b'{"ok": false, "error": "bad_json"}')
+			return None
+
+	def _handle_capture(self) -> None:
+		payload = self._read_json()
+		if payload is None:
 			return
 
-		url = payload.get("url")
+		url = payload.get("url") if isinstance(payload, dict) else None
 		if not url:
 			self._set_common_headers(400)
 			self.wfile.write(b'{"ok": false, "error": "missing_url"}')
@@ -68,34 +136,143 @@ class _CaptureRequestHandler(BaseHTTPRequestHandler):
 		self._set_common_headers(200)
 		self.wfile.write(b'{"ok": true}')
 
+	def _handle_queue(self) -> None:
+		"""Bulk enqueue: a JSON array of items, or {"items": [...], "defaults": {...}}.
+
+		Items are URLs or objects with `url` and optional mode/format/quality/
+		priority/size_estimate. Requests that set `LOCAL_ONLY_FIELDS` are refused.
+		"""
+		enqueue = getattr(self.server, "enqueue", None)
+		if enqueue is None:
+			self._set_common_headers(404)
+			self.wfile.write(b'{"ok": false, "error": "queue_disabled"}')
+			return
+		payload = self._read_json()
+		if payload is None:
+			return
+		defaults: Any = {}
+		if isinstance(payload, dict):
+			items, defaults = payload.get("items"), payload.get("defaults") or {}
+		else:
+			items = payload
+		if not isinstance(items, list) or not isinstance(defaults, dict):
+			self._set_common_headers(400)
+			self.wfile.write(b'{"ok": false, "error": "expected_items"}')
+			return
+		objects = [defaults] + [item for item in items if isinstance(item, dict)]
+		if any(name in obj for obj in objects for name in LOCAL_ONLY_FIELDS):
+			self._set_common_headers(400)
+			self.wfile.write(b'{"ok": false, "error": "output_fields_not_allowed"}')
+			return
+		try:
+			result = enqueue(items, defaults)
+		except Exception as exc:
+			_log.exception("Enqueue error: %s", exc)
+			self._set_common_headers(500)
+			self.wfile.write(b'{"ok": false, "error": "enqueue_failed"}')
+			return
+		result["errors"] = [
+			{"index": index, "error": message}
+			for index, message in result.get("errors", [])
+		]
+		self._set_common_headers(200)
+		self.wfile.write(json.dumps(dict(result, ok=True)).encode("utf-8"))
+
 	def do_GET(self):  # noqa: N802
 		# Health endpoint for quick checks
 		if self.path == "/health":
 			self._set_common_headers(200)
 			self.wfile.write(b'{"ok": true, "status": "healthy"}')
 			return
+		if self.path == "/metrics":
+			self._send_metrics()
+			return
 		# Otherwise 404
 		self._set_common_headers(404)
 		self.wfile.write(b'{"ok": false, "error": "not_found"}')
 
+	def _send_metrics(self) -> None:
+		renderer: Optional[Callable[[], str]] = getattr(self.server, "metrics_renderer", None)
+		if renderer is None:
+			from vidharvester.download.metrics import REGISTRY
+
+			renderer = REGISTRY.render
+		try:
+			body = renderer().encode("utf-8")
+		except Exception as exc:
+			_log.exception("Metrics render failed: %s", exc)
+			self._set_common_headers(500)
+			self.wfile.write(b'{"ok": false, "error": "metrics_failed"}')
+			return
+		self.send_response(200)
+		self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
 	def log_message(self, fmt: str, *args):  # quiet default stdout noise
-		_log.info("%s - " + fmt, self.client_address[0], *args)
+		# Remote workers poll claim/renew every scheduler pass
+		polling = self.path in ("/queue/claim", "/queue/renew")
+		level = logging.DEBUG if polling else logging.INFO
+		_log.log(level, "%s - " + fmt, self.client_address[0], *args)
+
 
+class _Server(ThreadingHTTPServer):
+	daemon_threads = True
 
-class _Server(HTTPServer):
-	def __init__(self, server_address, RequestHandlerClass, callback: Callable[[dict], None]):
+	def __init__(
+		self,
+		server_address,
+		RequestHandlerClass,
+		callback: Callable[[dict], None],
+		metrics_renderer: Optional[Callable[[], str]] = None,
+		enqueue: Optional[Callable[[List[Any], dict], dict]] = None,
+		queue_service: Any = None,
+		token: Optional[str] = None,
+		capture_requires_token: bool = False,
+	):
 		super().__init__(server_address, RequestHandlerClass)
 		self.callback = callback
+		self.metrics_renderer = metrics_renderer
+		self.enqueue = enqueue
+		self.queue_service = queue_service
+		self.token = token
+		self.capture_requires_token = capture_requires_token
 
 
-def start_server(port: int, callback: Callable[[dict], None]) -> threading.Thread:
-	"""Start the capture HTTP server on 127.0.0.1:`port`.
+def start_server(
+	port: int,
+	callback: Callable[[dict], None],
+	metrics_renderer: Optional[Callable[[], str]] = None,
+	enqueue: Optional[Callable[[List[Any], dict], dict]] = None,
+	queue_service: Any = None,
+	host: str = "127.0.0.1",
+	token: Optional[str] = None,
+	capture_requires_token: bool = False,
+) -> threading.Thread:
+	"""Start the capture HTTP server on `host`:`port` (loopback by default).
 
+	GET /metrics serves `metrics_renderer()` (the process-wide registry by default)
+	in Prometheus text format. POST /queue calls `enqueue(items, defaults)`, which
+	returns a dict with `queued`, `skipped` and `errors` as (index, message) pairs.
+	With a `queue_service` (a `LocalQueue`), POST /queue/claim, /queue/renew and
+	/queue/finish let workers on other nodes share this instance's queue. The /queue
+	endpoints require `Authorization: Bearer <token>` and are refused without a `token`;
+	with `capture_requires_token`, so is POST /capture.
 	Returns the daemon thread running `serve_forever()`.
 	"""
-	server = _Server(("127.0.0.1", port), _CaptureRequestHandler, callback)
+	server = _Server(
+		(host, port),
+		_CaptureRequestHandler,
+		callback,
+		metrics_renderer,
+		enqueue,
+		queue_service,
+		token,
+		capture_requires_token,
+	)
 	thread = threading.Thread(target=server.serve_forever, name=f"capture-server:{port}")
 	thread.daemon = True
 	thread.start()
-	_log.info("Capture server listening on http://127.0.0.1:%d/capture", port)
+	_log.info("Capture server listening on http://%s:%d/capture", host, port)
 	return thread
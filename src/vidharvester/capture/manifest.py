@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+import urllib.request
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from vidharvester.utils.formatting import human_size
+from vidharvester.utils.locks import KeyedLocks
+
+
+HLS = "hls"
+DASH = "dash"
+
+# Manifests larger than this are not parsed (a media playlist of a very long stream
+# is a few MB)
+MAX_MANIFEST_BYTES = 8 * 1024 * 1024
+FETCH_TIMEOUT = 10.0
+DEFAULT_USER_AGENT = (
+	"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+	"(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+)
+# Finished (VOD) manifests don't change; live ones are re-fetched after a few seconds
+CACHE_SECONDS = 600.0
+LIVE_CACHE_SECONDS = 5.0
+CACHE_ENTRIES = 256
+
+_HLS_TYPES = (
+	"application/vnd.apple.mpegurl",
+	"application/x-mpegurl",
+	"audio/mpegurl",
+	"audio/x-mpegurl",
+)
+_DASH_TYPES = ("application/dash+xml",)
+_ATTRIBUTE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+_ISO_DURATION = re.compile(
+	r"P(?:(?P<days>[\d.]+)D)?"
+	r"(?:T(?:(?P<hours>[\d.]+)H)?(?:(?P<minutes>[\d.]+)M)?(?:(?P<seconds>[\d.]+)S)?)?$"
+)
+
+
+class ManifestError(Exception):
+	"""The URL could not be fetched or is not an HLS/DASH manifest."""
+
+
+@dataclass
+class Variant:
+	"""One stream of a manifest: an HLS variant/rendition or a DASH representation."""
+
+	# Named like yt-dlp's generic extractor: "hls-<kbps>", "dash-<representation id>"
+	format_id: str
+	url: str  # HLS media playlist; for DASH the manifest itself
+	kind: str  # "video" (video with or without muxed audio) or "audio"
+	bandwidth: Optional[int] = None  # bits per second
+	width: Optional[int] = None
+	height: Optional[int] = None
+	codecs: Optional[str] = None
+	frame_rate: Optional[float] = None
+	# HLS: audio comes from this separate rendition group
+	audio_group: Optional[str] = None
+	language: Optional[str] = None
+
+	@property
+	def resolution(self) -> Optional[str]:
+		return f"{self.width}x{self.height}" if self.width and self.height else None
+
+	def estimated_size(self, duration: Optional[float]) -> Optional[int]:
+		if not self.bandwidth or not duration:
+			return None
+		return int(self.bandwidth / 8 * duration)
+
+
+@dataclass
+class Manifest:
+	url: str
+	protocol: str  # HLS or DASH
+	variants: List[Variant] = field(default_factory=list)
+	duration: Optional[float] = None  # seconds; None for live streams or when unknown
+	live: bool = False
+
+	def variant(self, format_id: str) -> Optional[Variant]:
+		for variant in self.variants:
+			if variant.format_id == format_id:
+				return variant
+		return None
+
+	def best(self, kind: str = "video") -> Optional[Variant]:
+		candidates = [v for v in self.variants if v.kind == kind]
+		return max(
+			candidates, key=lambda v: ((v.height or 0), (v.bandwidth or 0)), default=None
+		)
+
+	def audio_for(self, variant: Variant) -> Optional[Variant]:
+		"""Best rendition of `variant`'s separate audio group, if it has one."""
+		if not variant.audio_group:
+			return None
+		group = [
+			v
+			for v in self.variants
+			if v.kind == "audio" and v.audio_group == variant.audio_group
+		]
+		return max(group, key=lambda v: v.bandwidth or 0, default=None)
+
+	def estimated_size(self, variant: Optional[Variant] = None) -> Optional[int]:
+		"""Bytes for `variant` (default: the best video) plus its separate audio.
+
+		None when the bitrates are not known.
+		"""
+		variant = variant or self.best() or self.best("audio")
+		if variant is None:
+			return None
+		size = variant.estimated_size(self.duration)
+		audio = self.audio_for(variant)
+		if size is not None and audio is not None:
+			size += audio.estimated_size(self.duration) or 0
+		return size
+
+	def summary(self) -> str:
+		"""One line for lists, e.g. "HLS, 5 variants up to 1920x1080, 12:34, ~850 MB"."""
+		videos = [v for v in self.variants if v.kind == "video"]
+		parts = [self.protocol.upper()]
+		if videos:
+			best = self.best()
+			top = f" up to {best.resolution}" if best is not None and best.resolution else ""
+			parts.append(f"{len(videos)} variant{'s' if len(videos) != 1 else ''}{top}")
+		elif self.variants:
+			plural = "s" if len(self.variants) != 1 else ""
+			parts.append(f"{len(self.variants)} audio stream{plural}")
+		if self.live:
+			parts.append("live")
+		elif self.duration:
+			minutes, seconds = divmod(int(self.duration), 60)
+			hours, minutes = divmod(minutes, 60)
+			if hours:
+				parts.append(f"{hours}:{minutes:02d}:{seconds:02d}")
+			else:
+				parts.append(f"{minutes}:{seconds:02d}")
+		size = self.estimated_size()
+		if size:
+			parts.append(f"~{human_size(size)}")
+		return ", ".join(parts)
+
+
+def manifest_protocol(url: str, content_type: Optional[str] = None) -> Optional[str]:
+	"""HLS or DASH when the URL or content type names a manifest, else None."""
+	content_type = (content_type or "").split(";", 1)[0].strip().lower()
+	if content_type in _HLS_TYPES:
+		return HLS
+	if content_type in _DASH_TYPES:
+		return DASH
+	path = urlsplit(url).path.lower()
+	if path.endswith(".m3u8"):
+		return HLS
+	if path.endswith(".mpd"):
+		return DASH
+	return None
+
+
+def _fetch(url: str, headers: Optional[Dict[str, str]]) -> Tuple[str, str, str]:
+	"""(final URL after redirects, content type, body text)."""
+	request = urllib.request.Request(
+		url, headers={"User-Agent": DEFAULT_USER_AGENT, **(headers or {})}
+	)
+	try:
+		with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+			body = response.read(MAX_MANIFEST_BYTES + 1)
+			final_url = response.geturl()
+			content_type = response.headers.get("Content-Type", "")
+	except Exception as exc:
+		raise ManifestError(f"Could not fetch {url}: {exc}") from exc
+	if len(body) > MAX_MANIFEST_BYTES:
+		raise ManifestError(f"Manifest larger than {human_size(MAX_MANIFEST_BYTES)}: {url}")
+	return final_url, content_type, body.decode("utf-8", errors="replace")
+
+
+def _attributes(line: str) -> Dict[str, str]:
+	_, _, attrs = line.partition(":")
+	return {key: value.strip('"') for key, value in _ATTRIBUTE.findall(attrs)}
+
+
+def _int(value: Any) -> Optional[int]:
+	try:
+		return int(float(value))
+	except (TypeError, ValueError):
+		return None
+
+
+def _float(value: Any) -> Optional[float]:
+	try:
+		return float(value)
+	except (TypeError, ValueError):
+		return None
+
+
+def _hls_media_duration(text: str) -> Tuple[Optional[float], bool]:
+	"""(total segment duration, live) of an HLS media playlist."""
+	total = 0.0
+	for line in text.splitlines():
+		if line.startswith("#EXTINF:"):
+			total += _float(line[8:].split(",", 1)[0]) or 0.0
+	live = "#EXT-X-ENDLIST" not in text and "#EXT-X-PLAYLIST-TYPE:VOD" not in text
+	return (total or None), live
+
+
+def parse_hls(text: str, url: str) -> Manifest:
+	"""Parse an HLS master or media playlist.
+
+	A master's duration needs one of its media playlists; see `inspect`.
+	"""
+	if not text.lstrip().startswith("#EXTM3U"):
+		raise ManifestError(f"Not an HLS playlist: {url}")
+	manifest = Manifest(url, HLS)
+	if "#EXT-X-STREAM-INF" not in text:
+		# A media playlist: one stream, described only by its segments
+		manifest.duration, manifest.live = _hls_media_duration(text)
+		manifest.variants.append(Variant("hls", url, "video"))
+		return manifest
+	lines = [line.strip() for line in text.splitlines()]
+	seen: Dict[str, int] = {}
+	for index, line in enumerate(lines):
+		if line.startswith("#EXT-X-MEDIA:"):
+			attrs = _attributes(line)
+			if attrs.get("TYPE") != "AUDIO" or not attrs.get("URI"):
+				continue  # audio muxed into the variants, or subtitles
+			name = attrs.get("NAME") or attrs.get("LANGUAGE") or "audio"
+			name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+			manifest.variants.append(
+				Variant(
+					format_id=f"hls-{attrs.get('GROUP-ID', 'audio')}-{name}",
+					url=urljoin(url, attrs["URI"]),
+					kind="audio",
+					audio_group=attrs.get("GROUP-ID"),
+					language=attrs.get("LANGUAGE"),
+				)
+			)
+		elif line.startswith("#EXT-X-STREAM-INF:"):
+			uri = next(
+				(nxt for nxt in lines[index + 1:] if nxt and not nxt.startswith("#")), None
+			)
+			if uri is None:
+				continue
+			attrs = _attributes(line)
+			bandwidth = _int(attrs.get("AVERAGE-BANDWIDTH")) or _int(attrs.get("BANDWIDTH"))
+			width = height = None
+			if "RESOLUTION" in attrs and "x" in attrs["RESOLUTION"]:
+				width, height = (_int(n) for n in attrs["RESOLUTION"].split("x", 1))
+			codecs = attrs.get("CODECS")
+			audio_only = bool(codecs) and not width and all(
+				c.strip().startswith(("mp4a", "ac-3", "ec-3", "opus")) for c in codecs.split(",")
+			)
+			format_id = f"hls-{round(bandwidth / 1000)}" if bandwidth else "hls"
+			seen[format_id] = seen.get(format_id, 0) + 1
+			if seen[format_id] > 1:
+				format_id = f"{format_id}-{seen[format_id] - 1}"
+			manifest.variants.append(
+				Variant(
+					format_id=format_id,
+					url=urljoin(url, uri),
+					kind="audio" if audio_only else "video",
+					bandwidth=bandwidth,
+					width=width,
+					height=height,
+					codecs=codecs,
+					frame_rate=_float(attrs.get("FRAME-RATE")),
+					audio_group=attrs.get("AUDIO"),
+				)
+			)
+	return manifest
+
+
+def _iso_duration(value: Optional[str]) -> Optional[float]:
+	match = _ISO_DURATION.match(value or "")
+	if not match or not any(match.groupdict().values()):
+		return None
+	parts = {k: float(v) for k, v in match.groupdict().items() if v}
+	return (
+		parts.get("days", 0) * 86400
+		+ parts.get("hours", 0) * 3600
+		+ parts.get("minutes", 0) * 60
+		+ parts.get("seconds", 0)
+	)
+
+
+def _local(tag: str) -> str:
+	return tag.rsplit("}", 1)[-1]
+
+
+def parse_dash(text: str, url: str) -> Manifest:
+	try:
+		root = ET.fromstring(text)
+	except ET.ParseError as exc:
+		raise ManifestError(f"Not a DASH manifest: {url} ({exc})") from exc
+	if _local(root.tag) != "MPD":
+		raise ManifestError(f"Not a DASH manifest: {url}")
+	manifest = Manifest(url, DASH)
+	manifest.live = root.get("type") == "dynamic"
+	manifest.duration = _iso_duration(root.get("mediaPresentationDuration"))
+	periods = [el for el in root if _local(el.tag) == "Period"]
+	if manifest.duration is None and periods:
+		total = sum(_iso_duration(p.get("duration")) or 0.0 for p in periods)
+		manifest.duration = total or None
+	# Multi-period manifests (e.g. with ads) repeat the representations; the first
+	# period describes them
+	first_period = periods[0] if periods else []
+	adaptations = (el for el in first_period if _local(el.tag) == "AdaptationSet")
+	for adaptation in adaptations:
+		for representation in (el for el in adaptation if _local(el.tag) == "Representation"):
+			def attr(name: str) -> Optional[str]:
+				return representation.get(name) or adaptation.get(name)
+
+			mime = attr("mimeType") or ""
+			content = adaptation.get("contentType") or mime.split("/", 1)[0]
+			if content not in ("video", "audio"):
+				continue  # text tracks, images
+			rate = attr("frameRate")
+			if rate and "/" in rate:
+				num, den = rate.split("/", 1)
+				frame_rate = (_float(num) or 0) / (_float(den) or 1)
+			else:
+				frame_rate = _float(rate)
+			manifest.variants.append(
+				Variant(
+					format_id=f"dash-{representation.get('id') or len(manifest.variants)}",
+					url=url,
+					kind=content,
+					bandwidth=_int(representation.get("bandwidth")),
+					width=_int(attr("width")),
+					height=_int(attr("height")),
+					codecs=attr("codecs"),
+					frame_rate=frame_rate,
+					language=adaptation.get("lang"),
+				)
+			)
+	return manifest
+
+
+class ManifestCache:
+	"""Inspected manifests by URL, with an age limit and a size bound.
+
+	Beyond `entries`, the least recently used go first. Concurrent requests for the
+	same URL share one fetch.
+	"""
+
+	def __init__(self, entries: int = CACHE_ENTRIES) -> None:
+		self.entries = entries
+		self._lock = threading.Lock()
+		self._items: "OrderedDict[str, Tuple[float, Manifest]]" = OrderedDict()
+		self._inflight = KeyedLocks()
+
+	def get(self, url: str) -> Optional[Manifest]:
+		with self._lock:
+			held = self._items.get(url)
+			if held is None:
+				return None
+			expires, manifest = held
+			if expires < time.monotonic():
+				del self._items[url]
+				return None
+			self._items.move_to_end(url)
+			return manifest
+
+	def put(self, url: str, manifest: Manifest) -> None:
+		ttl = LIVE_CACHE_SECONDS if manifest.live else CACHE_SECONDS
+		with self._lock:
+			self._items[url] = (time.monotonic() + ttl, manifest)
+			self._items.move_to_end(url)
+			while len(self._items) > self.entries:
+				self._items.popitem(last=False)
+
+	def inspect(self, url: str, headers: Optional[Dict[str, str]] = None) -> Manifest:
+		"""The manifest at `url`, fetched and parsed at most once per cache period."""
+		manifest = self.get(url)
+		if manifest is not None:
+			return manifest
+		with self._inflight.hold(url):
+			manifest = self.get(url)
+			if manifest is None:
+				manifest = _inspect(url, headers)
+				self.put(url, manifest)
+		return manifest
+
+
+def _inspect(url: str, headers: Optional[Dict[str, str]]) -> Manifest:
+	final_url, content_type, text = _fetch(url, headers)
+	protocol = manifest_protocol(final_url, content_type) or manifest_protocol(url)
+	if protocol is None:
+		protocol = HLS if text.lstrip().startswith("#EXTM3U") else DASH
+	if protocol == DASH:
+		manifest = parse_dash(text, final_url)
+	else:
+		manifest = parse_hls(text, final_url)
+		if manifest.duration is None and manifest.variants:
+			# A master playlist has no segments: the duration comes from one of its
+			# media playlists
+			probe = manifest.best() or manifest.variants[0]
+			try:
+				_, _, media = _fetch(probe.url, headers)
+				manifest.duration, manifest.live = _hls_media_duration(media)
+			except ManifestError:
+				pass
+	manifest.url = url
+	return manifest
+
+
+MANIFESTS = ManifestCache()
+
+
+def inspect(url: str, headers: Optional[Dict[str, str]] = None) -> Manifest:
+	"""Fetch (or take from the shared cache) and parse the HLS/DASH manifest at `url`."""
+	return MANIFESTS.inspect(url, headers)
@@ -1,26 +1,33 @@
 from __future__ import annotations
 
 import asyncio
-from typing import List
-
-from playwright.async_api import async_playwright
+from typing import Callable, List, Optional
 
 from vidharvester.utils.logger import get_logger
 
 
 _log = get_logger("capture.playwright")
 
+# How often a running capture checks whether it was canceled
+CANCEL_POLL_SECONDS = 0.1
+
 
-async def capture_page_media(url: str, timeout_ms: int = 30000) -> List[str]:
+async def capture_page_media(
+    url: str, timeout_ms: int = 30000, canceled: Optional[Callable[[], bool]] = None
+) -> List[str]:
     """Use Playwright to open a page headlessly and collect media manifest/segment URLs.
     
     Args:
         url: URL to navigate to
         timeout_ms: Page load timeout in milliseconds
+        canceled: Polled while the page loads; once it returns True the browser is
+            closed and the URLs found so far are returned
         
     Returns:
         List of candidate media URLs found
     """
+    from playwright.async_api import async_playwright
+
     media_urls = set()
     
     async with async_playwright() as p:
@@ -39,14 +46,27 @@ async def capture_page_media(url: str, timeout_ms: int = 30000) -> List[str]:
                 media_urls.add(response_url)
         
         page.on("response", handle_response)
-        
+
+        async def close_on_cancel():
+            while not canceled():
+                await asyncio.sleep(CANCEL_POLL_SECONDS)
+            await browser.close()
+
+        watcher = None
+        if canceled is not None:
+            watcher = asyncio.create_task(close_on_cancel())
         try:
             await page.goto(url, timeout=timeout_ms)
             # Wait a bit for dynamic content
             await page.wait_for_timeout(3000)
         except Exception as exc:
-            _log.warning("Failed to load page %s: %s", url, exc)
+            if canceled is not None and canceled():
+                _log.info("Headless capture of %s canceled", url)
+            else:
+                _log.warning("Failed to load page %s: %s", url, exc)
         finally:
+            if watcher is not None:
+                watcher.cancel()
             await browser.close()
     
     return list(media_urls)
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import signal
+import threading
+from typing import List, Optional
+
+from vidharvester.capture.capture_store import CaptureWriter
+from vidharvester.capture.extension_server import start_server
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.download.bulk import api_token, default_queue_item
+from vidharvester.download.dedup import POLICY_FORCE, duplicate_policy
+from vidharvester.download.engine import prewarm_extractors
+from vidharvester.download.queue_store import LocalQueue, RemoteQueue
+from vidharvester.download.scheduler import QueueScheduler
+from vidharvester.utils.log_pipeline import LogPipeline
+from vidharvester.utils.logger import get_logger
+from vidharvester.utils.profiling import dump_thread_stacks
+
+
+_log = get_logger("daemon")
+
+
+def build_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(
+		prog="vidharvester serve",
+		description="Run the download queue and capture server without a GUI.",
+	)
+	parser.add_argument(
+		"--port", type=int, default=8089, help="capture server port (default: 8089)"
+	)
+	parser.add_argument(
+		"--host",
+		default="127.0.0.1",
+		help="capture server address; use 0.0.0.0 to serve the queue to other nodes "
+		"(default: 127.0.0.1)",
+	)
+	parser.add_argument(
+		"--db", default=None, help="path to vidharvester.db (default: app data dir)"
+	)
+	parser.add_argument(
+		"--max-concurrent",
+		type=int,
+		default=None,
+		help="override the max_concurrent_downloads setting",
+	)
+	parser.add_argument(
+		"--enqueue-captures",
+		action="store_true",
+		help="add URLs posted to /capture to the queue with the default options; "
+		"/capture then requires the queue token as well",
+	)
+	parser.add_argument(
+		"--queue-token",
+		default=None,
+		help="bearer token required by the /queue endpoints and sent to --queue-url "
+		"(default: the token shown in the GUI settings)",
+	)
+	parser.add_argument(
+		"--queue-url",
+		default=None,
+		help="run as a worker for another instance's queue (e.g. http://host:8089) "
+		"instead of the local one",
+	)
+	return parser
+
+
+def _is_loopback(host: str) -> bool:
+	if host == "localhost":
+		return True
+	try:
+		return ipaddress.ip_address(host).is_loopback
+	except ValueError:
+		return False
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	parser = build_parser()
+	args = parser.parse_args(argv)
+	if not args.queue_url and not args.queue_token and not _is_loopback(args.host):
+		# The stored token is unknown to the other nodes; an explicit one makes the
+		# exposure deliberate
+		parser.error(
+			f"--host {args.host} serves the queue to the network; pass --queue-token as well"
+		)
+	db = DatabaseManager(args.db)
+	# Also kept in the rotating log files, tagged with the job id
+	pipeline = LogPipeline()
+
+	def on_log(message: str) -> None:
+		_log.info(message)
+		pipeline.emit(message)
+
+	def on_job_log(message: str, job: str) -> None:
+		_log.info("[%s] %s", job, message)
+		pipeline.emit(message, job)
+
+	if args.queue_url:
+		queue = RemoteQueue(args.queue_url, args.queue_token)
+	else:
+		queue = LocalQueue(db)
+	scheduler = QueueScheduler(
+		db,
+		on_started=lambda qid: _log.info("Started queue item %d", qid),
+		on_finished=lambda qid, ok: _log.info(
+			"Queue item %d %s", qid, "completed" if ok else "failed"
+		),
+		on_log=on_log,
+		on_job_log=on_job_log,
+		max_concurrent=args.max_concurrent,
+		queue=queue,
+	)
+
+	captures = CaptureWriter(db)
+
+	def on_capture(payload: dict) -> None:
+		url = payload.get("url", "")
+		_log.info("Captured %s", url)
+		captures.add(payload)
+		if not args.enqueue_captures:
+			return
+		if payload.get("playlist"):
+			pid = scheduler.expand_playlist(url, default_queue_item(db, url))
+			_log.info("Expanding playlist %d into the queue", pid)
+			return
+		if duplicate_policy(db) != POLICY_FORCE and db.find_duplicate(url) is not None:
+			_log.info("Already downloaded, not queued: %s", url)
+			return
+		qid = db.add_queue_item(default_queue_item(db, url))
+		_log.info("Queued capture as item %d", qid)
+		scheduler.wake()
+
+	stop = threading.Event()
+	for sig in (signal.SIGINT, signal.SIGTERM):
+		signal.signal(sig, lambda *_: stop.set())
+	if hasattr(signal, "SIGUSR1"):
+		# `kill -USR1 <pid>` writes the live thread stacks, e.g. of a stuck worker
+		signal.signal(
+			signal.SIGUSR1,
+			lambda *_: _log.info("Thread stacks written to %s", dump_thread_stacks()),
+		)
+
+	def on_enqueue(raws: list, defaults: dict) -> dict:
+		result = scheduler.enqueue(raws, dict(default_queue_item(db), **defaults))
+		_log.info(
+			"Queued %d item(s) via /queue (%d already downloaded)",
+			result.queued,
+			result.skipped,
+		)
+		return {"queued": result.queued, "skipped": result.skipped, "errors": result.errors}
+
+	if args.queue_url:
+		# Worker node: captures and imports go to the instance that owns the queue
+		_log.info("Working the queue at %s", args.queue_url)
+	else:
+		start_server(
+			args.port,
+			on_capture,
+			enqueue=on_enqueue,
+			queue_service=queue,
+			host=args.host,
+			token=args.queue_token or api_token(db),
+			# Otherwise any web page could fill the queue through the loopback port
+			capture_requires_token=args.enqueue_captures,
+		)
+	threading.Thread(target=prewarm_extractors, name="prewarm-yt-dlp", daemon=True).start()
+	scheduler.start()
+	_log.info("VidHarvester serving headless (db: %s)", db.db_path)
+	stop.wait()
+	_log.info("Shutting down; canceling %d running job(s)", scheduler.active_count)
+	scheduler.stop()
+	captures.close()
+	pipeline.close()
+	return 0
@@ -1,22 +1,35 @@
 from __future__ import annotations
 
+import json
 import os
 import sqlite3
 import threading
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
+from vidharvester.utils.paths import app_data_dir
+from vidharvester.utils.urls import normalize_url
 
-def _app_data_dir() -> str:
-	base = os.getenv("APPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
-	path = os.path.join(base, "VidHarvester")
-	os.makedirs(path, exist_ok=True)
-	return path
+
+# Priority aging: each priority level counts as this many seconds of waiting
+PRIORITY_AGING_SECONDS = 600.0
+
+_EPOCH = datetime(1970, 1, 1)
 
 
 def default_db_path() -> str:
-	return os.path.join(_app_data_dir(), "vidharvester.db")
+	return os.path.join(app_data_dir(), "vidharvester.db")
+
+
+def _sched_key(created: datetime, priority: int) -> float:
+	"""Pick order for "priority_aging": the enqueue time moved earlier by the priority.
+
+	Ordering by this ascending equals ordering by priority + waited /
+	PRIORITY_AGING_SECONDS descending, so waiting items overtake higher priorities in
+	time, and it can be indexed.
+	"""
+	return (created - _EPOCH).total_seconds() - priority * PRIORITY_AGING_SECONDS
 
 
 class DatabaseManager:
@@ -25,6 +38,7 @@ class DatabaseManager:
 	def __init__(self, db_path: Optional[str] = None) -> None:
 		self.db_path = db_path or default_db_path()
 		self._lock = threading.RLock()
+		self.has_fts = False
 		self._init()
 
 	def _connect(self) -> sqlite3.Connection:
@@ -34,6 +48,12 @@ class DatabaseManager:
 
 	def _init(self) -> None:
 		with self._connect() as con:
+			try:
+				# Lets several instances read while one writes; unsupported on some
+				# network filesystems
+				con.execute("PRAGMA journal_mode=WAL")
+			except sqlite3.DatabaseError:
+				pass
 			cur = con.cursor()
 			cur.executescript(
 				"""
@@ -72,7 +92,197 @@ class DatabaseManager:
 				);
 				"""
 			)
+			self._ensure_columns(
+				con,
+				"history",
+				{"normalized_url": "TEXT", "extractor_key": "TEXT", "video_id": "TEXT"},
+			)
+			cur.executescript(
+				"""
+				CREATE INDEX IF NOT EXISTS idx_history_normalized_url
+					ON history(normalized_url);
+				CREATE INDEX IF NOT EXISTS idx_history_extractor_id
+					ON history(extractor_key, video_id);
+				"""
+			)
+			missing = con.execute(
+				"SELECT id, url FROM history WHERE normalized_url IS NULL"
+			).fetchall()
+			if missing:
+				con.executemany(
+					"UPDATE history SET normalized_url=? WHERE id=?",
+					[(normalize_url(r["url"]), r["id"]) for r in missing],
+				)
+			self._ensure_columns(
+				con,
+				"queue",
+				{
+					"playlist_id": "INTEGER",
+					"playlist_index": "INTEGER",
+					"priority": "INTEGER NOT NULL DEFAULT 0",
+					"sched_key": "REAL",
+					"size_estimate": "INTEGER",
+					"attempts": "INTEGER NOT NULL DEFAULT 0",
+					"next_attempt_at": "TEXT",
+					"failure_class": "TEXT",
+					"worker_id": "TEXT",
+					"lease_expires_at": "TEXT",
+				},
+			)
+			missing = con.execute(
+				"SELECT id, created_at, priority FROM queue WHERE sched_key IS NULL"
+			).fetchall()
+			if missing:
+				con.executemany(
+					"UPDATE queue SET sched_key=? WHERE id=?",
+					[
+						(
+							_sched_key(datetime.fromisoformat(r["created_at"]), r["priority"]),
+							r["id"],
+						)
+						for r in missing
+					],
+				)
+			cur.executescript(
+				"""
+				CREATE INDEX IF NOT EXISTS idx_queue_status_id ON queue(status, id);
+				CREATE INDEX IF NOT EXISTS idx_queue_status_sched
+					ON queue(status, sched_key);
+				CREATE INDEX IF NOT EXISTS idx_queue_status_size
+					ON queue(status, size_estimate);
+				CREATE INDEX IF NOT EXISTS idx_queue_status_next_attempt
+					ON queue(status, next_attempt_at);
+				CREATE INDEX IF NOT EXISTS idx_queue_status_lease
+					ON queue(status, lease_expires_at);
+
+				CREATE TABLE IF NOT EXISTS queue_attempts (
+					id INTEGER PRIMARY KEY AUTOINCREMENT,
+					queue_id INTEGER NOT NULL,
+					started_at TEXT,
+					finished_at TEXT NOT NULL,
+					outcome TEXT NOT NULL,
+					failure_class TEXT,
+					error TEXT,
+					next_attempt_at TEXT
+				);
+				CREATE INDEX IF NOT EXISTS idx_queue_attempts_queue_id ON queue_attempts(queue_id);
+				CREATE UNIQUE INDEX IF NOT EXISTS idx_queue_playlist_entry
+					ON queue(playlist_id, playlist_index) WHERE playlist_id IS NOT NULL;
+
+				CREATE TABLE IF NOT EXISTS playlists (
+					id INTEGER PRIMARY KEY AUTOINCREMENT,
+					url TEXT NOT NULL,
+					title TEXT,
+					item_json TEXT NOT NULL,
+					status TEXT NOT NULL DEFAULT 'expanding',
+					entries_seen INTEGER NOT NULL DEFAULT 0,
+					entries_queued INTEGER NOT NULL DEFAULT 0,
+					entries_skipped INTEGER NOT NULL DEFAULT 0,
+					created_at TEXT NOT NULL,
+					updated_at TEXT NOT NULL
+				);
+				"""
+			)
+			self._ensure_columns(con, "playlists", {"last_entry": "TEXT"})
+			cur.executescript(
+				"""
+				CREATE TABLE IF NOT EXISTS job_metrics (
+					id INTEGER PRIMARY KEY AUTOINCREMENT,
+					queue_id INTEGER,
+					url TEXT NOT NULL,
+					success INTEGER NOT NULL,
+					path TEXT,
+					bytes INTEGER,
+					retries INTEGER,
+					probe_s REAL,
+					fallback_parse_s REAL,
+					headless_capture_s REAL,
+					transfer_s REAL,
+					postprocess_s REAL,
+					db_write_s REAL,
+					total_s REAL,
+					finished_at TEXT NOT NULL
+				);
+				CREATE INDEX IF NOT EXISTS idx_job_metrics_queue_id ON job_metrics(queue_id);
+
+				CREATE TABLE IF NOT EXISTS captures (
+					id INTEGER PRIMARY KEY AUTOINCREMENT,
+					url TEXT NOT NULL,
+					normalized_url TEXT NOT NULL,
+					page_url TEXT,
+					content_type TEXT,
+					hits INTEGER NOT NULL DEFAULT 1,
+					first_seen TEXT NOT NULL,
+					last_seen TEXT NOT NULL
+				);
+				CREATE UNIQUE INDEX IF NOT EXISTS idx_captures_normalized_url
+					ON captures(normalized_url);
+				CREATE INDEX IF NOT EXISTS idx_captures_last_seen ON captures(last_seen, id);
+
+				CREATE TABLE IF NOT EXISTS domain_strategies (
+					domain TEXT NOT NULL,
+					path TEXT NOT NULL,
+					successes REAL NOT NULL DEFAULT 0,
+					failures REAL NOT NULL DEFAULT 0,
+					avg_seconds REAL,
+					updated_at TEXT NOT NULL,
+					PRIMARY KEY (domain, path)
+				);
+				"""
+			)
+			self._ensure_columns(con, "captures", {"streams": "TEXT"})
 			con.commit()
+			self.has_fts = self._init_history_fts(con)
+
+	@staticmethod
+	def _init_history_fts(con: sqlite3.Connection) -> bool:
+		"""Create the FTS5 index over history title/url, kept in sync by triggers.
+
+		Returns False when the SQLite build lacks FTS5; search then falls back to LIKE.
+		"""
+		exists = con.execute(
+			"SELECT 1 FROM sqlite_master WHERE type='table' AND name='history_fts'"
+		).fetchone()
+		try:
+			con.executescript(
+				"""
+				CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+					title, url, content='history', content_rowid='id'
+				);
+
+				CREATE TRIGGER IF NOT EXISTS history_fts_ai AFTER INSERT ON history BEGIN
+					INSERT INTO history_fts(rowid, title, url) VALUES (new.id, new.title, new.url);
+				END;
+
+				CREATE TRIGGER IF NOT EXISTS history_fts_ad AFTER DELETE ON history BEGIN
+					INSERT INTO history_fts(history_fts, rowid, title, url)
+					VALUES ('delete', old.id, old.title, old.url);
+				END;
+
+				CREATE TRIGGER IF NOT EXISTS history_fts_au
+				AFTER UPDATE OF title, url ON history BEGIN
+					INSERT INTO history_fts(history_fts, rowid, title, url)
+					VALUES ('delete', old.id, old.title, old.url);
+					INSERT INTO history_fts(rowid, title, url) VALUES (new.id, new.title, new.url);
+				END;
+				"""
+			)
+			if not exists:
+				con.execute("INSERT INTO history_fts(history_fts) VALUES ('rebuild')")
+			con.commit()
+			return True
+		except sqlite3.OperationalError:
+			return False
+
+	@staticmethod
+	def _ensure_columns(
+		con: sqlite3.Connection, table: str, columns: Dict[str, str]
+	) -> None:
+		"""Add columns missing from databases created by older versions."""
+		existing = {r[1] for r in con.execute(f"PRAGMA table_info({table})")}
+		for name, decl in columns.items():
+			if name not in existing:
+				con.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
 
 	# Settings
 	def get_setting(self, key: str, default: Optional[str] = None) -> Optional[str]:
@@ -88,24 +298,57 @@ class DatabaseManager:
 	# Queue
 	def add_queue_item(self, item: Dict[str, Any]) -> int:
 		with self._connect() as con:
-			cur = con.execute(
-				"""
-				INSERT INTO queue(url, mode, format, quality, output_dir, filename_template, status, created_at)
-				VALUES(?, ?, ?, ?, ?, ?, 'pending', ?)
-				""",
-				(
-					item["url"],
-					item["mode"],
-					item["format"],
-					item["quality"],
-					item["output_dir"],
-					item["filename_template"],
-					datetime.utcnow().isoformat(),
-				),
-			)
+			cur = con.execute(self._QUEUE_INSERT, self._queue_row(item, datetime.utcnow()))
 			con.commit()
 			return int(cur.lastrowid)
 
+	def add_queue_items(self, items: Iterable[Dict[str, Any]]) -> int:
+		"""Insert many queue items in one transaction; returns the number of rows added.
+
+		Items may carry `playlist_id`/`playlist_index`; an entry already queued for the
+		same playlist position is ignored.
+		"""
+		now = datetime.utcnow()
+		rows = [self._queue_row(item, now) for item in items]
+		with self._connect() as con:
+			added = self._insert_queue_rows(con, rows)
+			con.commit()
+			return added
+
+	_QUEUE_INSERT = """
+		INSERT OR IGNORE INTO queue(url, mode, format, quality, output_dir,
+			filename_template, title, status, created_at, playlist_id, playlist_index,
+			priority, sched_key, size_estimate)
+		VALUES(?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?, ?, ?, ?)
+	"""
+
+	@staticmethod
+	def _queue_row(item: Dict[str, Any], created: datetime) -> Tuple[Any, ...]:
+		priority = int(item.get("priority") or 0)
+		return (
+			item["url"],
+			item["mode"],
+			item["format"],
+			item["quality"],
+			item["output_dir"],
+			item["filename_template"],
+			item.get("title"),
+			created.isoformat(),
+			item.get("playlist_id"),
+			item.get("playlist_index"),
+			priority,
+			_sched_key(created, priority),
+			item.get("size_estimate"),
+		)
+
+	@classmethod
+	def _insert_queue_rows(
+		cls, con: sqlite3.Connection, rows: List[Tuple[Any, ...]]
+	) -> int:
+		before = con.total_changes
+		con.executemany(cls._QUEUE_INSERT, rows)
+		return con.total_changes - before
+
 	def update_queue_progress(self, qid: int, progress: Optional[float], speed: Optional[float], eta: Optional[int]) -> None:
 		with self._connect() as con:
 			con.execute(
@@ -120,9 +363,11 @@ class DatabaseManager:
 		if status == "running":
 			fields.append("started_at=?")
 			params.append(datetime.utcnow().isoformat())
-		if status in ("completed", "failed", "canceled"):
+		if status in ("completed", "failed", "canceled", "skipped"):
 			fields.append("finished_at=?")
 			params.append(datetime.utcnow().isoformat())
+		if status != "running":
+			fields.append("worker_id=NULL, lease_expires_at=NULL")
 		if title is not None:
 			fields.append("title=?")
 			params.append(title)
@@ -138,6 +383,349 @@ class DatabaseManager:
 				return list(con.execute(f"SELECT * FROM queue WHERE status IN ({qmarks}) ORDER BY id", tuple(statuses)))
 			return list(con.execute("SELECT * FROM queue ORDER BY id"))
 
+	def count_queue(self, statuses: Optional[Iterable[str]] = None) -> int:
+		with self._connect() as con:
+			if statuses:
+				statuses = list(statuses)
+				qmarks = ",".join(["?"] * len(statuses))
+				return int(
+					con.execute(
+						f"SELECT COUNT(*) FROM queue WHERE status IN ({qmarks})",
+						tuple(statuses),
+					).fetchone()[0]
+				)
+			return int(con.execute("SELECT COUNT(*) FROM queue").fetchone()[0])
+
+	@staticmethod
+	def _pending_pick(policy: str) -> Tuple[str, int]:
+		"""Indexed subquery selecting the ids of the next pending items under a policy.
+
+		Returns the SQL and how many times the limit must be bound.
+		"""
+		if policy == "priority_aging":
+			return (
+				"SELECT id FROM queue WHERE status='pending' ORDER BY sched_key, id LIMIT ?",
+				1,
+			)
+		if policy == "shortest_first":
+			# Known sizes first, then unknown sizes in FIFO order; each half uses an index
+			return (
+				"""
+				SELECT id FROM (
+					SELECT id FROM (
+						SELECT id FROM queue WHERE status='pending' AND size_estimate IS NOT NULL
+						ORDER BY size_estimate LIMIT ?
+					)
+					UNION ALL
+					SELECT id FROM (
+						SELECT id FROM queue WHERE status='pending' AND size_estimate IS NULL
+						ORDER BY id LIMIT ?
+					)
+				) LIMIT ?
+				""",
+				3,
+			)
+		return "SELECT id FROM queue WHERE status='pending' ORDER BY id LIMIT ?", 1
+
+	@staticmethod
+	def _policy_order(policy: str, rows: List[sqlite3.Row]) -> List[sqlite3.Row]:
+		if policy == "priority_aging":
+			return sorted(rows, key=lambda r: (r["sched_key"], r["id"]))
+		if policy == "shortest_first":
+			return sorted(
+				rows,
+				key=lambda r: (r["size_estimate"] is None, r["size_estimate"] or 0, r["id"]),
+			)
+		return sorted(rows, key=lambda r: r["id"])
+
+	def fetch_next_pending(self, policy: str, limit: int) -> List[sqlite3.Row]:
+		"""Next `limit` pending items in the order of a scheduling policy, via an index.
+
+		"fifo" orders by id, "priority_aging" by `sched_key`, and "shortest_first" by
+		`size_estimate` with unknown sizes after known ones in FIFO order.
+		"""
+		if limit <= 0:
+			return []
+		pick, binds = self._pending_pick(policy)
+		with self._connect() as con:
+			rows = list(
+				con.execute(f"SELECT * FROM queue WHERE id IN ({pick})", (limit,) * binds)
+			)
+		return self._policy_order(policy, rows)
+
+	def claim_pending(
+		self, worker_id: str, policy: str, limit: int, lease_seconds: float
+	) -> List[sqlite3.Row]:
+		"""Atomically mark up to `limit` pending items as running under `worker_id`'s lease.
+
+		One UPDATE ... RETURNING, so concurrent workers sharing the database never claim
+		the same item. SQLite builds without RETURNING (< 3.35) use an immediate
+		transaction.
+		"""
+		if limit <= 0:
+			return []
+		pick, binds = self._pending_pick(policy)
+		now = datetime.utcnow()
+		expires = (now + timedelta(seconds=lease_seconds)).isoformat()
+		params = (worker_id, expires, now.isoformat()) + (limit,) * binds
+		update = f"""
+			UPDATE queue SET status='running', worker_id=?, lease_expires_at=?, started_at=?,
+				next_attempt_at=NULL
+			WHERE status='pending' AND id IN ({pick})
+		"""
+		with self._connect() as con:
+			if sqlite3.sqlite_version_info >= (3, 35, 0):
+				rows = con.execute(update + " RETURNING *", params).fetchall()
+			else:
+				con.execute("BEGIN IMMEDIATE")
+				ids = [r[0] for r in con.execute(pick, (limit,) * binds)]
+				con.execute(update, params)
+				qmarks = ",".join(["?"] * len(ids))
+				rows = con.execute(
+					f"SELECT * FROM queue WHERE id IN ({qmarks}) AND worker_id=?",
+					tuple(ids) + (worker_id,),
+				).fetchall() if ids else []
+			con.commit()
+		return self._policy_order(policy, rows)
+
+	def renew_leases(
+		self, worker_id: str, qids: Iterable[int], lease_seconds: float
+	) -> List[int]:
+		"""Heartbeat: extend the leases `worker_id` still holds; returns those item ids."""
+		qids = list(qids)
+		if not qids:
+			return []
+		qmarks = ",".join(["?"] * len(qids))
+		expires = (datetime.utcnow() + timedelta(seconds=lease_seconds)).isoformat()
+		with self._connect() as con:
+			con.execute(
+				f"""
+				UPDATE queue SET lease_expires_at=?
+				WHERE id IN ({qmarks}) AND status='running' AND worker_id=?
+				""",
+				(expires,) + tuple(qids) + (worker_id,),
+			)
+			held = [
+				r[0]
+				for r in con.execute(
+					f"""
+					SELECT id FROM queue
+					WHERE id IN ({qmarks}) AND status='running' AND worker_id=?
+					""",
+					tuple(qids) + (worker_id,),
+				)
+			]
+			con.commit()
+			return held
+
+	def reclaim_expired_leases(self) -> List[int]:
+		"""Return running items whose lease ran out (crashed or stalled worker) to pending.
+
+		Rows marked running before leases existed have no expiry and are reclaimed too.
+		One immediate transaction, so a lease renewed meanwhile is never taken back.
+		"""
+		now = datetime.utcnow().isoformat()
+		with self._connect() as con:
+			con.execute("BEGIN IMMEDIATE")
+			rows = con.execute(
+				"""
+				SELECT id, worker_id, started_at FROM queue
+				WHERE status='running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+				""",
+				(now,),
+			).fetchall()
+			if not rows:
+				con.rollback()
+				return []
+			con.executemany(
+				"""
+				UPDATE queue SET status='pending', worker_id=NULL, lease_expires_at=NULL,
+					progress=NULL, speed=NULL, eta=NULL
+				WHERE id=? AND status='running'
+					AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+				""",
+				[(r["id"], now) for r in rows],
+			)
+			con.executemany(
+				"""
+				INSERT INTO queue_attempts(queue_id, started_at, finished_at, outcome, error)
+				VALUES(?, ?, ?, 'lease_expired', ?)
+				""",
+				[
+					(
+						r["id"],
+						r["started_at"],
+						now,
+						f"lease of {r['worker_id'] or 'unknown worker'} expired",
+					)
+					for r in rows
+				],
+			)
+			con.commit()
+			return [r["id"] for r in rows]
+
+	def set_queue_priority(self, qids: Iterable[int], priority: int) -> None:
+		"""Set the priority of items, keeping their enqueue time for aging."""
+		qids = list(qids)
+		if not qids:
+			return
+		qmarks = ",".join(["?"] * len(qids))
+		with self._connect() as con:
+			rows = con.execute(
+				f"SELECT id, created_at FROM queue WHERE id IN ({qmarks})", tuple(qids)
+			).fetchall()
+			con.executemany(
+				"UPDATE queue SET priority=?, sched_key=? WHERE id=?",
+				[
+					(
+						priority,
+						_sched_key(datetime.fromisoformat(r["created_at"]), priority),
+						r["id"],
+					)
+					for r in rows
+				],
+			)
+			con.commit()
+
+	def queue_priority_bounds(self) -> Tuple[int, int]:
+		"""(lowest, highest) priority among pending items; (0, 0) when there are none."""
+		with self._connect() as con:
+			row = con.execute(
+				"SELECT MIN(priority), MAX(priority) FROM queue WHERE status='pending'"
+			).fetchone()
+			return (row[0] or 0, row[1] or 0)
+
+	def set_queue_size_estimate(self, qid: int, size_bytes: Optional[int]) -> None:
+		with self._connect() as con:
+			con.execute("UPDATE queue SET size_estimate=? WHERE id=?", (size_bytes, qid))
+			con.commit()
+
+	def schedule_retry(
+		self,
+		qid: int,
+		next_attempt_at: str,
+		failure_class: str,
+		count_attempt: bool = True,
+	) -> None:
+		"""Park an item as "retrying" until `next_attempt_at`; it holds no slot meanwhile.
+
+		Deferrals (e.g. waiting for disk space) pass `count_attempt=False`.
+		"""
+		with self._connect() as con:
+			con.execute(
+				"""
+				UPDATE queue SET status='retrying', attempts=attempts+?, next_attempt_at=?,
+					failure_class=?, progress=NULL, speed=NULL, eta=NULL, finished_at=?,
+					worker_id=NULL, lease_expires_at=NULL
+				WHERE id=?
+				""",
+				(
+					int(count_attempt),
+					next_attempt_at,
+					failure_class,
+					datetime.utcnow().isoformat(),
+					qid,
+				),
+			)
+			con.commit()
+
+	def record_failure(self, qid: int, failure_class: str) -> None:
+		"""Count a failed attempt that will not be retried."""
+		with self._connect() as con:
+			con.execute(
+				"""
+				UPDATE queue SET attempts=attempts+1, next_attempt_at=NULL, failure_class=?
+				WHERE id=?
+				""",
+				(failure_class, qid),
+			)
+			con.commit()
+
+	def release_due_retries(self, now: Optional[str] = None) -> int:
+		"""Move "retrying" items whose next attempt is due back to pending.
+
+		Returns how many were moved.
+		"""
+		with self._connect() as con:
+			cur = con.execute(
+				"""
+				UPDATE queue SET status='pending'
+				WHERE status='retrying' AND next_attempt_at <= ?
+				""",
+				(now or datetime.utcnow().isoformat(),),
+			)
+			con.commit()
+			return cur.rowcount
+
+	def retry_queue_items(self, qids: Iterable[int]) -> None:
+		"""Queue failed, canceled or waiting items again with a fresh attempt count."""
+		qids = list(qids)
+		if not qids:
+			return
+		qmarks = ",".join(["?"] * len(qids))
+		with self._connect() as con:
+			con.execute(
+				f"""
+				UPDATE queue SET status='pending', attempts=0, next_attempt_at=NULL, progress=NULL
+				WHERE id IN ({qmarks}) AND status IN ('failed', 'canceled', 'retrying')
+				""",
+				tuple(qids),
+			)
+			con.commit()
+
+	def add_queue_attempt(
+		self,
+		qid: int,
+		started_at: Optional[str],
+		outcome: str,
+		failure_class: Optional[str] = None,
+		error: Optional[str] = None,
+		next_attempt_at: Optional[str] = None,
+	) -> None:
+		with self._connect() as con:
+			con.execute(
+				"""
+				INSERT INTO queue_attempts(queue_id, started_at, finished_at, outcome,
+					failure_class, error, next_attempt_at)
+				VALUES(?, ?, ?, ?, ?, ?, ?)
+				""",
+				(
+					qid,
+					started_at,
+					datetime.utcnow().isoformat(),
+					outcome,
+					failure_class,
+					error,
+					next_attempt_at,
+				),
+			)
+			con.commit()
+
+	def fetch_queue_attempts(self, qid: int) -> List[sqlite3.Row]:
+		with self._connect() as con:
+			return list(
+				con.execute(
+					"SELECT * FROM queue_attempts WHERE queue_id=? ORDER BY id", (qid,)
+				)
+			)
+
+	def fetch_queue_page(self, after_id: int = 0, limit: int = 200) -> List[sqlite3.Row]:
+		"""Keyset-paginated queue rows with id > `after_id`, in id order."""
+		with self._connect() as con:
+			return list(
+				con.execute(
+					"SELECT * FROM queue WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+				)
+			)
+
+	def fetch_queue_items(self, qids: Iterable[int]) -> List[sqlite3.Row]:
+		qids = list(qids)
+		if not qids:
+			return []
+		qmarks = ",".join(["?"] * len(qids))
+		with self._connect() as con:
+			return list(con.execute(f"SELECT * FROM queue WHERE id IN ({qmarks})", tuple(qids)))
+
 	def get_queue_item(self, qid: int) -> Optional[sqlite3.Row]:
 		with self._connect() as con:
 			row = con.execute("SELECT * FROM queue WHERE id=?", (qid,)).fetchone()
@@ -149,17 +737,408 @@ class DatabaseManager:
 			con.commit()
 
 	# History
-	def add_history(self, url: str, output_path: Optional[str], title: Optional[str], fmt: Optional[str], size_bytes: Optional[int], source: Optional[str]) -> None:
+	def add_history(
+		self,
+		url: str,
+		output_path: Optional[str],
+		title: Optional[str],
+		fmt: Optional[str],
+		size_bytes: Optional[int],
+		source: Optional[str],
+		extractor_key: Optional[str] = None,
+		video_id: Optional[str] = None,
+	) -> None:
 		with self._connect() as con:
 			con.execute(
 				"""
-				INSERT INTO history(url, output_path, title, format, size_bytes, source, completed_at)
-				VALUES(?, ?, ?, ?, ?, ?, ?)
+				INSERT INTO history(url, output_path, title, format, size_bytes, source,
+					completed_at, normalized_url, extractor_key, video_id)
+				VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+				""",
+				(
+					url,
+					output_path,
+					title,
+					fmt,
+					size_bytes,
+					source,
+					datetime.utcnow().isoformat(),
+					normalize_url(url),
+					extractor_key,
+					video_id,
+				),
+			)
+			con.commit()
+
+	def find_duplicate(
+		self, url: str, extractor_key: Optional[str] = None, video_id: Optional[str] = None
+	) -> Optional[sqlite3.Row]:
+		"""Return the latest history row for the same video, by extractor ID or URL."""
+		with self._connect() as con:
+			if extractor_key and video_id:
+				row = con.execute(
+					"""
+					SELECT * FROM history WHERE extractor_key=? AND video_id=?
+					ORDER BY id DESC LIMIT 1
+					""",
+					(extractor_key, str(video_id)),
+				).fetchone()
+				if row:
+					return row
+			return con.execute(
+				"SELECT * FROM history WHERE normalized_url=? ORDER BY id DESC LIMIT 1",
+				(normalize_url(url),),
+			).fetchone()
+
+	def find_downloaded(
+		self, entries: Iterable[Tuple[str, Optional[str], Optional[str]]]
+	) -> Set[int]:
+		"""Positions of the `(url, extractor_key, video_id)` entries already in history.
+
+		Bulk form of `find_duplicate` that reuses one connection, for playlist batches.
+		"""
+		found: Set[int] = set()
+		with self._connect() as con:
+			for pos, (url, extractor_key, video_id) in enumerate(entries):
+				row = None
+				if extractor_key and video_id:
+					row = con.execute(
+						"SELECT 1 FROM history WHERE extractor_key=? AND video_id=? LIMIT 1",
+						(extractor_key, str(video_id)),
+					).fetchone()
+				if row is None:
+					row = con.execute(
+						"SELECT 1 FROM history WHERE normalized_url=? LIMIT 1",
+						(normalize_url(url),),
+					).fetchone()
+				if row is not None:
+					found.add(pos)
+		return found
+
+	def fetch_history(
+		self, limit: int = 200, before_id: Optional[int] = None
+	) -> List[sqlite3.Row]:
+		"""Newest-first history rows; pass the last seen id as `before_id` for more."""
+		with self._connect() as con:
+			if before_id is not None:
+				return list(
+					con.execute(
+						"SELECT * FROM history WHERE id < ? ORDER BY id DESC LIMIT ?",
+						(before_id, limit),
+					)
+				)
+			return list(
+				con.execute("SELECT * FROM history ORDER BY id DESC LIMIT ?", (limit,))
+			)
+
+	def search_history(
+		self, query: str, limit: int = 200, before_id: Optional[int] = None
+	) -> List[sqlite3.Row]:
+		"""Newest-first history rows whose title or URL match every word of `query`.
+
+		Words match as prefixes.
+		"""
+		terms = [t for t in query.split() if t]
+		if not terms:
+			return self.fetch_history(limit, before_id)
+		upper = before_id if before_id is not None else 2**63 - 1
+		with self._connect() as con:
+			if self.has_fts:
+				match = " ".join('"' + t.replace('"', '""') + '"*' for t in terms)
+				return list(
+					con.execute(
+						"""
+						SELECT history.* FROM history_fts
+						JOIN history ON history.id = history_fts.rowid
+						WHERE history_fts MATCH ? AND history_fts.rowid < ?
+						ORDER BY history_fts.rowid DESC LIMIT ?
+						""",
+						(match, upper, limit),
+					)
+				)
+			where = " AND ".join(["(title LIKE ? OR url LIKE ?)"] * len(terms))
+			params: List[Any] = []
+			for t in terms:
+				params.extend([f"%{t}%", f"%{t}%"])
+			return list(
+				con.execute(
+					f"SELECT * FROM history WHERE {where} AND id < ? ORDER BY id DESC LIMIT ?",
+					(*params, upper, limit),
+				)
+			)
+
+	# Playlists
+	def add_playlist(self, url: str, item: Dict[str, Any]) -> int:
+		"""Record a playlist/channel to expand.
+
+		`item` holds the queue options for its entries.
+		"""
+		now = datetime.utcnow().isoformat()
+		with self._connect() as con:
+			cur = con.execute(
+				"""
+				INSERT INTO playlists(url, item_json, status, created_at, updated_at)
+				VALUES(?, ?, 'expanding', ?, ?)
+				""",
+				(url, json.dumps(item), now, now),
+			)
+			con.commit()
+			return int(cur.lastrowid)
+
+	def get_playlist(self, pid: int) -> Optional[sqlite3.Row]:
+		with self._connect() as con:
+			return con.execute("SELECT * FROM playlists WHERE id=?", (pid,)).fetchone()
+
+	def fetch_unfinished_playlists(self) -> List[sqlite3.Row]:
+		with self._connect() as con:
+			return list(
+				con.execute("SELECT * FROM playlists WHERE status='expanding' ORDER BY id")
+			)
+
+	def add_playlist_entries(
+		self,
+		pid: int,
+		items: List[Dict[str, Any]],
+		entries_seen: int,
+		last_entry: Optional[str] = None,
+		skipped: int = 0,
+	) -> int:
+		"""Queue a batch of playlist entries and advance the expansion cursor.
+
+		Both happen in one transaction. The cursor is the number of entries handled and
+		the key of the last one. Returns the number of queue rows added.
+		"""
+		now = datetime.utcnow()
+		rows = [self._queue_row(dict(item, playlist_id=pid), now) for item in items]
+		with self._connect() as con:
+			con.execute(
+				"""
+				UPDATE playlists SET entries_seen=?, last_entry=COALESCE(?, last_entry),
+					entries_skipped=entries_skipped+?, updated_at=?
+				WHERE id=?
 				""",
-				(url, output_path, title, fmt, size_bytes, source, datetime.utcnow().isoformat()),
+				(entries_seen, last_entry, skipped, now.isoformat(), pid),
+			)
+			added = self._insert_queue_rows(con, rows)
+			con.execute(
+				"UPDATE playlists SET entries_queued=entries_queued+? WHERE id=?",
+				(added, pid),
 			)
 			con.commit()
+			return added
 
-	def fetch_history(self, limit: int = 200) -> List[sqlite3.Row]:
+	def playlist_entry_urls(self, pid: int) -> Set[str]:
+		"""URLs already queued from a playlist."""
 		with self._connect() as con:
-			return list(con.execute("SELECT * FROM history ORDER BY id DESC LIMIT ?", (limit,)))
+			return {
+				r[0]
+				for r in con.execute("SELECT url FROM queue WHERE playlist_id=?", (pid,))
+			}
+
+	def set_playlist_status(
+		self, pid: int, status: str, title: Optional[str] = None
+	) -> None:
+		with self._connect() as con:
+			con.execute(
+				"""
+				UPDATE playlists SET status=?, title=COALESCE(?, title), updated_at=?
+				WHERE id=?
+				""",
+				(status, title, datetime.utcnow().isoformat(), pid),
+			)
+			con.commit()
+
+	# Job metrics
+	def add_job_metrics(
+		self, queue_id: Optional[int], url: str, success: bool, metrics: Any
+	) -> None:
+		"""Store the phase breakdown of a finished job.
+
+		`metrics` is a download.metrics.JobMetrics.
+		"""
+		phases = metrics.phases
+		with self._connect() as con:
+			con.execute(
+				"""
+				INSERT INTO job_metrics(queue_id, url, success, path, bytes, retries,
+					probe_s, fallback_parse_s, headless_capture_s, transfer_s,
+					postprocess_s, db_write_s, total_s, finished_at)
+				VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+				""",
+				(
+					queue_id,
+					url,
+					int(success),
+					metrics.path,
+					metrics.bytes,
+					metrics.retries,
+					phases.get("probe"),
+					phases.get("fallback_parse"),
+					phases.get("headless_capture"),
+					phases.get("transfer"),
+					phases.get("postprocess"),
+					phases.get("db_write"),
+					metrics.total_seconds,
+					datetime.utcnow().isoformat(),
+				),
+			)
+			con.commit()
+
+	# Captures
+	def add_captures(self, captures: Iterable[Dict[str, Any]]) -> int:
+		"""Upsert captured URLs in one transaction; returns how many were new.
+
+		Each capture has `url` and optional `page_url`, `content_type` and `seen_at`. A URL
+		seen before (by normalized form) gets its hit count and `last_seen` updated.
+		"""
+		now = datetime.utcnow().isoformat()
+		rows = [
+			(
+				c["url"],
+				normalize_url(c["url"]),
+				c.get("page_url"),
+				c.get("content_type"),
+				c.get("seen_at") or now,
+			)
+			for c in captures
+		]
+		if not rows:
+			return 0
+		with self._connect() as con:
+			before = con.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+			con.executemany(
+				"""
+				INSERT INTO captures(url, normalized_url, page_url, content_type,
+					first_seen, last_seen)
+				VALUES(?1, ?2, ?3, ?4, ?5, ?5)
+				ON CONFLICT(normalized_url) DO UPDATE SET
+					hits=hits+1,
+					last_seen=MAX(last_seen, excluded.last_seen),
+					page_url=COALESCE(excluded.page_url, page_url),
+					content_type=COALESCE(excluded.content_type, content_type)
+				""",
+				rows,
+			)
+			after = con.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+			con.commit()
+			return after - before
+
+	def prune_captures(self, keep: int) -> int:
+		"""Delete all but the `keep` most recently seen captures; returns how many went."""
+		with self._connect() as con:
+			cur = con.execute(
+				"""
+				DELETE FROM captures WHERE id IN (
+					SELECT id FROM captures ORDER BY last_seen DESC, id DESC LIMIT -1 OFFSET ?
+				)
+				""",
+				(max(0, keep),),
+			)
+			con.commit()
+			return cur.rowcount
+
+	def fetch_captures(
+		self,
+		limit: int = 200,
+		before: Optional[Tuple[str, int]] = None,
+		since: Optional[str] = None,
+	) -> List[sqlite3.Row]:
+		"""Captures by most recent sighting.
+
+		`before` is the (last_seen, id) of the last row already loaded. With `since`,
+		only captures seen after that timestamp are returned.
+		"""
+		where, params = [], []  # type: List[str], List[Any]
+		if before is not None:
+			where.append("(last_seen, id) < (?, ?)")
+			params.extend(before)
+		if since is not None:
+			where.append("last_seen > ?")
+			params.append(since)
+		clause = f"WHERE {' AND '.join(where)}" if where else ""
+		with self._connect() as con:
+			return list(
+				con.execute(
+					f"SELECT * FROM captures {clause} ORDER BY last_seen DESC, id DESC LIMIT ?",
+					(*params, limit),
+				)
+			)
+
+	def get_capture(self, url: str) -> Optional[sqlite3.Row]:
+		with self._connect() as con:
+			return con.execute(
+				"SELECT * FROM captures WHERE normalized_url=?", (normalize_url(url),)
+			).fetchone()
+
+	def set_capture_streams(self, url: str, streams: str) -> None:
+		"""Store the manifest summary shown for a captured stream URL."""
+		with self._connect() as con:
+			con.execute(
+				"UPDATE captures SET streams=? WHERE normalized_url=?",
+				(streams, normalize_url(url)),
+			)
+			con.commit()
+
+	def count_captures(self) -> int:
+		with self._connect() as con:
+			return int(con.execute("SELECT COUNT(*) FROM captures").fetchone()[0])
+
+	def delete_captures(self, ids: Iterable[int]) -> None:
+		ids = list(ids)
+		if not ids:
+			return
+		qmarks = ",".join(["?"] * len(ids))
+		with self._connect() as con:
+			con.execute(f"DELETE FROM captures WHERE id IN ({qmarks})", ids)
+			con.commit()
+
+	# Domain strategies
+	def get_domain_strategies(self, domain: str) -> List[sqlite3.Row]:
+		with self._connect() as con:
+			return list(con.execute("SELECT * FROM domain_strategies WHERE domain=?", (domain,)))
+
+	def record_domain_outcome(
+		self, domain: str, path: str, success: bool, seconds: float, half_life_seconds: float
+	) -> None:
+		"""Count a success or failure of download `path` on `domain`.
+
+		The stored counts decay by half every `half_life_seconds`, so old outcomes lose
+		weight; `avg_seconds` is a moving average of successful attempts.
+		"""
+		now = datetime.utcnow()
+		with self._connect() as con:
+			con.execute("BEGIN IMMEDIATE")
+			row = con.execute(
+				"""
+				SELECT successes, failures, avg_seconds, updated_at FROM domain_strategies
+				WHERE domain=? AND path=?
+				""",
+				(domain, path),
+			).fetchone()
+			successes = failures = 0.0
+			avg_seconds = None
+			if row is not None:
+				age = max(0.0, (now - datetime.fromisoformat(row["updated_at"])).total_seconds())
+				keep = 0.5 ** (age / half_life_seconds)
+				successes = row["successes"] * keep
+				failures = row["failures"] * keep
+				avg_seconds = row["avg_seconds"]
+			if success:
+				successes += 1.0
+				avg_seconds = seconds if avg_seconds is None else 0.7 * avg_seconds + 0.3 * seconds
+			else:
+				failures += 1.0
+			con.execute(
+				"""
+				INSERT INTO domain_strategies(domain, path, successes, failures,
+					avg_seconds, updated_at)
+				VALUES(?, ?, ?, ?, ?, ?)
+				ON CONFLICT(domain, path) DO UPDATE SET
+					successes=excluded.successes,
+					failures=excluded.failures,
+					avg_seconds=excluded.avg_seconds,
+					updated_at=excluded.updated_at
+				""",
+				(domain, path, successes, failures, avg_seconds, now.isoformat()),
+			)
+			con.commit()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import csv
+import os
+import secrets
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.download.dedup import POLICY_FORCE, duplicate_policy
+
+
+# Rows per insert transaction when importing
+IMPORT_CHUNK = 5000
+
+MODES = ("video", "audio")
+_DEFAULT_FORMATS = {"video": "mp4", "audio": "mp3"}
+_OPTION_FIELDS = ("mode", "format", "quality", "output_dir", "filename_template")
+
+
+def _noop(*_args) -> None:
+	pass
+
+
+def default_queue_item(db: DatabaseManager, url: str = "") -> dict:
+	output_dir = db.get_setting("output_directory", "") or os.path.join(
+		os.path.expanduser("~"), "Downloads"
+	)
+	return {
+		"url": url,
+		"mode": "video",
+		"format": "mp4",
+		"quality": "auto-best",
+		"output_dir": output_dir,
+		"filename_template": "%(title)s.%(ext)s",
+	}
+
+
+def api_token(db: DatabaseManager) -> str:
+	"""Bearer token of the /queue endpoints, generated and stored on first use."""
+	token = db.get_setting("queue_token", "") or ""
+	if not token:
+		token = secrets.token_urlsafe(24)
+		db.set_setting("queue_token", token)
+	return token
+
+
+def make_queue_item(raw: Union[str, Dict[str, Any]], defaults: Dict[str, Any]) -> dict:
+	"""Build a queue item from a URL or a dict of per-item options over `defaults`.
+
+	Raises ValueError for a missing or non-HTTP URL or an unknown mode.
+	"""
+	if isinstance(raw, str):
+		raw = {"url": raw}
+	elif not isinstance(raw, dict):
+		raise ValueError("item must be a URL or an object")
+	url = str(raw.get("url") or "").strip()
+	if not url.lower().startswith(("http://", "https://")):
+		raise ValueError(f"not an http(s) URL: {url!r}")
+	item = {name: raw.get(name) or defaults[name] for name in _OPTION_FIELDS}
+	item["url"] = url
+	item["mode"] = str(item["mode"]).lower()
+	if item["mode"] not in MODES:
+		raise ValueError(f"unknown mode: {item['mode']!r}")
+	if not raw.get("format") and item["mode"] != defaults["mode"]:
+		item["format"] = _DEFAULT_FORMATS[item["mode"]]
+	for name in ("priority", "size_estimate"):
+		value = raw.get(name, defaults.get(name))
+		if value in (None, ""):
+			continue
+		try:
+			item[name] = int(value)
+		except (TypeError, ValueError):
+			raise ValueError(f"{name} must be an integer: {value!r}") from None
+	return item
+
+
+def read_import_file(path: str) -> Iterator[Union[str, Dict[str, str]]]:
+	"""Yield URLs from a text file (one per line, `#` comments) or rows of a CSV file.
+
+	A CSV file needs a `url` column; `mode`, `format`, `quality`, `output_dir`,
+	`filename_template`, `priority` and `size_estimate` columns are optional
+	per-row overrides.
+	"""
+	with open(path, newline="", encoding="utf-8-sig") as fh:
+		first = fh.readline()
+		fh.seek(0)
+		header = [c.strip().lower() for c in first.split(",")]
+		if path.lower().endswith(".csv") or "url" in header:
+			for row in csv.DictReader(fh):
+				yield {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+			return
+		for line in fh:
+			line = line.strip()
+			if line and not line.startswith("#"):
+				yield line
+
+
+@dataclass
+class EnqueueResult:
+	queued: int = 0
+	skipped: int = 0  # already in history
+	errors: List[Tuple[int, str]] = field(default_factory=list)  # (item index, message)
+
+
+def enqueue_items(
+	db: DatabaseManager,
+	raws: Iterable[Union[str, Dict[str, Any]]],
+	defaults: Dict[str, Any],
+	on_chunk: Callable[[int], None] = _noop,
+	chunk_size: int = IMPORT_CHUNK,
+) -> EnqueueResult:
+	"""Validate and insert items in chunked transactions.
+
+	`on_chunk(added)` is called after each chunk.
+
+	With a duplicate policy other than "force", URLs already in history are skipped.
+	"""
+	check_history = duplicate_policy(db) != POLICY_FORCE
+	result = EnqueueResult()
+	chunk: List[dict] = []
+
+	def flush():
+		items = chunk
+		if check_history:
+			known = db.find_downloaded((item["url"], None, None) for item in items)
+			result.skipped += len(known)
+			items = [item for pos, item in enumerate(items) if pos not in known]
+		added = db.add_queue_items(items)
+		result.queued += added
+		if added:
+			on_chunk(added)
+
+	for index, raw in enumerate(raws):
+		try:
+			chunk.append(make_queue_item(raw, defaults))
+		except ValueError as exc:
+			result.errors.append((index, str(exc)))
+			continue
+		if len(chunk) >= chunk_size:
+			flush()
+			chunk = []
+	if chunk:
+		flush()
+	return result
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Iterable, Optional, TypeVar
+
+from vidharvester.utils.logger import get_logger
+
+
+_log = get_logger("download.cancel")
+
+T = TypeVar("T")
+
+# How often a waiting job checks for cancellation
+POLL_SECONDS = 0.1
+# Terminated child processes get this long to exit before they are killed
+TERMINATE_GRACE_SECONDS = 0.5
+
+
+def run_cancellable(
+	fn: Callable[[], T],
+	canceled: threading.Event,
+	name: str,
+	timeout: Optional[float] = None,
+) -> T:
+	"""Call `fn` on a helper thread and return its result.
+
+	Raises KeyboardInterrupt as soon as `canceled` is set.
+
+	For blocking calls that have no way to be interrupted (yt-dlp extraction, HTTP
+	requests): the caller returns at once and the abandoned call finishes in the
+	background, its result dropped. Raises TimeoutError after `timeout` seconds.
+	"""
+	result: dict = {}
+	done = threading.Event()
+
+	def target() -> None:
+		try:
+			result["value"] = fn()
+		except BaseException as exc:
+			result["error"] = exc
+		finally:
+			done.set()
+
+	threading.Thread(target=target, name=name, daemon=True).start()
+	deadline = time.monotonic() + timeout if timeout is not None else None
+	while not done.wait(POLL_SECONDS):
+		if canceled.is_set():
+			raise KeyboardInterrupt("Canceled")
+		if deadline is not None and time.monotonic() > deadline:
+			raise TimeoutError(f"{name} did not finish within {timeout:.0f}s")
+	if "error" in result:
+		raise result["error"]
+	return result["value"]
+
+
+def terminate_children(needles: Iterable[str]) -> int:
+	"""Stop child processes (FFmpeg run by yt-dlp) whose command line mentions `needles`.
+
+	Child processes are matched by the files they work on, since every job in this
+	process shares the same parent. Returns how many were stopped.
+	"""
+	needles = [n for n in needles if n]
+	if not needles:
+		return 0
+	try:
+		import psutil
+	except ImportError:
+		return 0
+	victims = []
+	for child in psutil.Process().children(recursive=True):
+		try:
+			cmdline = child.cmdline()
+		except psutil.Error:
+			continue
+		if any(needle in arg for arg in cmdline for needle in needles):
+			try:
+				child.terminate()
+				victims.append(child)
+			except psutil.Error:
+				pass
+	# Not waited for: reaping them here would hide their exit status from yt-dlp, which
+	# must see the failure to abort the post-processing step
+	time.sleep(TERMINATE_GRACE_SECONDS)
+	for child in victims:
+		try:
+			if child.status() != psutil.STATUS_ZOMBIE:
+				child.kill()
+		except psutil.Error:
+			pass
+	if victims:
+		_log.info("Stopped %d post-processing process(es) of a canceled job", len(victims))
+	return len(victims)
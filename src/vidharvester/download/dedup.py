@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from vidharvester.database.manager import DatabaseManager
+
+
+POLICY_SKIP = "skip"
+POLICY_LINK = "link"
+POLICY_FORCE = "force"
+DUPLICATE_POLICIES = (POLICY_SKIP, POLICY_LINK, POLICY_FORCE)
+
+
+def duplicate_policy(db: DatabaseManager) -> str:
+	"""Return the configured duplicate policy, defaulting to skip."""
+	policy = (db.get_setting("duplicate_policy", POLICY_SKIP) or POLICY_SKIP).lower()
+	return policy if policy in DUPLICATE_POLICIES else POLICY_SKIP
+
+
+def link_existing(existing_path: Optional[str], output_dir: str) -> Optional[str]:
+	"""Expose an already downloaded file in `output_dir`.
+
+	Uses a hard link, then a symlink. Returns the path of the linked file, or None when
+	the original file is gone or cannot be linked (the caller should download again).
+	"""
+	if not existing_path or not os.path.isfile(existing_path):
+		return None
+	target = os.path.join(output_dir, os.path.basename(existing_path))
+	if os.path.exists(target):
+		return target
+	try:
+		os.makedirs(output_dir, exist_ok=True)
+		os.link(existing_path, target)
+	except OSError:
+		try:
+			os.symlink(existing_path, target)
+		except OSError:
+			return None
+	return target
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import ctypes
+import os
+import shutil
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from vidharvester.database.manager import DatabaseManager
+
+
+DEFAULT_MIN_FREE_MB = 512
+# yt-dlp keeps the downloaded streams until the merged or converted output is written
+WORKING_FACTOR = 2.0
+# Items deferred for lack of space are checked again after this long
+RECHECK_SECONDS = 120.0
+
+_FALLOC_FL_KEEP_SIZE = 0x01
+_libc = None
+
+
+def min_free_bytes(db: DatabaseManager) -> int:
+	"""Space to leave free on the output disk (`min_free_space_mb` setting), in bytes."""
+	try:
+		mb = int(
+			db.get_setting("min_free_space_mb", str(DEFAULT_MIN_FREE_MB)) or DEFAULT_MIN_FREE_MB
+		)
+	except ValueError:
+		mb = DEFAULT_MIN_FREE_MB
+	return max(0, mb) * 1024 * 1024
+
+
+def recheck_at() -> str:
+	"""UTC ISO timestamp at which a deferred item is considered again."""
+	return (datetime.utcnow() + timedelta(seconds=RECHECK_SECONDS)).isoformat()
+
+
+def _existing_dir(path: str) -> str:
+	"""`path` or its nearest existing parent; output directories are created by yt-dlp."""
+	path = os.path.abspath(os.path.expanduser(path or "."))
+	while not os.path.isdir(path):
+		parent = os.path.dirname(path)
+		if parent == path:
+			break
+		path = parent
+	return path
+
+
+def _volume(directory: str) -> Tuple[str, int]:
+	existing = _existing_dir(directory)
+	return existing, os.stat(existing).st_dev
+
+
+def free_bytes(directory: str) -> int:
+	return shutil.disk_usage(_existing_dir(directory)).free
+
+
+def _format_size(fmt: Dict[str, Any], duration: Any) -> Optional[int]:
+	size = fmt.get("filesize") or fmt.get("filesize_approx")
+	if isinstance(size, (int, float)):
+		return int(size)
+	tbr = fmt.get("tbr")
+	if isinstance(tbr, (int, float)) and isinstance(duration, (int, float)):
+		return int(tbr * 1000 / 8 * duration)
+	return None
+
+
+def estimate_size(
+	info: Optional[Dict[str, Any]], format_id: Optional[str] = None
+) -> Optional[int]:
+	"""Expected download size in bytes from extracted info, or None when unknown.
+
+	Uses the format `format_id` when given (e.g. a planned audio stream), else the
+	formats yt-dlp selected by default; bitrate times duration when sizes are missing.
+	"""
+	if not info:
+		return None
+	duration = info.get("duration")
+	if format_id:
+		for fmt in info.get("formats") or []:
+			if fmt.get("format_id") == format_id:
+				return _format_size(fmt, duration)
+	requested = info.get("requested_formats")
+	if requested:
+		sizes = [_format_size(fmt, duration) for fmt in requested]
+		return sum(sizes) if all(s is not None for s in sizes) else None
+	return _format_size(info, duration)
+
+
+class DiskBudget:
+	"""Free space per volume minus what running jobs are still expected to write.
+
+	A job reserves its estimated size before downloading and reports what it has
+	written since, so admission of the next job counts only the outstanding part.
+	Reservations live in this process: jobs run in worker processes count in the
+	scheduler's budget with the queue's size estimate only.
+	"""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		# key -> [volume device, reserved bytes, bytes written so far]
+		self._reservations: Dict[str, list] = {}
+
+	def _outstanding(self, device: int, exclude: str) -> int:
+		return sum(
+			max(0, reserved - written)
+			for key, (dev, reserved, written) in self._reservations.items()
+			if dev == device and key != exclude
+		)
+
+	def reserve(
+		self, key: str, directory: str, size: int, min_free: int = 0
+	) -> Tuple[bool, int]:
+		"""Reserve `size` bytes for `key` if they fit; returns (admitted, bytes available).
+
+		Reserving again under the same key replaces the earlier amount, e.g. once the
+		probe gives a better estimate than the queue had.
+		"""
+		existing, device = _volume(directory)
+		free = shutil.disk_usage(existing).free
+		with self._lock:
+			held = self._reservations.get(key)
+			written = held[2] if held else 0
+			available = free - self._outstanding(device, key) - min_free
+			if size - written > available:
+				return False, max(0, available)
+			self._reservations[key] = [device, int(size), written]
+			return True, available
+
+	def consume(self, key: str, written: int) -> None:
+		"""Record that the job under `key` has written `written` bytes of its reservation."""
+		with self._lock:
+			held = self._reservations.get(key)
+			if held is not None:
+				held[2] = max(held[2], int(written))
+
+	def release(self, key: str) -> None:
+		with self._lock:
+			self._reservations.pop(key, None)
+
+	def reserved(self) -> int:
+		with self._lock:
+			return sum(
+				max(0, reserved - written)
+				for _, reserved, written in self._reservations.values()
+			)
+
+
+BUDGET = DiskBudget()
+
+
+def preallocate(path: str, size: int) -> bool:
+	"""Reserve `size` bytes of disk blocks for `path` without changing its length.
+
+	Keeping the length matters: yt-dlp resumes a ``.part`` file from its size. Only
+	Linux has a keep-size allocation; elsewhere, and on file systems without
+	fallocate support, this returns False and the file grows as usual.
+	"""
+	global _libc
+	if not sys.platform.startswith("linux") or size <= 0:
+		return False
+	if _libc is None:
+		# The interpreter is linked against libc, so its own symbols include fallocate
+		_libc = ctypes.CDLL(None, use_errno=True)
+		_libc.fallocate.argtypes = [
+			ctypes.c_int,
+			ctypes.c_int,
+			ctypes.c_longlong,
+			ctypes.c_longlong,
+		]
+	try:
+		fd = os.open(path, os.O_WRONLY)
+	except OSError:
+		return False
+	try:
+		return _libc.fallocate(fd, _FALLOC_FL_KEEP_SIZE, 0, size) == 0
+	finally:
+		os.close(fd)
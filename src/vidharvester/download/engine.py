@@ -0,0 +1,801 @@
+from __future__ import annotations
+
+import os
+import re
+import socket
+import threading
+import traceback
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+import shutil
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# yt_dlp, requests, bs4, playwright and asyncio are imported where they are used: they
+# cost hundreds of milliseconds at startup and most sessions never reach the fallbacks.
+from vidharvester.capture.manifest import (
+	HLS,
+	Manifest,
+	ManifestError,
+	Variant,
+	inspect,
+	manifest_protocol,
+)
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.download import scratch
+from vidharvester.download.cancel import (
+	POLL_SECONDS,
+	run_cancellable,
+	terminate_children,
+)
+from vidharvester.download.dedup import (
+	POLICY_FORCE,
+	POLICY_LINK,
+	POLICY_SKIP,
+	link_existing,
+)
+from vidharvester.download.diskspace import (
+	BUDGET,
+	WORKING_FACTOR,
+	estimate_size,
+	preallocate,
+)
+from vidharvester.download.format_planner import FormatPlan, plan_audio, plan_video
+from vidharvester.download.governor import BROWSER_SLOTS, POSTPROCESS_SLOTS
+from vidharvester.download.metadata import METADATA
+from vidharvester.download.metrics import JobMetrics
+from vidharvester.download.progress import ProgressThrottle
+from vidharvester.download.strategy import (
+	DEFAULT_ORDER,
+	PATH_FALLBACK,
+	PATH_YTDLP,
+	plan_order,
+	record_outcome,
+)
+from vidharvester.utils.formatting import human_size
+from vidharvester.utils.profiling import PROFILE_OFF, profiled
+
+
+@dataclass
+class DownloadOptions:
+	output_directory: str
+	mode: str  # "video" or "audio"
+	format_str: str  # e.g., mp4 / webm / mp3
+	quality: str  # yt-dlp format expression
+	filename_template: str
+	embed_subtitles: bool = False
+	embed_thumbnail: bool = False
+	user_agent: str = (
+		"Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+		"AppleWebKit/537.36 (KHTML, like Gecko) "
+		"Chrome/126.0.0.0 Safari/537.36"
+	)
+	cookies_file: Optional[str] = None
+	duplicate_policy: str = POLICY_FORCE
+	progress_rate_hz: float = 4.0  # max progress events per second
+	profile_mode: str = PROFILE_OFF
+	job_label: str = "direct"  # names profiles, e.g. "queue-42"
+	# Left free on the output disk; 0 still refuses jobs that cannot fit
+	min_free_bytes: int = 0
+	# In-progress data goes here, then moves to output_directory
+	scratch_directory: Optional[str] = None
+	scratch_limit_bytes: int = 0  # cap on the scratch directory's total usage; 0 for none
+
+
+# yt-dlp post-processors that only move or tag files; they run without a post-process
+# slot
+_LIGHT_POSTPROCESSORS = frozenset(
+	{"MoveFiles", "MoveFilesAfterDownload", "Metadata", "FFmpegMetadata"}
+)
+
+
+def _noop(*_args) -> None:
+	pass
+
+
+def _socket_of(response) -> Optional[socket.socket]:
+	"""The socket a yt-dlp response reads from, if it is still connected.
+
+	Both the requests and the urllib handlers wrap an `http.client.HTTPResponse`.
+	"""
+	stream = response
+	for _ in range(3):
+		sock = getattr(getattr(getattr(stream, "fp", None), "raw", None), "_sock", None)
+		if isinstance(sock, socket.socket):
+			return sock
+		stream = getattr(stream, "_fp", None) or getattr(stream, "fp", None)
+	return None
+
+
+def prewarm_extractors() -> None:
+	"""Import yt-dlp and build its extractor registry, so the first job needn't."""
+	import yt_dlp  # noqa: F401
+	from yt_dlp.extractor import gen_extractor_classes
+
+	gen_extractor_classes()
+
+
+class DownloadJob:
+	"""Runs a single download (yt-dlp, then fallback parser, then headless capture).
+
+	Plain Python with no Qt dependency: events are reported through the `on_progress`,
+	`on_log` and `on_finished` callbacks, which are invoked on the thread calling `run()`.
+	"""
+
+	def __init__(
+		self,
+		url: str,
+		options: DownloadOptions,
+		db: Optional[DatabaseManager] = None,
+		on_progress: Callable[[dict], None] = _noop,
+		on_log: Callable[[str], None] = _noop,
+		on_finished: Callable[[bool, str], None] = _noop,
+	):
+		self.url = url
+		self.options = options
+		self.db = db
+		self.on_progress = on_progress
+		self.on_log = on_log
+		self.on_finished = on_finished
+		self._stop_event = threading.Event()
+		self._throttle = ProgressThrottle(options.progress_rate_hz)
+		self.last_filename: Optional[str] = None
+		self.last_title: Optional[str] = None
+		self.last_format: Optional[str] = None
+		self.last_size: Optional[int] = None
+		self.last_extractor_key: Optional[str] = None
+		self.last_video_id: Optional[str] = None
+		self.dedup_action: Optional[str] = None  # "skipped" or "linked"
+		self.last_plan: Optional[FormatPlan] = None
+		self._pp_started: dict[str, float] = {}
+		self.postprocess_seconds = 0.0
+		self.metrics = JobMetrics()
+		self._attempts = 0
+		self.errors: List[str] = []  # yt-dlp and fallback errors, for failure classification
+		self.size_estimate: Optional[int] = None
+		# Queue jobs share their disk reservation key with the scheduler's pre-start
+		# reservation
+		label = options.job_label
+		self._disk_key = label if label.startswith("queue-") else f"{label}-{id(self)}"
+		self._preallocated: dict[str, int] = {}  # .part file -> bytes preallocated
+		self._scratch_dir: Optional[str] = None
+		self._pp_slots = 0  # post-process slots held; released if yt-dlp aborts mid-step
+		# Files of running post-processors, to find their FFmpeg processes
+		self._pp_files: set[str] = set()
+
+	@property
+	def _stop_flag(self) -> bool:
+		return self._stop_event.is_set()
+
+	def stop(self):
+		"""Cancel the job from any thread; every stage notices within a fraction of a second.
+
+		Blocking calls return through `run_cancellable`, and FFmpeg processes of a
+		running post-processor are terminated (off the calling thread).
+		"""
+		self._stop_event.set()
+		if self._pp_files:
+			needles = list(self._pp_files)
+			threading.Thread(
+				target=terminate_children,
+				args=(needles,),
+				name="cancel-postprocess",
+				daemon=True,
+			).start()
+
+	def _check_canceled(self) -> None:
+		if self._stop_event.is_set():
+			raise KeyboardInterrupt("Download canceled by user")
+
+	def _hook(self, d):
+		self._check_canceled()
+		status = d.get("status")
+		if status == "downloading":
+			total = d.get("total_bytes") or d.get("total_bytes_estimate")
+			downloaded = d.get("downloaded_bytes")
+			speed = d.get("speed")
+			eta = d.get("eta")
+			filename = d.get("filename") or d.get("info_dict", {}).get("title")
+			self._track_disk(d.get("tmpfilename"), d.get("total_bytes"), downloaded)
+			event = self._throttle.feed(
+				{
+					"status": "downloading",
+					"filename": filename,
+					"downloaded": downloaded,
+					"total": total,
+					"speed": speed,
+					"eta": eta,
+					"percent": (downloaded / total * 100.0) if downloaded and total else None,
+				}
+			)
+			if event is not None:
+				self.on_progress(event)
+		elif status == "finished":
+			pending = self._throttle.flush()
+			if pending is not None:
+				self.on_progress(pending)
+			self.last_filename = d.get("filename") or self.last_filename
+			moved = d.get("total_bytes") or d.get("downloaded_bytes")
+			if isinstance(moved, (int, float)):
+				self.metrics.bytes += int(moved)
+			info = d.get("info_dict") or {}
+			self.last_title = info.get("title") or self.last_title
+			self.last_format = info.get("ext") or self.options.format_str or self.last_format
+			size = info.get("filesize") or info.get("filesize_approx")
+			self.last_size = int(size) if isinstance(size, (int, float)) else self.last_size
+			self.on_progress({"status": "finished", "filename": self.last_filename})
+
+	def _retry_delay(self, n: int) -> float:
+		self._check_canceled()
+		return 0.0
+
+	@contextmanager
+	def _abort_on_cancel(self, ydl) -> Iterator[None]:
+		"""Cut `ydl`'s transfers off as soon as the job is canceled.
+
+		The progress hook only notices cancellation when data arrives, so a stalled
+		connection would wait out the socket timeout and the retries. Like the
+		headless capture's browser watcher, a watchdog shuts down the sockets of the
+		responses yt-dlp opened; the failed read then ends in `_retry_delay`.
+		"""
+		responses: weakref.WeakSet = weakref.WeakSet()
+		urlopen = ydl.urlopen
+
+		def tracked_urlopen(request):
+			response = urlopen(request)
+			responses.add(response)
+			return response
+
+		def watch() -> None:
+			while not done.wait(POLL_SECONDS):
+				if not self._stop_event.is_set():
+					continue
+				# Also catches responses opened after the first pass
+				for response in list(responses):
+					sock = _socket_of(response)
+					try:
+						if sock is not None:
+							sock.shutdown(socket.SHUT_RDWR)
+					except OSError:
+						pass
+
+		done = threading.Event()
+		ydl.urlopen = tracked_urlopen
+		threading.Thread(target=watch, name="cancel-transfer", daemon=True).start()
+		try:
+			yield
+		finally:
+			done.set()
+
+	def _pp_hook(self, d):
+		name = d.get("postprocessor") or "?"
+		if d.get("status") == "started":
+			if name not in _LIGHT_POSTPROCESSORS:
+				# Blocking here holds the download's ffmpeg step until the governor allows it
+				if not POSTPROCESS_SLOTS.acquire(lambda: self._stop_flag):
+					raise KeyboardInterrupt("Download canceled by user")
+				self._pp_slots += 1
+			filepath = (d.get("info_dict") or {}).get("filepath")
+			if filepath:
+				# FFmpeg's arguments name the input, intermediate (.temp) and output
+				# files by this stem
+				self._pp_files.add(os.path.splitext(filepath)[0])
+			self._check_canceled()  # stop() may have run before the files were known
+			self._pp_started[name] = time.monotonic()
+		elif d.get("status") == "finished" and name in self._pp_started:
+			self._pp_files.clear()
+			if name not in _LIGHT_POSTPROCESSORS and self._pp_slots:
+				self._pp_slots -= 1
+				POSTPROCESS_SLOTS.release()
+			# Merged or converted output replaces the stream file as the result
+			self.last_filename = (d.get("info_dict") or {}).get("filepath") or self.last_filename
+			elapsed = time.monotonic() - self._pp_started.pop(name)
+			self.postprocess_seconds += elapsed
+			plan = self.last_plan
+			if name == "ExtractAudio" and plan is not None:
+				self.on_log(
+					f"[plan] {name} took {elapsed:.1f}s ({plan.action}; "
+					f"~{plan.est_cpu_seconds_saved:.1f}s CPU avoided)"
+				)
+
+	def run(self):
+		with profiled(self.options.profile_mode, self.options.job_label):
+			self._run()
+
+	def _run(self):
+		try:
+			opts = self.options
+			headers = {"User-Agent": opts.user_agent}
+
+			ydl_opts = {
+				"outtmpl": os.path.join(opts.output_directory, opts.filename_template),
+				"restrictfilenames": False,
+				"noplaylist": True,
+				"nocheckcertificate": True,
+				"http_headers": headers,
+				"quiet": True,
+				"no_warnings": True,
+				"progress_hooks": [self._hook],
+				"postprocessor_hooks": [self._pp_hook],
+				"retries": 5,
+				# Consulted before every retry; raises once the job is canceled
+				"retry_sleep_functions": {
+					"http": self._retry_delay,
+					"fragment": self._retry_delay,
+				},
+				"concurrent_fragment_downloads": 5,
+				"postprocessors": [],
+				"writesubtitles": False,
+				"writeautomaticsub": False,
+				"continuedl": True,
+			}
+
+			if opts.cookies_file:
+				ydl_opts["cookiefile"] = opts.cookies_file
+
+			# A captured manifest is described by parsing it; anything else by a yt-dlp probe,
+			# unless yt-dlp has been failing on the domain. Without info, duplicates are
+			# found by URL, audio gets the generic selection and nothing is reserved up front
+			info = None
+			probe_seconds = 0.0
+			manifest = self._inspect_manifest(headers)
+			order = DEFAULT_ORDER
+			if manifest is None:
+				order, reason = plan_order(self.db, self.url)
+				if reason:
+					self.on_log(f"[strategy] Trying {order[0]} first: {reason}")
+				if order[0] == PATH_YTDLP:
+					started = time.monotonic()
+					info = self._probe()
+					probe_seconds = time.monotonic() - started
+
+			if self._handle_duplicate():
+				return
+
+			if opts.embed_subtitles:
+				ydl_opts.update(
+					{
+						"writesubtitles": True,
+						"writeautomaticsub": True,
+						"subtitleslangs": ["en", ""],
+					}
+				)
+
+			# Select format (prefer streams that can be copied into the target container)
+			plan = None
+			download_url = self.url
+			variant = None
+			if manifest is not None and opts.quality:
+				variant = manifest.variant(opts.quality)
+			if opts.mode == "video":
+				ydl_opts["merge_output_format"] = opts.format_str
+				if variant is not None:
+					download_url, ydl_opts["format"] = self._variant_selection(
+						manifest, variant
+					)
+					self.on_log(
+						f"[manifest] Downloading {variant.format_id} "
+						f"({variant.resolution or 'unknown size'})"
+					)
+				elif opts.quality and opts.quality != "auto-best":
+					# Respect explicit user-provided yt-dlp format expression (e.g. 137+140)
+					ydl_opts["format"] = opts.quality
+				else:
+					plan = plan_video(opts.format_str)
+			else:
+				plan = plan_audio(info, opts.format_str)
+			if plan is not None:
+				ydl_opts["format"] = plan.format
+				ydl_opts["postprocessors"].extend(plan.postprocessors)
+				if plan.merge_output_format:
+					ydl_opts["merge_output_format"] = plan.merge_output_format
+				self.last_plan = plan
+				self.on_log(f"[plan] {plan.describe()}")
+			if opts.mode == "audio" and opts.embed_thumbnail:
+				ydl_opts["postprocessors"].append({"key": "FFmpegMetadata"})
+				ydl_opts["writethumbnail"] = True
+				ydl_opts["postprocessors"].append({"key": "EmbedThumbnail"})
+
+			# Graceful fallback if FFmpeg is not available
+			has_ffmpeg = shutil.which("ffmpeg") and shutil.which("ffprobe")
+			if not has_ffmpeg:
+				if opts.mode == "video":
+					fmt_expr = ydl_opts.get("format", "") or ""
+					# If format requires merging, fall back to progressive best
+					if "+" in fmt_expr or "bestvideo" in fmt_expr:
+						ydl_opts["format"] = "best[ext=mp4]/best"
+						ydl_opts.pop("merge_output_format", None)
+						# Remove any postprocessors that need FFmpeg
+						ydl_opts["postprocessors"] = []
+						self.on_log(
+							"[warn] FFmpeg not found: using progressive best without "
+							"merge (set up FFmpeg for higher quality)."
+						)
+				elif opts.mode == "audio":
+					# Download the best audio without conversion
+					ydl_opts["postprocessors"] = []
+					if plan is not None and plan.format_id:
+						ydl_opts["format"] = plan.format
+					else:
+						ydl_opts["format"] = "bestaudio/best"
+					self.on_log(
+						"[warn] FFmpeg not found: downloading original audio stream "
+						"without conversion."
+					)
+
+			if manifest is not None:
+				estimate = manifest.estimated_size(variant)
+				self.last_size = estimate or self.last_size
+			else:
+				estimate = estimate_size(info, plan.format_id if plan is not None else None)
+			if not self._admit(estimate):
+				return
+			work_dir = self._claim_scratch()
+			if work_dir:
+				ydl_opts["outtmpl"] = os.path.join(work_dir, opts.filename_template)
+
+			reuse = None
+			if download_url == self.url and info and info.get("_type", "video") == "video":
+				reuse = info
+			found_links = False
+			for path in order:
+				self._check_canceled()
+				started, errors_before = time.monotonic(), len(self.errors)
+				if path == PATH_YTDLP:
+					self.on_log("[info] Probing with yt-dlp extractor…")
+					ok = self._download_with_ytdlp(download_url, ydl_opts, reuse)
+					started -= probe_seconds
+				else:
+					if path == PATH_FALLBACK:
+						candidates = self._fallback_links()
+					else:
+						candidates = self._headless_links()
+					found_links = found_links or bool(candidates)
+					ok = bool(candidates) and self._download_candidates(candidates, ydl_opts)
+				if manifest is None:
+					seconds = time.monotonic() - started
+					errors = self.errors[errors_before:]
+					record_outcome(self.db, self.url, path, ok, seconds, errors)
+				if ok:
+					self.metrics.path = path
+					if path == PATH_YTDLP:
+						self._complete("Download completed.")
+					else:
+						self._complete("Download completed (via fallback).")
+					return
+
+			if found_links:
+				raise RuntimeError("All fallback attempts failed.")
+			raise RuntimeError("No direct media links found on the page.")
+
+		except KeyboardInterrupt:
+			self._finish(False, "Canceled by user.")
+		except Exception as exc:
+			self.on_log(traceback.format_exc())
+			self._finish(False, f"Error: {exc}")
+
+	def _fallback_links(self) -> List[str]:
+		"""Media links found in the page's HTML."""
+		self.on_log("[info] Trying fallback parser…")
+		with self.metrics.phase("fallback_parse"):
+			candidates = run_cancellable(
+				lambda: self._detect_media_links(self.url, self.options.user_agent),
+				self._stop_event,
+				"fallback-parse",
+			)
+		if not candidates:
+			self.on_log("[warn] Fallback parser found nothing.")
+		return candidates
+
+	def _headless_links(self) -> List[str]:
+		"""Media requests made by the page in a headless browser."""
+		import asyncio
+
+		from vidharvester.capture.playwright_capture import capture_page_media
+
+		opts = self.options
+		self.on_log("[info] Trying headless capture…")
+
+		def run_async():
+			async def runner():
+				# Closes the browser as soon as the job is canceled
+				return await capture_page_media(self.url, canceled=self._stop_event.is_set)
+			with profiled(opts.profile_mode, f"{opts.job_label}-headless"):
+				return asyncio.run(runner())
+
+		try:
+			slot = BROWSER_SLOTS.hold(lambda: self._stop_flag)
+			with self.metrics.phase("headless_capture"), slot as held:
+				if not held:
+					raise KeyboardInterrupt("Canceled")
+				return run_cancellable(
+					run_async, self._stop_event, "headless-capture", timeout=45
+				)
+		except Exception as e:
+			self.on_log(f"[headless-error] {e}")
+			self.errors.append(str(e))
+			return []
+
+	def _download_candidates(self, candidates: List[str], ydl_opts) -> bool:
+		self.on_log(f"[info] Found {len(candidates)} candidate media links.")
+		for media_url in candidates:
+			self._check_canceled()
+			self.on_log(f"[info] Trying media URL: {media_url}")
+			if self._download_with_ytdlp(media_url, ydl_opts):
+				return True
+		return False
+
+	def _probe(self) -> Optional[dict]:
+		"""Extract info without downloading to learn title, size and identity.
+
+		Returns None when it fails. Info extracted shortly before (e.g. by "Get Info")
+		comes from the shared metadata cache.
+		"""
+		cookies = self.options.cookies_file
+		age = METADATA.age(self.url, cookies)
+		try:
+			with self.metrics.phase("probe"):
+				info = run_cancellable(
+					lambda: METADATA.extract(self.url, cookies), self._stop_event, "probe"
+				)
+		except Exception:
+			return None
+		if age is not None:
+			self.on_log(f"[info] Reusing metadata extracted {age:.0f}s ago")
+		self.last_title = info.get("title") or self.last_title
+		self.last_format = info.get("ext") or self.last_format
+		fs = info.get("filesize") or info.get("filesize_approx")
+		self.last_size = int(fs) if isinstance(fs, (int, float)) else self.last_size
+		self.last_extractor_key = info.get("extractor_key")
+		self.last_video_id = str(info["id"]) if info.get("id") is not None else None
+		return info
+
+	def _inspect_manifest(self, headers: dict) -> Optional[Manifest]:
+		"""Parse the URL as an HLS/DASH manifest, if it is one.
+
+		A manifest seen recently comes from the shared cache.
+		"""
+		if manifest_protocol(self.url) is None:
+			return None
+		try:
+			with self.metrics.phase("probe"):
+				manifest = run_cancellable(
+					lambda: inspect(self.url, headers), self._stop_event, "inspect-manifest"
+				)
+		except ManifestError as exc:
+			self.on_log(f"[manifest] {exc}; probing with yt-dlp instead")
+			return None
+		self.on_log(f"[manifest] {manifest.summary()}")
+		if self.db is not None:
+			try:
+				# Shown in the Captured tab when the URL was captured
+				self.db.set_capture_streams(self.url, manifest.summary())
+			except Exception:
+				pass
+		return manifest
+
+	@staticmethod
+	def _variant_selection(manifest: Manifest, variant: Variant) -> Tuple[str, str]:
+		"""(URL, yt-dlp format) that downloads `variant` of `manifest`.
+
+		The manifest is not extracted again. An HLS variant with its audio muxed in is
+		a media playlist of its own. Otherwise yt-dlp picks the stream from the
+		manifest by its properties, since its format ids need not match ours.
+		"""
+		if manifest.protocol == HLS and variant.audio_group is None:
+			return variant.url, "best"
+		if variant.kind == "audio":
+			return manifest.url, f"{variant.format_id}/bestaudio"
+		if variant.height:
+			height = variant.height
+			return manifest.url, (
+				f"bv*[height={height}]+ba/b[height={height}]/{variant.format_id}+ba/best"
+			)
+		return manifest.url, f"{variant.format_id}+ba/{variant.format_id}/best"
+
+	def _admit(self, size: Optional[int]) -> bool:
+		"""Reserve disk space for the estimated download; fails the job when it cannot fit."""
+		if not size:
+			return True
+		self.size_estimate = size
+		opts = self.options
+		need = int(size * WORKING_FACTOR)
+		admitted, available = BUDGET.reserve(
+			self._disk_key, opts.output_directory, need, opts.min_free_bytes
+		)
+		if admitted:
+			return True
+		message = (
+			f"Not enough disk space: needs ~{human_size(need)}, "
+			f"{human_size(available)} available in {opts.output_directory}"
+		)
+		self.on_log(f"[disk] {message}")
+		self.errors.append(message)
+		self._finish(False, message)
+		return False
+
+	def _track_disk(
+		self,
+		part_file: Optional[str],
+		exact_total: Optional[int],
+		downloaded: Optional[int],
+	) -> None:
+		"""Preallocate each .part file of known length once.
+
+		Written bytes are counted against the disk reservation.
+		"""
+		if part_file and exact_total and part_file not in self._preallocated:
+			done = preallocate(part_file, exact_total)
+			self._preallocated[part_file] = exact_total if done else 0
+		preallocated = self._preallocated.get(part_file, 0) if part_file else 0
+		current = max(downloaded or 0, preallocated)
+		BUDGET.consume(self._disk_key, self.metrics.bytes + current)
+
+	def _claim_scratch(self) -> Optional[str]:
+		"""This job's scratch directory, or None to write into the output directory."""
+		opts = self.options
+		if not opts.scratch_directory:
+			return None
+		need = int(self.size_estimate * WORKING_FACTOR) if self.size_estimate else 0
+		try:
+			fits = scratch.claim(
+				opts.scratch_directory, self._disk_key, need, opts.scratch_limit_bytes
+			)
+		except OSError as exc:
+			self.on_log(
+				f"[scratch] Cannot use {opts.scratch_directory}: {exc}; "
+				"writing to the output directory"
+			)
+			return None
+		if not fits:
+			self.on_log("[scratch] Scratch directory is full; writing to the output directory")
+			return None
+		self._scratch_dir = scratch.job_dir(opts.scratch_directory, self._disk_key)
+		return self._scratch_dir
+
+	def _complete(self, message: str) -> None:
+		"""Finish successfully, first moving the results from scratch to the output."""
+		if self._scratch_dir:
+			with self.metrics.phase("finalize"):
+				moved = scratch.move_tree(self._scratch_dir, self.options.output_directory)
+			if self.last_filename in moved:
+				self.last_filename = moved[self.last_filename]
+			elif moved:
+				# The recorded name was an intermediate stream; the largest file is the result
+				self.last_filename = max(moved.values(), key=os.path.getsize)
+			self.on_log(
+				f"[scratch] Moved {len(moved)} file(s) to {self.options.output_directory}"
+			)
+		self._finish(True, message)
+
+	def _finish(self, success: bool, message: str) -> None:
+		BUDGET.release(self._disk_key)
+		if self._scratch_dir:
+			if success or not self._disk_key.startswith("queue-"):
+				scratch.discard(self.options.scratch_directory, self._disk_key)
+			else:
+				# Partial data stays for the next attempt; the scheduler discards it
+				# when the item is done
+				scratch.release(self._disk_key)
+		metrics = self.metrics
+		metrics.retries = max(0, self._attempts - 1)
+		if self.postprocess_seconds:
+			metrics.phases["postprocess"] = self.postprocess_seconds
+		metrics.finish()
+		self.on_log(f"[metrics] {metrics.summary()}")
+		self.on_finished(success, message)
+
+	def _handle_duplicate(self) -> bool:
+		"""Apply the duplicate policy before the network stage. Returns True when handled."""
+		policy = self.options.duplicate_policy
+		if self.db is None or policy == POLICY_FORCE:
+			return False
+		existing = self.db.find_duplicate(
+			self.url, self.last_extractor_key, self.last_video_id
+		)
+		if existing is None:
+			return False
+		if policy == POLICY_SKIP:
+			self.dedup_action = "skipped"
+			self.last_filename = existing["output_path"]
+			self.on_log(
+				f"[dedup] Already downloaded on {existing['completed_at']}: "
+				f"{existing['output_path']}"
+			)
+			self.metrics.path = "dedup"
+			self._finish(True, "Already downloaded; skipped.")
+			return True
+		if policy == POLICY_LINK:
+			path = link_existing(existing["output_path"], self.options.output_directory)
+			if path:
+				self.dedup_action = "linked"
+				self.last_filename = path
+				self.last_title = existing["title"] or self.last_title
+				self.last_size = existing["size_bytes"] or self.last_size
+				self.on_log(f"[dedup] Linked existing download: {path}")
+				self.metrics.path = "dedup"
+				self._finish(True, "Linked to existing file.")
+				return True
+			self.on_log("[dedup] Previous file is missing; downloading again.")
+		return False
+
+	def _download_with_ytdlp(
+		self, url: str, ydl_opts, info: Optional[dict] = None
+	) -> bool:
+		"""Download `url` with yt-dlp.
+
+		With `info` (extracted for it already) yt-dlp goes straight to format selection.
+		"""
+		import yt_dlp
+
+		self._attempts += 1
+		started, pp_before = time.monotonic(), self.postprocess_seconds
+		try:
+			with yt_dlp.YoutubeDL(ydl_opts) as ydl, self._abort_on_cancel(ydl):
+				if info is not None:
+					try:
+						# The same path as yt-dlp's --load-info-json
+						ydl.process_ie_result(ydl.sanitize_info(info, True), download=True)
+						return True
+					except yt_dlp.utils.DownloadError as e:
+						self._check_canceled()
+						# Typically expired format URLs: extract again
+						METADATA.discard(url, self.options.cookies_file)
+						self.on_log(f"[yt-dlp] Cached metadata failed ({e}); extracting again")
+				ydl.download([url])
+			return True
+		except yt_dlp.utils.DownloadError as e:
+			# A transfer or post-processor (FFmpeg) interrupted by cancel fails like this too
+			self._check_canceled()
+			self.on_log(f"[yt-dlp] {e}")
+			self.errors.append(str(e))
+			return False
+		except Exception as e:
+			self._check_canceled()
+			self.on_log(f"[yt-dlp] Unexpected: {e}")
+			self.errors.append(str(e))
+			return False
+		finally:
+			self._pp_files.clear()
+			while self._pp_slots:
+				self._pp_slots -= 1
+				POSTPROCESS_SLOTS.release()
+			pp_spent = self.postprocess_seconds - pp_before
+			self.metrics.add("transfer", time.monotonic() - started - pp_spent)
+
+	def _detect_media_links(self, page_url: str, ua: str) -> List[str]:
+		import requests
+		from bs4 import BeautifulSoup
+
+		try:
+			resp = requests.get(page_url, headers={"User-Agent": ua}, timeout=20)
+			resp.raise_for_status()
+		except Exception as e:
+			self.on_log(f"[fallback] Failed to fetch page: {e}")
+			return []
+
+		soup = BeautifulSoup(resp.text, "html.parser")
+		candidates = set()
+
+		for tag in soup.find_all(["video", "source"]):
+			src = tag.get("src")
+			if src:
+				candidates.add(requests.compat.urljoin(page_url, src))
+
+		patterns = [
+			r"https?://[^\s'\"<>]+\.m3u8",
+			r"https?://[^\s'\"<>]+\.mpd",
+			r"https?://[^\s'\"<>]+\.mp4",
+			r"https?://[^\s'\"<>]+\.webm",
+		]
+		for pat in patterns:
+			for m in re.finditer(pat, resp.text):
+				candidates.add(m.group(0))
+
+		cleaned = [
+			u
+			for u in candidates
+			if not any(x in u.lower() for x in ["adserver", "doubleclick"])
+		]
+		return cleaned
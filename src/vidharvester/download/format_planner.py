@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+# Audio codecs (yt-dlp `acodec` prefixes) that FFmpegExtractAudio stream-copies into
+# each target. It copies only when the source codec is the target codec, or AAC for
+# m4a; ALAC into m4a, anything into ogg and PCM into wav are always re-encoded.
+AUDIO_COPY_CODECS: Dict[str, tuple] = {
+	"m4a": ("mp4a", "aac"),
+	"mp3": ("mp3",),
+	"opus": ("opus",),
+	"flac": ("flac",),
+}
+
+# Rough CPU seconds spent per second of media when transcoding to the target codec.
+# Only used to report how much work a stream copy avoided.
+TRANSCODE_CPU_PER_MEDIA_SECOND: Dict[str, float] = {
+	"mp3": 0.035,
+	"m4a": 0.045,
+	"ogg": 0.040,
+	"opus": 0.030,
+	"flac": 0.015,
+	"wav": 0.005,
+}
+
+
+@dataclass
+class FormatPlan:
+	"""Outcome of format planning for a single download."""
+
+	format: str
+	action: str  # "copy", "remux" or "transcode"
+	reason: str
+	postprocessors: List[Dict[str, Any]] = field(default_factory=list)
+	merge_output_format: Optional[str] = None
+	format_id: Optional[str] = None
+	source_codec: Optional[str] = None
+	est_cpu_seconds_saved: float = 0.0
+
+	def describe(self) -> str:
+		parts = [f"action={self.action}", f"format={self.format}"]
+		if self.source_codec:
+			parts.append(f"source={self.source_codec}")
+		if self.est_cpu_seconds_saved:
+			parts.append(f"~{self.est_cpu_seconds_saved:.1f}s CPU saved")
+		return f"{', '.join(parts)} ({self.reason})"
+
+
+def _codec_matches(codec: Optional[str], prefixes: tuple) -> bool:
+	codec = (codec or "").lower()
+	return bool(codec) and codec != "none" and codec.startswith(prefixes)
+
+
+def _audio_rank(fmt: Dict[str, Any]) -> float:
+	return float(fmt.get("abr") or fmt.get("tbr") or 0.0)
+
+
+def plan_audio(info: Optional[Dict[str, Any]], target: str) -> FormatPlan:
+	"""Pick an audio stream that can be stream-copied into `target` when one exists.
+
+	`info` is the result of `extract_info(download=False)`; when it is missing or has
+	no format list, the plan keeps the generic `bestaudio/best` selection.
+	"""
+	target = (target or "").lower()
+	extract = {
+		"key": "FFmpegExtractAudio",
+		"preferredcodec": target,
+		"preferredquality": "0",
+	}
+	copy_codecs = AUDIO_COPY_CODECS.get(target, ())
+	formats = (info or {}).get("formats") or []
+	audio_only = [
+		f for f in formats
+		if f.get("acodec") not in (None, "none") and f.get("vcodec") in (None, "none")
+	]
+	compatible = [f for f in audio_only if _codec_matches(f.get("acodec"), copy_codecs)]
+
+	if compatible:
+		best = max(compatible, key=_audio_rank)
+		fid = str(best.get("format_id"))
+		duration = float((info or {}).get("duration") or 0.0)
+		saved = duration * TRANSCODE_CPU_PER_MEDIA_SECOND.get(target, 0.0)
+		action = "copy" if (best.get("ext") or "").lower() == target else "remux"
+		return FormatPlan(
+			format=f"{fid}/bestaudio/best",
+			action=action,
+			reason=f"source stream {fid} already carries a {target}-compatible codec",
+			postprocessors=[extract],
+			format_id=fid,
+			source_codec=best.get("acodec"),
+			est_cpu_seconds_saved=saved,
+		)
+
+	if formats:
+		reason = f"no {target}-compatible audio stream"
+	else:
+		reason = "no format list available"
+	source = max(audio_only, key=_audio_rank).get("acodec") if audio_only else None
+	return FormatPlan(
+		format="bestaudio/best",
+		action="transcode",
+		reason=reason,
+		postprocessors=[extract],
+		source_codec=source,
+	)
+
+
+def plan_video(container: str) -> FormatPlan:
+	"""Build the automatic video selection for `container`.
+
+	Merging separate video and audio streams is always a stream copy in yt-dlp, so the
+	plan prefers codecs the container can hold natively.
+	"""
+	container = (container or "").lower()
+	if container == "mp4":
+		# Prefer H.264 + AAC for maximum Windows compatibility
+		return FormatPlan(
+			format="bestvideo[ext=mp4][vcodec^=avc1]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+			action="remux",
+			reason="H.264 + AAC merge into mp4",
+			merge_output_format="mp4",
+		)
+	if container == "webm":
+		return FormatPlan(
+			format="bestvideo[ext=webm]+bestaudio[ext=webm]/best[ext=webm]/best",
+			action="remux",
+			reason="VP9/Opus merge into webm",
+			merge_output_format="webm",
+		)
+	# mkv or other
+	return FormatPlan(
+		format="bestvideo*+bestaudio/best",
+		action="remux",
+		reason="any codec merges into mkv",
+		merge_output_format=container or "mkv",
+	)
@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# psutil is imported in ResourceGovernor.start(): it is not needed until the queue runs
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.download.metrics import REGISTRY
+from vidharvester.utils.formatting import human_size
+from vidharvester.utils.logger import get_logger
+
+
+_log = get_logger("download.governor")
+
+SLOT_JOBS = "jobs"
+SLOT_POSTPROCESS = "postprocess"
+SLOT_BROWSER = "browser"
+SLOT_NAMES = (SLOT_JOBS, SLOT_POSTPROCESS, SLOT_BROWSER)
+
+SAMPLE_INTERVAL = 2.0
+# At most one change per this many seconds, so the effect of the last one shows first
+ADJUST_COOLDOWN = 10.0
+# After raising the job limit did not raise throughput, don't try again for this long
+NETWORK_HOLD = 120.0
+
+CPU_HIGH, CPU_LOW = 90.0, 60.0  # percent of all cores
+MEMORY_LOW, MEMORY_OK = 10.0, 25.0  # percent of RAM available
+DISK_BUSY_HIGH, DISK_BUSY_OK = 90.0, 70.0  # percent of time the disks were busy (Linux)
+# A new job slot must add this much combined throughput to count as useful
+NETWORK_GAIN = 1.05
+
+
+def _noop(*_args) -> None:
+	pass
+
+
+def governor_enabled(db: DatabaseManager) -> bool:
+	return (db.get_setting("governor_enabled", "1") or "1") != "0"
+
+
+def _int_setting(db: DatabaseManager, key: str, default: int) -> int:
+	try:
+		return max(1, int(db.get_setting(key, str(default)) or default))
+	except ValueError:
+		return default
+
+
+def governor_bounds(db: DatabaseManager, max_jobs: int) -> Dict[str, Tuple[int, int]]:
+	"""(lowest, highest) concurrency per slot kind.
+
+	`max_jobs` is the max_concurrent_downloads setting.
+	"""
+	low_jobs = min(_int_setting(db, "min_concurrent_downloads", 1), max_jobs)
+	half_cpus = max(1, (os.cpu_count() or 2) // 2)
+	return {
+		SLOT_JOBS: (low_jobs, max_jobs),
+		SLOT_POSTPROCESS: (1, _int_setting(db, "max_postprocess_tasks", half_cpus)),
+		SLOT_BROWSER: (1, _int_setting(db, "max_browser_pages", 2)),
+	}
+
+
+class Slots:
+	"""A counting semaphore whose limit can change while tasks hold it.
+
+	Lowering the limit doesn't interrupt holders; new tasks wait until enough have left.
+	"""
+
+	def __init__(self, name: str, limit: int) -> None:
+		self.name = name
+		self._limit = limit
+		self._active = 0
+		self._cond = threading.Condition()
+
+	@property
+	def limit(self) -> int:
+		return self._limit
+
+	@property
+	def active(self) -> int:
+		return self._active
+
+	def set_limit(self, limit: int) -> None:
+		with self._cond:
+			self._limit = max(1, limit)
+			self._cond.notify_all()
+
+	def acquire(self, canceled: Callable[[], bool] = lambda: False) -> bool:
+		"""Wait for a free slot; returns False if `canceled()` turns true first."""
+		with self._cond:
+			while self._active >= self._limit:
+				if canceled():
+					return False
+				self._cond.wait(0.5)
+			self._active += 1
+			return True
+
+	def release(self) -> None:
+		with self._cond:
+			self._active = max(0, self._active - 1)
+			self._cond.notify()
+
+	@contextmanager
+	def hold(self, canceled: Callable[[], bool] = lambda: False) -> Iterator[bool]:
+		"""Context manager form of acquire/release; yields False if canceled while waiting."""
+		acquired = self.acquire(canceled)
+		try:
+			yield acquired
+		finally:
+			if acquired:
+				self.release()
+
+
+# Process-wide, like the disk budget: direct downloads and queue jobs share them
+POSTPROCESS_SLOTS = Slots(SLOT_POSTPROCESS, 2)
+BROWSER_SLOTS = Slots(SLOT_BROWSER, 2)
+
+
+@dataclass
+class ResourceSample:
+	cpu_percent: float
+	memory_available_percent: float
+	rss_bytes: int  # this process and its children (ffmpeg, Chromium, pool workers)
+	disk_busy_percent: Optional[float]  # None where psutil doesn't report busy time
+	disk_bytes_per_second: float
+	network_bytes_per_second: float
+
+	def describe(self) -> str:
+		if self.disk_busy_percent is not None:
+			disk = f"disk busy {self.disk_busy_percent:.0f}%"
+		else:
+			disk = f"disk {human_size(self.disk_bytes_per_second)}/s"
+		return (
+			f"cpu {self.cpu_percent:.0f}%, memory {self.memory_available_percent:.0f}% free, "
+			f"rss {human_size(self.rss_bytes)}, {disk}, "
+			f"net {human_size(self.network_bytes_per_second)}/s"
+		)
+
+
+class ResourceGovernor:
+	"""Adjusts how many jobs, post-process tasks and browser pages may run at once.
+
+	Samples CPU, memory, process-tree RSS, disk I/O and network throughput every
+	`interval` seconds. Under pressure the heaviest kind above its lower bound loses
+	a slot (browser pages, then post-processing, then jobs); with headroom the job
+	limit grows first, unless the last extra job did not raise network throughput.
+	Limits stay within `governor_bounds`; decisions go to `on_log` and /metrics.
+	"""
+
+	def __init__(
+		self,
+		db: DatabaseManager,
+		max_jobs: Callable[[], int],
+		active_jobs: Callable[[], int],
+		on_log: Callable[[str], None] = _noop,
+		interval: float = SAMPLE_INTERVAL,
+	) -> None:
+		self.db = db
+		self.max_jobs = max_jobs
+		self.active_jobs = active_jobs
+		self.on_log = on_log
+		self.interval = interval
+		self.limits: Dict[str, int] = {SLOT_JOBS: max_jobs()}
+		self.sample: Optional[ResourceSample] = None
+		self.adjustments = 0
+		self._psutil = None
+		self._stopping = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self._last_adjust = 0.0
+		self._network_hold_until = 0.0
+		# (previous limit, throughput then) after raising the job limit
+		self._raised_jobs_from: Optional[Tuple[int, float]] = None
+		self._counters = None
+		self._apply_bounds()
+		for name in SLOT_NAMES:
+			REGISTRY.register_gauge(
+				f"vidharvester_governor_{name}_limit",
+				f"Current governor limit for concurrent {name}.",
+				lambda name=name: self.limits[name],
+			)
+		REGISTRY.register_gauge(
+			"vidharvester_governor_adjustments",
+			"Limit changes made by the governor.",
+			lambda: self.adjustments,
+		)
+		REGISTRY.register_gauge(
+			"vidharvester_cpu_percent",
+			"Sampled system CPU use.",
+			lambda: self.sample.cpu_percent,
+		)
+		REGISTRY.register_gauge(
+			"vidharvester_memory_available_percent",
+			"Sampled available memory.",
+			lambda: self.sample.memory_available_percent,
+		)
+		REGISTRY.register_gauge(
+			"vidharvester_process_rss_bytes",
+			"Resident memory of the app and its children.",
+			lambda: self.sample.rss_bytes,
+		)
+
+	@property
+	def running(self) -> bool:
+		return self._thread is not None and self._thread.is_alive()
+
+	def limit(self, name: str) -> int:
+		return self.limits[name]
+
+	def _apply_bounds(self) -> Dict[str, Tuple[int, int]]:
+		"""Clamp the limits into the current bounds and push them to the slots.
+
+		The bounds are read again each time, since the settings may have changed.
+		"""
+		bounds = governor_bounds(self.db, self.max_jobs())
+		enabled = governor_enabled(self.db) and self._psutil is not None
+		for name, (low, high) in bounds.items():
+			current = self.limits.get(name, high)
+			self.limits[name] = min(max(current, low), high) if enabled else high
+		POSTPROCESS_SLOTS.set_limit(self.limits[SLOT_POSTPROCESS])
+		BROWSER_SLOTS.set_limit(self.limits[SLOT_BROWSER])
+		return bounds
+
+	def start(self) -> None:
+		if self._thread is not None and self._thread.is_alive():
+			return
+		try:
+			import psutil
+		except ImportError:
+			self.on_log("[governor] psutil is not installed; using the fixed limits")
+			return
+		self._psutil = psutil
+		self._apply_bounds()
+		self._stopping.clear()
+		self._thread = threading.Thread(
+			target=self._loop, name="resource-governor", daemon=True
+		)
+		self._thread.start()
+
+	def stop(self) -> None:
+		self._stopping.set()
+		if self._thread is not None:
+			self._thread.join(timeout=self.interval + 1)
+			self._thread = None
+
+	def _loop(self) -> None:
+		psutil = self._psutil
+		psutil.cpu_percent(None)  # the first call only sets the baseline
+		self._counters = (
+			time.monotonic(), psutil.disk_io_counters(), psutil.net_io_counters()
+		)
+		while not self._stopping.wait(self.interval):
+			try:
+				bounds = self._apply_bounds()
+				self.sample = self._take_sample()
+				if governor_enabled(self.db):
+					self._decide(self.sample, bounds)
+			except Exception:
+				_log.exception("Governor pass failed")
+
+	def _take_sample(self) -> ResourceSample:
+		psutil = self._psutil
+		now, disk, net = time.monotonic(), psutil.disk_io_counters(), psutil.net_io_counters()
+		then, disk_then, net_then = self._counters
+		self._counters = (now, disk, net)
+		elapsed = max(1e-6, now - then)
+		busy = None
+		disk_rate = 0.0
+		if disk is not None and disk_then is not None:
+			moved = disk.read_bytes + disk.write_bytes
+			moved -= disk_then.read_bytes + disk_then.write_bytes
+			disk_rate = moved / elapsed
+			if hasattr(disk, "busy_time"):
+				# Summed over all disks, so several busy disks can exceed 100%
+				busy = min(100.0, (disk.busy_time - disk_then.busy_time) / 10.0 / elapsed)
+		transferred = net.bytes_recv + net.bytes_sent
+		transferred -= net_then.bytes_recv + net_then.bytes_sent
+		net_rate = transferred / elapsed
+		me = psutil.Process()
+		rss = me.memory_info().rss
+		for child in me.children(recursive=True):
+			try:
+				rss += child.memory_info().rss
+			except (psutil.NoSuchProcess, psutil.AccessDenied):
+				pass
+		memory = psutil.virtual_memory()
+		return ResourceSample(
+			cpu_percent=psutil.cpu_percent(None),
+			memory_available_percent=memory.available * 100.0 / memory.total,
+			rss_bytes=rss,
+			disk_busy_percent=busy,
+			disk_bytes_per_second=disk_rate,
+			network_bytes_per_second=net_rate,
+		)
+
+	def _decide(self, sample: ResourceSample, bounds: Dict[str, Tuple[int, int]]) -> None:
+		now = time.monotonic()
+		if now - self._last_adjust < ADJUST_COOLDOWN:
+			return
+		busy = sample.disk_busy_percent
+		pressure = [
+			reason
+			for reason, hit in (
+				("cpu", sample.cpu_percent >= CPU_HIGH),
+				("memory", sample.memory_available_percent <= MEMORY_LOW),
+				("disk", busy is not None and busy >= DISK_BUSY_HIGH),
+			)
+			if hit
+		]
+		if pressure:
+			# Memory pressure comes mostly from Chromium and ffmpeg, CPU from transcodes
+			for name in (SLOT_BROWSER, SLOT_POSTPROCESS, SLOT_JOBS):
+				if self.limits[name] > bounds[name][0]:
+					self._change(name, -1, f"{' and '.join(pressure)} pressure", sample)
+					return
+			return
+
+		if self._raised_jobs_from is not None:
+			previous, throughput = self._raised_jobs_from
+			self._raised_jobs_from = None
+			if (
+				self.active_jobs() > previous
+				and sample.network_bytes_per_second < throughput * NETWORK_GAIN
+			):
+				self._network_hold_until = now + NETWORK_HOLD
+				self._change(SLOT_JOBS, -1, "another job did not raise network throughput", sample)
+				return
+
+		headroom = (
+			sample.cpu_percent < CPU_LOW
+			and sample.memory_available_percent > MEMORY_OK
+			and (busy is None or busy < DISK_BUSY_OK)
+		)
+		if not headroom:
+			return
+		if (
+			self.limits[SLOT_JOBS] < bounds[SLOT_JOBS][1]
+			and self.active_jobs() >= self.limits[SLOT_JOBS]
+			and now >= self._network_hold_until
+		):
+			self._raised_jobs_from = (self.limits[SLOT_JOBS], sample.network_bytes_per_second)
+			self._change(SLOT_JOBS, +1, "headroom", sample)
+			return
+		for name, slots in (
+			(SLOT_POSTPROCESS, POSTPROCESS_SLOTS),
+			(SLOT_BROWSER, BROWSER_SLOTS),
+		):
+			# Only worth raising while tasks are waiting on the limit
+			if self.limits[name] < bounds[name][1] and slots.active >= slots.limit:
+				self._change(name, +1, "headroom", sample)
+				return
+
+	def _change(self, name: str, delta: int, reason: str, sample: ResourceSample) -> None:
+		old = self.limits[name]
+		self.limits[name] = old + delta
+		self.adjustments += 1
+		self._last_adjust = time.monotonic()
+		POSTPROCESS_SLOTS.set_limit(self.limits[SLOT_POSTPROCESS])
+		BROWSER_SLOTS.set_limit(self.limits[SLOT_BROWSER])
+		message = f"[governor] {name} {old}->{self.limits[name]}: {reason}"
+		self.on_log(f"{message} ({sample.describe()})")
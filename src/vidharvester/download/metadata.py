@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from vidharvester.utils.locks import KeyedLocks
+from vidharvester.utils.urls import normalize_url
+
+
+# Extracted format URLs expire on many sites (often after a few hours); reuse stays
+# well within that
+CACHE_SECONDS = 900.0
+CACHE_ENTRIES = 64  # a full info dict can be several hundred KB
+PROBE_WORKERS = 4
+
+_PROBE_OPTIONS = {
+	"quiet": True,
+	"no_warnings": True,
+	"skip_download": True,
+	"noplaylist": True,
+}
+
+
+class MetadataCache:
+	"""yt-dlp info dicts by URL (and cookies file).
+
+	Shared by "Get Info" and the downloads after it.
+
+	Entries expire after `CACHE_SECONDS` and the least recently used go first beyond
+	`entries`. Concurrent extractions of one URL share a single yt-dlp run. The cache
+	lives in this process: jobs run in worker processes extract for themselves.
+	"""
+
+	def __init__(
+		self, entries: int = CACHE_ENTRIES, max_age: float = CACHE_SECONDS
+	) -> None:
+		self.entries = entries
+		self.max_age = max_age
+		self._lock = threading.Lock()
+		# (normalized URL, cookies file) -> (stored at, info)
+		self._items: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]"
+		self._items = OrderedDict()
+		self._inflight = KeyedLocks()
+
+	@staticmethod
+	def _key(url: str, cookies_file: Optional[str]) -> Tuple[str, str]:
+		return normalize_url(url), cookies_file or ""
+
+	def get(
+		self, url: str, cookies_file: Optional[str] = None
+	) -> Optional[Dict[str, Any]]:
+		key = self._key(url, cookies_file)
+		with self._lock:
+			held = self._items.get(key)
+			if held is None:
+				return None
+			stored_at, info = held
+			if time.monotonic() - stored_at > self.max_age:
+				del self._items[key]
+				return None
+			self._items.move_to_end(key)
+			return info
+
+	def age(self, url: str, cookies_file: Optional[str] = None) -> Optional[float]:
+		"""Seconds since `url` was extracted, or None when it is not cached."""
+		with self._lock:
+			held = self._items.get(self._key(url, cookies_file))
+		return time.monotonic() - held[0] if held is not None else None
+
+	def put(
+		self, url: str, info: Dict[str, Any], cookies_file: Optional[str] = None
+	) -> None:
+		key = self._key(url, cookies_file)
+		with self._lock:
+			self._items[key] = (time.monotonic(), info)
+			self._items.move_to_end(key)
+			while len(self._items) > self.entries:
+				self._items.popitem(last=False)
+
+	def discard(self, url: str, cookies_file: Optional[str] = None) -> None:
+		with self._lock:
+			self._items.pop(self._key(url, cookies_file), None)
+
+	def extract(self, url: str, cookies_file: Optional[str] = None) -> Dict[str, Any]:
+		"""Info for `url` from the cache, else extracted now (without downloading)."""
+		info = self.get(url, cookies_file)
+		if info is not None:
+			return info
+		with self._inflight.hold(self._key(url, cookies_file)):
+			info = self.get(url, cookies_file)
+			if info is None:
+				import yt_dlp
+
+				options = _PROBE_OPTIONS
+				if cookies_file:
+					options = dict(_PROBE_OPTIONS, cookiefile=cookies_file)
+				with yt_dlp.YoutubeDL(options) as ydl:
+					info = ydl.extract_info(url, download=False)
+				self.put(url, info, cookies_file)
+			return info
+
+
+METADATA = MetadataCache()
+
+
+def probe_many(
+	urls: Iterable[str],
+	on_result: Callable[[str, Any], None],
+	extract: Optional[Callable[[str], Any]] = None,
+	workers: int = PROBE_WORKERS,
+) -> None:
+	"""Extract every URL concurrently.
+
+	`on_result(url, info or exception)` is called from the probe threads. `extract`
+	defaults to `METADATA.extract` without cookies. Blocks until all are done, so
+	callers run it off the GUI thread.
+	"""
+	extract = extract or METADATA.extract
+
+	def probe(url: str) -> None:
+		try:
+			result: Any = extract(url)
+		except Exception as exc:
+			result = exc
+		on_result(url, result)
+
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe") as pool:
+		for url in dict.fromkeys(urls):
+			pool.submit(probe, url)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from vidharvester.utils.logger import get_logger
+
+
+_log = get_logger("download.metrics")
+
+
+PHASES = (
+	"probe",
+	"fallback_parse",
+	"headless_capture",
+	"transfer",
+	"postprocess",
+	"db_write",
+)
+
+# Histogram buckets in seconds, shared by all phases
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+@dataclass
+class JobMetrics:
+	"""Phase timings and counters for a single download job."""
+
+	phases: Dict[str, float] = field(default_factory=dict)
+	bytes: int = 0
+	retries: int = 0
+	path: Optional[str] = None  # "ytdlp", "fallback", "headless" or "dedup"
+	started_at: float = field(default_factory=time.monotonic)
+	total_seconds: float = 0.0
+
+	def add(self, phase: str, seconds: float) -> None:
+		self.phases[phase] = self.phases.get(phase, 0.0) + max(0.0, seconds)
+
+	@contextmanager
+	def phase(self, name: str) -> Iterator[None]:
+		started = time.monotonic()
+		try:
+			yield
+		finally:
+			self.add(name, time.monotonic() - started)
+
+	def finish(self) -> None:
+		self.total_seconds = time.monotonic() - self.started_at
+
+	def to_report(self) -> Dict[str, Any]:
+		"""JSON-safe form, sent by remote workers with the item's result."""
+		return {
+			"phases": dict(self.phases),
+			"bytes": self.bytes,
+			"retries": self.retries,
+			"path": self.path,
+			"total_seconds": self.total_seconds,
+		}
+
+	@classmethod
+	def from_report(cls, data: Dict[str, Any]) -> "JobMetrics":
+		"""Inverse of `to_report`; unknown phases are dropped. Raises on malformed values."""
+		phases = data.get("phases") or {}
+		return cls(
+			phases={name: float(phases[name]) for name in PHASES if name in phases},
+			bytes=int(data.get("bytes") or 0),
+			retries=int(data.get("retries") or 0),
+			path=str(data["path"]) if data.get("path") else None,
+			total_seconds=float(data.get("total_seconds") or 0.0),
+		)
+
+	def summary(self) -> str:
+		parts = [f"{name}={self.phases[name]:.2f}s" for name in PHASES if name in self.phases]
+		return (
+			f"path={self.path or '-'} total={self.total_seconds:.2f}s {' '.join(parts)} "
+			f"bytes={self.bytes} retries={self.retries}"
+		)
+
+
+class MetricsRegistry:
+	"""Process-wide aggregation of job metrics, rendered in Prometheus text format."""
+
+	def __init__(self) -> None:
+		self._lock = threading.Lock()
+		self._histograms: Dict[str, List[int]] = {p: [0] * (len(BUCKETS) + 1) for p in PHASES}
+		self._hist_sums: Dict[str, float] = {p: 0.0 for p in PHASES}
+		self._jobs: Dict[Tuple[str, str], int] = {}
+		self._bytes_total = 0
+		self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+	def register_gauge(
+		self, name: str, help_text: str, provider: Callable[[], float]
+	) -> None:
+		with self._lock:
+			self._gauges[name] = (help_text, provider)
+
+	def observe_job(self, metrics: JobMetrics, success: bool) -> None:
+		with self._lock:
+			for phase, seconds in metrics.phases.items():
+				if phase not in self._histograms:
+					continue
+				counts = self._histograms[phase]
+				for i, bound in enumerate(BUCKETS):
+					if seconds <= bound:
+						counts[i] += 1
+						break
+				else:
+					counts[-1] += 1
+				self._hist_sums[phase] += seconds
+			key = ("success" if success else "failure", metrics.path or "none")
+			self._jobs[key] = self._jobs.get(key, 0) + 1
+			self._bytes_total += metrics.bytes
+
+	def render(self) -> str:
+		with self._lock:
+			lines = [
+				"# HELP vidharvester_jobs_total"
+				" Finished download jobs by result and successful path.",
+				"# TYPE vidharvester_jobs_total counter",
+			]
+			for (result, path), count in sorted(self._jobs.items()):
+				lines.append(f'vidharvester_jobs_total{{result="{result}",path="{path}"}} {count}')
+			lines += [
+				"# HELP vidharvester_downloaded_bytes_total Bytes transferred by finished jobs.",
+				"# TYPE vidharvester_downloaded_bytes_total counter",
+				f"vidharvester_downloaded_bytes_total {self._bytes_total}",
+				"# HELP vidharvester_job_phase_seconds Time spent per job phase.",
+				"# TYPE vidharvester_job_phase_seconds histogram",
+			]
+			metric = "vidharvester_job_phase_seconds"
+			for phase in PHASES:
+				cumulative = 0
+				counts = self._histograms[phase]
+				for bound, count in zip(BUCKETS, counts):
+					cumulative += count
+					lines.append(f'{metric}_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+				cumulative += counts[-1]
+				lines += [
+					f'{metric}_bucket{{phase="{phase}",le="+Inf"}} {cumulative}',
+					f'{metric}_sum{{phase="{phase}"}} {self._hist_sums[phase]:.6f}',
+					f'{metric}_count{{phase="{phase}"}} {cumulative}',
+				]
+			gauges = list(self._gauges.items())
+		# Gauge providers may query the DB; call them outside the lock
+		for name, (help_text, provider) in gauges:
+			try:
+				value = float(provider())
+			except Exception:
+				continue
+			lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value:g}"]
+		return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def record_job_metrics(
+	db: Any, qid: Optional[int], url: str, success: bool, metrics: JobMetrics
+) -> None:
+	"""Add a finished job to the /metrics aggregates and store its row in `job_metrics`."""
+	REGISTRY.observe_job(metrics, success)
+	if db is None:
+		return
+	try:
+		db.add_job_metrics(qid, url, success, metrics)
+	except Exception:
+		_log.exception("Could not store metrics for %s", url)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.download.dedup import POLICY_FORCE, duplicate_policy
+
+
+# Entries per insert; the first entry is flushed on its own so downloads start at once
+BATCH_SIZE = 50
+# A partial batch is flushed after this long, for extractors that page slowly
+FLUSH_INTERVAL = 2.0
+# yt-dlp may answer a channel URL with a pointer to its videos tab
+MAX_REDIRECTS = 3
+# Bytes per second of media, for a size estimate when an entry has only a duration
+_BYTES_PER_SECOND = {"video": 2_500_000 // 8, "audio": 160_000 // 8}
+
+
+def _noop(*_args) -> None:
+	pass
+
+
+def _entry_url(entry: Dict[str, Any]) -> Optional[str]:
+	url = entry.get("webpage_url") or entry.get("url")
+	if url and "://" in url:
+		return url
+	return None
+
+
+def _entry_key(entry: Dict[str, Any]) -> Optional[str]:
+	"""Identity of an entry that stays the same when new uploads shift its position."""
+	if entry.get("id") is not None:
+		return f"{entry.get('ie_key') or ''}:{entry['id']}"
+	return _entry_url(entry)
+
+
+def _size_estimate(entry: Dict[str, Any], mode: str) -> Optional[int]:
+	size = entry.get("filesize") or entry.get("filesize_approx")
+	if isinstance(size, (int, float)):
+		return int(size)
+	duration = entry.get("duration")
+	if isinstance(duration, (int, float)):
+		return int(duration * _BYTES_PER_SECOND.get(mode, _BYTES_PER_SECOND["video"]))
+	return None
+
+
+class PlaylistExpansion:
+	"""Streams the entries of a playlist or channel row (`playlists` table) into the queue.
+
+	Entries come from yt-dlp's flat, lazy extraction, so pages are fetched only as the
+	loop consumes them. Each batch is inserted together with the cursor: the number of
+	entries handled and the key (id or URL) of the last one. An interrupted expansion
+	resumes after that entry wherever it is listed now, so entries added or removed
+	above it in the meantime neither skip nor repeat any. With a duplicate policy other
+	than "force", entries already in history are not queued.
+	"""
+
+	def __init__(
+		self,
+		db: DatabaseManager,
+		playlist_id: int,
+		on_batch: Callable[[int], None] = _noop,
+		on_log: Callable[[str], None] = _noop,
+		batch_size: int = BATCH_SIZE,
+	) -> None:
+		self.db = db
+		self.playlist_id = playlist_id
+		self.on_batch = on_batch
+		self.on_log = on_log
+		self.batch_size = batch_size
+		self._stop_flag = False
+
+	def stop(self) -> None:
+		"""Stop after the current entry; the expansion stays resumable."""
+		self._stop_flag = True
+
+	def run(self) -> None:
+		row = self.db.get_playlist(self.playlist_id)
+		if row is None or row["status"] != "expanding":
+			return
+		template = json.loads(row["item_json"])
+		seen = int(row["entries_seen"])
+		cursor = row["last_entry"]
+		if seen:
+			self.on_log(
+				f"[playlist] Resuming {row['url']} after entry {seen} "
+				f"({cursor or 'by position'})"
+			)
+		try:
+			title, entries = self._extract(row["url"], template.get("cookies_file"))
+			if seen:
+				entries = self._after_cursor(iter(entries), seen, cursor)
+			check_history = duplicate_policy(self.db) != POLICY_FORCE
+			self._consume(entries, template, seen, cursor, check_history)
+		except Exception as exc:
+			self.on_log(f"[playlist-error] {row['url']}: {exc}")
+			self.db.set_playlist_status(self.playlist_id, "failed")
+			return
+		if self._stop_flag:
+			return
+		self.db.set_playlist_status(self.playlist_id, "done", title)
+		done = self.db.get_playlist(self.playlist_id)
+		self.on_log(
+			f"[playlist] {title or row['url']}: {done['entries_queued']} queued, "
+			f"{done['entries_skipped']} already downloaded"
+		)
+
+	def _extract(
+		self, url: str, cookies_file: Optional[str]
+	) -> Tuple[Optional[str], Iterable[Dict[str, Any]]]:
+		import yt_dlp
+
+		opts = {
+			"quiet": True,
+			"no_warnings": True,
+			"skip_download": True,
+			"extract_flat": "in_playlist",
+			"lazy_playlist": True,
+		}
+		if cookies_file:
+			opts["cookiefile"] = cookies_file
+		ydl = yt_dlp.YoutubeDL(opts)
+		ie_key = None
+		for _ in range(MAX_REDIRECTS + 1):
+			# process=False keeps `entries` as the extractor's generator instead of a list
+			info = ydl.extract_info(url, download=False, ie_key=ie_key, process=False)
+			if info.get("_type") not in ("url", "url_transparent"):
+				break
+			url, ie_key = info["url"], info.get("ie_key")
+		if info.get("_type") != "playlist":
+			# A single video: queue it as a one-entry playlist
+			return info.get("title"), [info]
+		return info.get("title"), info.get("entries") or []
+
+	def _after_cursor(
+		self, entries: Iterator[Dict[str, Any]], seen: int, cursor: Optional[str]
+	) -> Iterator[Dict[str, Any]]:
+		"""The entries after the one an interrupted expansion stopped at."""
+		if cursor is None:
+			# Expansions started before cursors were kept resume by position
+			for _ in zip(range(seen), entries):
+				pass
+			yield from entries
+			return
+		passed = []
+		for entry in entries:
+			if entry and _entry_key(entry) == cursor:
+				yield from entries
+				return
+			passed.append(entry)
+		# The entry left the listing: take everything this playlist has not queued yet
+		self.on_log(
+			f"[playlist] Entry {cursor} is no longer listed; queuing the entries not queued yet"
+		)
+		queued = self.db.playlist_entry_urls(self.playlist_id)
+		yield from (entry for entry in passed if entry and _entry_url(entry) not in queued)
+
+	def _consume(
+		self,
+		entries: Iterable[Dict[str, Any]],
+		template: Dict[str, Any],
+		seen: int,
+		cursor: Optional[str],
+		check_history: bool,
+	) -> None:
+		batch: List[Tuple[Dict[str, Any], Optional[str], Optional[str]]] = []
+		last_flush = time.monotonic()
+		flushed = False
+		for entry in entries:
+			if self._stop_flag:
+				break
+			if not entry:
+				continue
+			# Entries are numbered in the order they are handled, which stays unique
+			# across resumes
+			seen += 1
+			cursor = _entry_key(entry) or cursor
+			url = _entry_url(entry)
+			if url is None:
+				continue
+			item = dict(
+				template,
+				url=url,
+				title=entry.get("title"),
+				playlist_index=seen,
+				size_estimate=_size_estimate(entry, template.get("mode", "video")),
+			)
+			batch.append((item, entry.get("ie_key"), entry.get("id")))
+			if (
+				not flushed
+				or len(batch) >= self.batch_size
+				or time.monotonic() - last_flush >= FLUSH_INTERVAL
+			):
+				self._flush(batch, seen, cursor, check_history)
+				batch = []
+				flushed = True
+				last_flush = time.monotonic()
+		self._flush(batch, seen, cursor, check_history)
+
+	def _flush(
+		self, batch, entries_seen: int, cursor: Optional[str], check_history: bool
+	) -> None:
+		known = set()
+		if check_history and batch:
+			known = self.db.find_downloaded(
+				(item["url"], ie_key, vid) for item, ie_key, vid in batch
+			)
+		items = [item for pos, (item, _, _) in enumerate(batch) if pos not in known]
+		added = self.db.add_playlist_entries(
+			self.playlist_id, items, entries_seen, cursor, skipped=len(known)
+		)
+		if added:
+			self.on_batch(added)
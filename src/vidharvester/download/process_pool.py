@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.download.engine import DownloadJob, DownloadOptions
+from vidharvester.download.metrics import JobMetrics
+
+
+EXECUTION_THREAD = "thread"
+EXECUTION_PROCESS = "process"
+EXECUTION_MODES = (EXECUTION_THREAD, EXECUTION_PROCESS)
+
+# Upper bound of the settings dialog; workers are only spawned when jobs need them.
+MAX_PROCESS_WORKERS = 10
+
+# Job attributes copied back from the child once it finishes
+_STATE_FIELDS = (
+	"last_filename",
+	"last_title",
+	"last_format",
+	"last_size",
+	"size_estimate",
+	"last_extractor_key",
+	"last_video_id",
+	"dedup_action",
+	"postprocess_seconds",
+	"metrics",
+	"errors",
+)
+
+
+def execution_mode(db: DatabaseManager) -> str:
+	mode = (db.get_setting("execution_mode", EXECUTION_THREAD) or EXECUTION_THREAD).lower()
+	return mode if mode in EXECUTION_MODES else EXECUTION_THREAD
+
+
+def _run_in_child(
+	url: str, options: DownloadOptions, db_path: Optional[str], events, cancel
+) -> None:
+	"""Pool entry point: run a DownloadJob and forward its events to the parent."""
+	db = DatabaseManager(db_path) if db_path else None
+	job = DownloadJob(
+		url,
+		options,
+		db=db,
+		on_progress=lambda d: events.put(("progress", d)),
+		on_log=lambda msg: events.put(("log", msg)),
+	)
+	finished: list = []
+	job.on_finished = lambda ok, msg: finished.append((ok, msg))
+
+	def watch_cancel():
+		while not finished:
+			if cancel.wait(0.2):
+				job.stop()
+				return
+
+	threading.Thread(target=watch_cancel, daemon=True).start()
+	try:
+		job.run()
+	finally:
+		ok, msg = finished[0] if finished else (False, "Worker process exited unexpectedly.")
+		state = {name: getattr(job, name, None) for name in _STATE_FIELDS}
+		finished.append(None)
+		events.put(("finished", ok, msg, state))
+
+
+class ProcessPool:
+	"""Lazily created process pool plus a manager for cross-process queues and events."""
+
+	def __init__(self, max_workers: int = MAX_PROCESS_WORKERS) -> None:
+		self.max_workers = max_workers
+		self._ctx = multiprocessing.get_context("spawn")
+		self._lock = threading.Lock()
+		self._executor: Optional[ProcessPoolExecutor] = None
+		self._manager = None
+
+	def _ensure(self) -> None:
+		with self._lock:
+			if self._executor is None:
+				self._manager = self._ctx.Manager()
+				self._executor = ProcessPoolExecutor(
+					max_workers=self.max_workers, mp_context=self._ctx
+				)
+
+	def submit(self, url: str, options: DownloadOptions, db_path: Optional[str]):
+		"""Start a job in the pool; returns (future, events queue, cancel event)."""
+		self._ensure()
+		events = self._manager.Queue()
+		cancel = self._manager.Event()
+		future = self._executor.submit(_run_in_child, url, options, db_path, events, cancel)
+		return future, events, cancel
+
+	def shutdown(self) -> None:
+		with self._lock:
+			if self._executor is not None:
+				self._executor.shutdown(wait=False, cancel_futures=True)
+				self._executor = None
+			if self._manager is not None:
+				self._manager.shutdown()
+				self._manager = None
+
+
+class ProcessDownloadJob:
+	"""Drop-in for `DownloadJob` that runs the download in a pool worker process.
+
+	`run()` blocks the calling thread while relaying the child's progress and log events
+	to the callbacks; `stop()` signals the child through a shared event.
+	"""
+
+	def __init__(
+		self,
+		url: str,
+		options: DownloadOptions,
+		pool: ProcessPool,
+		db: Optional[DatabaseManager] = None,
+		on_progress: Callable[[dict], None] = lambda d: None,
+		on_log: Callable[[str], None] = lambda msg: None,
+		on_finished: Callable[[bool, str], None] = lambda ok, msg: None,
+	):
+		self.url = url
+		self.options = options
+		self.pool = pool
+		self.db_path = db.db_path if db is not None else None
+		self.on_progress = on_progress
+		self.on_log = on_log
+		self.on_finished = on_finished
+		self._cancel = None
+		self._stop_requested = False
+		for name in _STATE_FIELDS:
+			setattr(self, name, None)
+		self.postprocess_seconds = 0.0
+		self.metrics = JobMetrics()
+		self.errors: list = []
+
+	def stop(self) -> None:
+		self._stop_requested = True
+		if self._cancel is not None:
+			self._cancel.set()
+
+	def run(self) -> None:
+		try:
+			future, events, self._cancel = self.pool.submit(self.url, self.options, self.db_path)
+		except Exception as exc:
+			self.on_finished(False, f"Error: could not start worker process: {exc}")
+			return
+		if self._stop_requested:
+			self._cancel.set()
+		while True:
+			try:
+				event = events.get(timeout=0.5)
+			except queue.Empty:
+				if future.done() and future.exception() is not None:
+					self.on_finished(False, f"Error: worker process failed: {future.exception()}")
+					return
+				continue
+			kind = event[0]
+			if kind == "progress":
+				self.on_progress(event[1])
+			elif kind == "log":
+				self.on_log(event[1])
+			elif kind == "finished":
+				_, ok, msg, state = event
+				self._apply_state(state)
+				self.on_finished(ok, msg)
+				return
+
+	def _apply_state(self, state: Dict[str, Any]) -> None:
+		for name, value in state.items():
+			if value is not None:
+				setattr(self, name, value)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+from vidharvester.database.manager import DatabaseManager
+
+
+def progress_rate(db: DatabaseManager) -> float:
+	"""Return the configured progress event rate (events per second per job)."""
+	try:
+		return max(0.5, float(db.get_setting("progress_rate_hz", "4") or "4"))
+	except ValueError:
+		return 4.0
+
+
+class ProgressThrottle:
+	"""Coalesces yt-dlp progress callbacks into at most `max_rate_hz` events per job.
+
+	Speed and ETA are smoothed over the last `window_seconds` of samples instead of
+	taking yt-dlp's instantaneous values, which jump around on fragment boundaries.
+	"""
+
+	def __init__(
+		self,
+		max_rate_hz: float = 4.0,
+		window_seconds: float = 5.0,
+		clock: Callable[[], float] = time.monotonic,
+	) -> None:
+		self.min_interval = 1.0 / max_rate_hz if max_rate_hz > 0 else 0.0
+		self.window_seconds = window_seconds
+		self._clock = clock
+		self._samples: Deque[Tuple[float, int]] = deque()
+		self._filename: Optional[str] = None
+		self._last_emit = float("-inf")
+		self._pending: Optional[dict] = None
+
+	def _reset(self, filename: Optional[str]) -> None:
+		self._samples.clear()
+		self._filename = filename
+
+	def _smoothed_speed(self) -> Optional[float]:
+		if len(self._samples) < 2:
+			return None
+		(t0, b0), (t1, b1) = self._samples[0], self._samples[-1]
+		if t1 <= t0:
+			return None
+		return (b1 - b0) / (t1 - t0)
+
+	def feed(self, event: dict) -> Optional[dict]:
+		"""Record a `downloading` event; return it (smoothed) when it is due for emission."""
+		now = self._clock()
+		filename = event.get("filename")
+		downloaded = event.get("downloaded")
+		if filename != self._filename or (
+			self._samples and downloaded is not None and downloaded < self._samples[-1][1]
+		):
+			self._reset(filename)
+		if downloaded is not None:
+			self._samples.append((now, int(downloaded)))
+			while len(self._samples) > 2 and now - self._samples[0][0] > self.window_seconds:
+				self._samples.popleft()
+
+		speed = self._smoothed_speed()
+		if speed is not None:
+			event["speed"] = speed
+			total = event.get("total")
+			if total and downloaded is not None and speed > 0:
+				event["eta"] = int(max(0, total - downloaded) / speed)
+
+		if now - self._last_emit >= self.min_interval:
+			self._last_emit = now
+			self._pending = None
+			return event
+		self._pending = event
+		return None
+
+	def flush(self) -> Optional[dict]:
+		"""Return the latest event that was held back, if any."""
+		event, self._pending = self._pending, None
+		return event
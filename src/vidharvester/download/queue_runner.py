@@ -5,75 +5,49 @@ from typing import Optional
 from PyQt6 import QtCore
 
 from vidharvester.database.manager import DatabaseManager
-from vidharvester.download.worker import DownloadWorker, DownloadOptions
+from vidharvester.download.scheduler import QueueScheduler
+from vidharvester.utils.log_pipeline import LogPipeline
 
 
 class QueueRunner(QtCore.QObject):
-	"""Simple queue runner that auto-starts pending items up to a concurrency limit."""
+	"""Qt adapter over `QueueScheduler`: starts pending items up to a concurrency limit.
+
+	Scheduler callbacks arrive on worker threads; emitting signals from there queues them
+	onto the GUI thread. With a `log_pipeline`, log lines go there (tagged with their
+	job) instead of through the `log` signal.
+	"""
 
 	started = QtCore.pyqtSignal(int)
 	finished = QtCore.pyqtSignal(int, bool)
+	progress = QtCore.pyqtSignal(int, dict)
 	log = QtCore.pyqtSignal(str)
+	queued = QtCore.pyqtSignal(int)
 
-	def __init__(self, db: DatabaseManager, parent=None):
+	def __init__(
+		self, db: DatabaseManager, parent=None, log_pipeline: Optional[LogPipeline] = None
+	):
 		super().__init__(parent)
 		self.db = db
-		self.max_concurrent = int(self.db.get_setting("max_concurrent_downloads", "2") or "2")
-		self._active: dict[int, DownloadWorker] = {}
-		self._timer = QtCore.QTimer(self)
-		self._timer.setInterval(1000)
-		self._timer.timeout.connect(self._tick)
-		self._timer.start()
+		self.scheduler = QueueScheduler(
+			db,
+			on_started=self.started.emit,
+			on_finished=self.finished.emit,
+			on_progress=self.progress.emit,
+			on_log=log_pipeline.emit if log_pipeline is not None else self.log.emit,
+			on_queued=self.queued.emit,
+			on_job_log=log_pipeline.emit if log_pipeline is not None else None,
+		)
+		self.scheduler.start()
 
-	def _tick(self):
-		# Refresh max_concurrent in case settings changed
-		try:
-			self.max_concurrent = int(self.db.get_setting("max_concurrent_downloads", "2") or "2")
-		except Exception:
-			self.max_concurrent = 2
-		# Start new tasks if below limit
-		if len(self._active) >= self.max_concurrent:
-			return
-		pending = [r for r in self.db.fetch_queue(["pending"])][:max(0, self.max_concurrent - len(self._active))]
-		for r in pending:
-			self._start_row(r)
+	@property
+	def max_concurrent(self) -> int:
+		return self.scheduler.max_concurrent
 
-	def _start_row(self, row):
-		qid = int(row["id"])
-		options = DownloadOptions(
-			output_directory=row["output_dir"],
-			mode=row["mode"],
-			format_str=row["format"],
-			quality=row["quality"],
-			filename_template=row["filename_template"],
-		)
-		w = DownloadWorker(url=row["url"], options=options)
-		w.log_signal.connect(self.log)
-		w.finished_signal.connect(lambda success, msg, qid=qid, w=w, url=row["url"]: self._on_finished(qid, success, w, url))
-		w.progress_signal.connect(lambda d, qid=qid: self._on_progress(qid, d))
-		self._active[qid] = w
-		self.db.set_queue_status(qid, "running")
-		self.started.emit(qid)
-		w.start()
+	def enqueue(self, raws, defaults: dict):
+		return self.scheduler.enqueue(raws, defaults)
 
-	def _on_progress(self, qid: int, d: dict):
-		if d.get("status") == "downloading":
-			self.db.update_queue_progress(qid, d.get("percent"), d.get("speed"), d.get("eta"))
+	def expand_playlist(self, url: str, item: dict) -> int:
+		return self.scheduler.expand_playlist(url, item)
 
-	def _on_finished(self, qid: int, success: bool, worker: Optional[DownloadWorker] = None, url: Optional[str] = None):
-		self.db.set_queue_status(qid, "completed" if success else "failed")
-		w = self._active.pop(qid, None)
-		# Add to history for queue-runner initiated tasks
-		try:
-			if success and worker is not None:
-				self.db.add_history(
-					url or "",
-					getattr(worker, "last_filename", None),
-					getattr(worker, "last_title", None),
-					getattr(worker, "last_format", None),
-					getattr(worker, "last_size", None),
-					"queue",
-				)
-		except Exception:
-			pass
-		self.finished.emit(qid, success)
+	def stop(self):
+		self.scheduler.stop()
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import urllib.request
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.download.diskspace import recheck_at
+from vidharvester.download.metrics import JobMetrics, record_job_metrics
+from vidharvester.download.retry import (
+	FAILURE_DISK_SPACE,
+	RETRYABLE,
+	classify_failure,
+	max_attempts,
+	next_attempt_at,
+)
+
+
+# A running item is reclaimed this long after its worker's last heartbeat
+LEASE_SECONDS = 60.0
+HEARTBEAT_SECONDS = 15.0
+
+# `add_history` arguments a finish report may set
+HISTORY_FIELDS = (
+	"url",
+	"output_path",
+	"title",
+	"fmt",
+	"size_bytes",
+	"source",
+	"extractor_key",
+	"video_id",
+)
+
+
+def new_worker_id() -> str:
+	return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LocalQueue:
+	"""Claims, heartbeats and completes queue items directly in the SQLite database.
+
+	Each claim first returns expired leases and due retries to pending, so any worker
+	sharing the database keeps the queue moving.
+	"""
+
+	def __init__(self, db: DatabaseManager) -> None:
+		self.db = db
+
+	def claim(
+		self, worker_id: str, policy: str, limit: int, lease_seconds: float = LEASE_SECONDS
+	) -> List[dict]:
+		self.db.reclaim_expired_leases()
+		self.db.release_due_retries()
+		rows = self.db.claim_pending(worker_id, policy, limit, lease_seconds)
+		return [dict(r) for r in rows]
+
+	def renew(
+		self, worker_id: str, qids: Iterable[int], lease_seconds: float = LEASE_SECONDS
+	) -> List[int]:
+		return self.db.renew_leases(worker_id, qids, lease_seconds)
+
+	def finish(
+		self, worker_id: str, qid: int, report: Dict[str, Any]
+	) -> Tuple[str, Optional[str]]:
+		"""Record the end of an attempt and return (new status, log note).
+
+		`report` has `outcome` ("completed", "skipped", "canceled", "interrupted",
+		"deferred" when the scheduler found no disk space before starting, or
+		"failed"), `message`, `errors`, `last_size`, on success `history` with the
+		`HISTORY_FIELDS` of `add_history`, and from remote workers `metrics` (see
+		`JobMetrics.to_report`). Only history and metrics are written when `worker_id`
+		lost the item's lease in the meantime; the status is then "lost".
+		"""
+		db = self.db
+		outcome = report["outcome"]
+		message = report.get("message")
+		row = db.get_queue_item(qid)
+		history = report.get("history")
+		# Only the item's own download goes into history
+		if (
+			isinstance(history, dict)
+			and row is not None
+			and history.get("url") == row["url"]
+		):
+			try:
+				db.add_history(**{name: history.get(name) for name in HISTORY_FIELDS})
+			except Exception:
+				pass
+		if isinstance(report.get("metrics"), dict) and row is not None:
+			try:
+				metrics = JobMetrics.from_report(report["metrics"])
+			except (TypeError, ValueError):
+				pass
+			else:
+				record_job_metrics(db, qid, row["url"], outcome == "completed", metrics)
+		if row is None or row["status"] != "running" or row["worker_id"] != worker_id:
+			return "lost", (
+				f"[lease] Item {qid} was reclaimed from this worker; result not recorded"
+			)
+		started_at = row["started_at"]
+		if outcome != "completed" and report.get("last_size"):
+			# Probed size, used by shortest-first if the item is queued again
+			db.set_queue_size_estimate(qid, report["last_size"])
+		if outcome in ("completed", "skipped", "canceled"):
+			db.set_queue_status(qid, outcome)
+			error = message if outcome == "canceled" else None
+			db.add_queue_attempt(qid, started_at, outcome, error=error)
+			return outcome, None
+		if outcome == "deferred":
+			when = recheck_at()
+			db.schedule_retry(qid, when, FAILURE_DISK_SPACE, count_attempt=False)
+			return "deferred", (
+				f"[disk] Item {qid} deferred: {message}; checking again after {when[11:19]} UTC"
+			)
+		if outcome == "interrupted":
+			# Stopped by shutdown: run again later, not counted as a failure
+			db.set_queue_status(qid, "pending")
+			db.add_queue_attempt(qid, started_at, "interrupted", error=message)
+			return "pending", None
+
+		errors = list(report.get("errors") or []) + [message or ""]
+		failure_class = classify_failure(errors)
+		error = errors[0]
+		if failure_class == FAILURE_DISK_SPACE:
+			when = recheck_at()
+			db.schedule_retry(qid, when, failure_class, count_attempt=False)
+			db.add_queue_attempt(qid, started_at, "deferred", failure_class, error, when)
+			return "deferred", (
+				f"[disk] Item {qid} deferred: {error}; checking again after {when[11:19]} UTC"
+			)
+		failures = row["attempts"] + 1
+		limit = max_attempts(db)
+		if failure_class in RETRYABLE and failures < limit:
+			when = next_attempt_at(failure_class, failures)
+			db.schedule_retry(qid, when, failure_class)
+			db.add_queue_attempt(qid, started_at, "failed", failure_class, error, when)
+			return "retrying", (
+				f"[retry] Item {qid}: {failure_class} failure, "
+				f"attempt {failures + 1}/{limit} after {when[:19]} UTC"
+			)
+		db.set_queue_status(qid, "failed")
+		db.record_failure(qid, failure_class)
+		db.add_queue_attempt(qid, started_at, "failed", failure_class, error)
+		return "failed", (
+			f"[retry] Item {qid}: {failure_class} failure after {failures} attempt(s); "
+			"not retrying"
+		)
+
+
+class RemoteQueue:
+	"""`LocalQueue` interface over another instance's /queue/* HTTP endpoints.
+
+	Lets headless workers on other nodes share one queue: claims, heartbeats and
+	results go to the serving instance, which owns the database.
+	"""
+
+	def __init__(
+		self, base_url: str, token: Optional[str] = None, timeout: float = 15.0
+	) -> None:
+		self.base_url = base_url.rstrip("/")
+		self.token = token
+		self.timeout = timeout
+
+	def _post(self, path: str, payload: dict) -> dict:
+		request = urllib.request.Request(
+			self.base_url + path,
+			data=json.dumps(payload).encode("utf-8"),
+			headers={"Content-Type": "application/json"},
+			method="POST",
+		)
+		if self.token:
+			request.add_header("Authorization", f"Bearer {self.token}")
+		with urllib.request.urlopen(request, timeout=self.timeout) as response:
+			return json.loads(response.read().decode("utf-8"))
+
+	def claim(
+		self, worker_id: str, policy: str, limit: int, lease_seconds: float = LEASE_SECONDS
+	) -> List[dict]:
+		payload = {
+			"worker_id": worker_id,
+			"policy": policy,
+			"limit": limit,
+			"lease_seconds": lease_seconds,
+		}
+		return self._post("/queue/claim", payload)["items"]
+
+	def renew(
+		self, worker_id: str, qids: Iterable[int], lease_seconds: float = LEASE_SECONDS
+	) -> List[int]:
+		payload = {"worker_id": worker_id, "ids": list(qids), "lease_seconds": lease_seconds}
+		return self._post("/queue/renew", payload)["ids"]
+
+	def finish(
+		self, worker_id: str, qid: int, report: Dict[str, Any]
+	) -> Tuple[str, Optional[str]]:
+		payload = {"worker_id": worker_id, "id": qid, "report": report}
+		result = self._post("/queue/finish", payload)
+		return result["status"], result.get("note")
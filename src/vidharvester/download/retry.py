@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import random
+import re
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from vidharvester.database.manager import DatabaseManager
+
+
+FAILURE_TRANSIENT = "transient"
+FAILURE_RATE_LIMITED = "rate_limited"
+FAILURE_AUTH = "auth"
+FAILURE_PERMANENT = "permanent"
+# Not retried but deferred until the disk has room, without counting an attempt
+FAILURE_DISK_SPACE = "disk_space"
+
+# Only these are retried automatically; auth failures need new cookies first
+RETRYABLE = (FAILURE_TRANSIENT, FAILURE_RATE_LIMITED)
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+# (first delay, cap) in seconds; the delay doubles per attempt
+_BACKOFF = {
+	FAILURE_TRANSIENT: (30.0, 3600.0),
+	FAILURE_RATE_LIMITED: (300.0, 6 * 3600.0),
+}
+
+# Checked in order; the first class with a matching pattern wins for a message
+_PATTERNS = (
+	(
+		FAILURE_DISK_SPACE,
+		re.compile(r"no space left|errno 28|not enough disk space|disk (is )?full", re.I),
+	),
+	(FAILURE_RATE_LIMITED, re.compile(r"\b429\b|too many requests|rate.?limit", re.I)),
+	(
+		FAILURE_AUTH,
+		re.compile(
+			r"\b401\b|sign in|\blog ?in\b|private video|members.only|"
+			r"cookies|authenticat|age.restricted|confirm your age",
+			re.I,
+		),
+	),
+	(
+		# Before transient: a timeout reported alongside an unsupported or missing
+		# page does not make the failure worth retrying
+		FAILURE_PERMANENT,
+		re.compile(
+			r"\b(404|410)\b|unsupported url|video unavailable|not available|"
+			r"has been removed|does not exist|no direct media links|no video formats",
+			re.I,
+		),
+	),
+	(
+		FAILURE_TRANSIENT,
+		re.compile(
+			# 403 on media requests is usually an expired signed URL; a new
+			# extraction fixes it
+			r"\b(403|5\d\d)\b|timed? ?out|connection (reset|refused|aborted)|"
+			r"temporary failure|name resolution|incompleteread|network is unreachable|"
+			r"remote end closed|\bssl\b",
+			re.I,
+		),
+	),
+)
+
+
+def classify_error(message: str) -> Optional[str]:
+	"""Failure class of one error message, or None when nothing matches."""
+	for failure_class, pattern in _PATTERNS:
+		if pattern.search(message or ""):
+			return failure_class
+	return None
+
+
+def classify_failure(messages: Iterable[str]) -> str:
+	"""Failure class of a job from all its error messages (yt-dlp attempts and fallbacks).
+
+	The most specific class across messages wins, in the order disk space,
+	rate-limited, auth, permanent, transient. Unrecognized failures count as
+	transient, bounded by the attempt limit.
+	"""
+	found = {classify_error(m) for m in messages}
+	for failure_class, _ in _PATTERNS:
+		if failure_class in found:
+			return failure_class
+	return FAILURE_TRANSIENT
+
+
+def max_attempts(db: DatabaseManager) -> int:
+	try:
+		value = db.get_setting("max_attempts", str(DEFAULT_MAX_ATTEMPTS))
+		return max(1, int(value or DEFAULT_MAX_ATTEMPTS))
+	except ValueError:
+		return DEFAULT_MAX_ATTEMPTS
+
+
+def backoff_delay(
+	failure_class: str, attempt: int, rng: random.Random = random
+) -> float:
+	"""Seconds before retry number `attempt` (1-based): exponential, capped, with jitter.
+
+	Jitter draws from the upper half of the window so items that failed together
+	(e.g. one rate-limited site) spread out without retrying early.
+	"""
+	base, cap = _BACKOFF.get(failure_class, _BACKOFF[FAILURE_TRANSIENT])
+	window = min(cap, base * (2 ** max(0, attempt - 1)))
+	return rng.uniform(window / 2, window)
+
+
+def next_attempt_at(
+	failure_class: str, attempt: int, now: Optional[datetime] = None
+) -> str:
+	"""UTC ISO timestamp of the next attempt, comparable with the queue's timestamps."""
+	now = now or datetime.utcnow()
+	return (now + timedelta(seconds=backoff_delay(failure_class, attempt))).isoformat()
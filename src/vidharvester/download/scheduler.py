@@ -0,0 +1,428 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Union
+
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.download.bulk import EnqueueResult, enqueue_items
+from vidharvester.download.dedup import duplicate_policy
+from vidharvester.download import scratch
+from vidharvester.download.diskspace import BUDGET, WORKING_FACTOR, min_free_bytes
+from vidharvester.download.engine import DownloadJob, DownloadOptions
+from vidharvester.download.governor import SLOT_JOBS, ResourceGovernor
+from vidharvester.download.metrics import REGISTRY, record_job_metrics
+from vidharvester.download.playlist import PlaylistExpansion
+from vidharvester.download.process_pool import (
+	EXECUTION_PROCESS,
+	ProcessDownloadJob,
+	ProcessPool,
+	execution_mode,
+)
+from vidharvester.download.progress import progress_rate
+from vidharvester.download.queue_store import (
+	HEARTBEAT_SECONDS,
+	LEASE_SECONDS,
+	LocalQueue,
+	RemoteQueue,
+	new_worker_id,
+)
+from vidharvester.utils.formatting import human_size
+from vidharvester.utils.logger import get_logger
+from vidharvester.utils.profiling import (
+	PROFILE_CPROFILE,
+	PROFILE_OFF,
+	profile_mode,
+	profiled,
+)
+
+
+_log = get_logger("download.scheduler")
+
+SCHEDULE_FIFO = "fifo"
+SCHEDULE_PRIORITY_AGING = "priority_aging"
+SCHEDULE_SHORTEST_FIRST = "shortest_first"
+SCHEDULING_POLICIES = (SCHEDULE_FIFO, SCHEDULE_PRIORITY_AGING, SCHEDULE_SHORTEST_FIRST)
+
+
+def scheduling_policy(db: DatabaseManager) -> str:
+	policy = (db.get_setting("scheduling_policy", SCHEDULE_FIFO) or SCHEDULE_FIFO).lower()
+	return policy if policy in SCHEDULING_POLICIES else SCHEDULE_FIFO
+
+
+def _noop(*_args) -> None:
+	pass
+
+
+class QueueScheduler:
+	"""Starts pending queue items up to the concurrency limit, each on its own thread.
+
+	Qt-free: the GUI wraps it in `QueueRunner`, the headless daemon uses it directly.
+	Callbacks are invoked from scheduler or job threads. With the `execution_mode`
+	setting at "process", each job's thread only relays events from a pool process.
+	Lines about a single item or playlist go to `on_job_log(message, job)` with a job
+	id such as "queue-42", or to `on_log` prefixed with it.
+
+	Items are claimed under a lease held by `worker_id` and renewed by heartbeats, so
+	several schedulers can share one database (`LocalQueue`) or one serving instance
+	(`RemoteQueue`).
+	"""
+
+	def __init__(
+		self,
+		db: DatabaseManager,
+		on_started: Callable[[int], None] = _noop,
+		on_finished: Callable[[int, bool], None] = _noop,
+		on_progress: Callable[[int, dict], None] = _noop,
+		on_log: Callable[[str], None] = _noop,
+		on_queued: Callable[[int], None] = _noop,
+		on_job_log: Optional[Callable[[str, str], None]] = None,
+		interval: float = 1.0,
+		max_concurrent: Optional[int] = None,
+		queue: Optional[Union[LocalQueue, RemoteQueue]] = None,
+		worker_id: Optional[str] = None,
+	) -> None:
+		self.db = db
+		self.queue = queue or LocalQueue(db)
+		# Another instance owns the queue: item rows, metrics and playlists live in its
+		# database
+		self._remote = isinstance(self.queue, RemoteQueue)
+		self.worker_id = worker_id or new_worker_id()
+		self.on_started = on_started
+		self.on_finished = on_finished
+		self.on_progress = on_progress
+		self.on_log = on_log
+		self.on_queued = on_queued
+		self.on_job_log = on_job_log
+		self.interval = interval
+		self._fixed_concurrency = max_concurrent
+		self.max_concurrent = self._read_max_concurrent()
+		self._active: Dict[int, Union[DownloadJob, ProcessDownloadJob]] = {}
+		self._job_threads: Dict[int, threading.Thread] = {}
+		self._lock = threading.RLock()
+		self._wake = threading.Event()
+		self._stopping = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+		self._process_pool: Optional[ProcessPool] = None
+		self._speeds: Dict[int, float] = {}
+		self._expansions: Dict[int, PlaylistExpansion] = {}
+		self._canceled: Set[int] = set()
+		self._last_heartbeat = 0.0
+		self.governor = ResourceGovernor(
+			db, self._read_max_concurrent, lambda: self.active_count, on_log
+		)
+		REGISTRY.register_gauge(
+			"vidharvester_queue_depth",
+			"Pending queue items.",
+			lambda: self.db.count_queue(["pending"]),
+		)
+		REGISTRY.register_gauge(
+			"vidharvester_active_workers", "Running download jobs.", lambda: self.active_count
+		)
+		REGISTRY.register_gauge(
+			"vidharvester_transfer_bytes_per_second",
+			"Current combined transfer rate of running jobs.",
+			lambda: sum(self._speeds.values()),
+		)
+		REGISTRY.register_gauge(
+			"vidharvester_disk_reserved_bytes",
+			"Disk space running jobs are still expected to write.",
+			BUDGET.reserved,
+		)
+
+	def _read_max_concurrent(self) -> int:
+		if self._fixed_concurrency:
+			return self._fixed_concurrency
+		try:
+			return int(self.db.get_setting("max_concurrent_downloads", "2") or "2")
+		except Exception:
+			return 2
+
+	@property
+	def active_count(self) -> int:
+		with self._lock:
+			return len(self._active)
+
+	def start(self) -> None:
+		if self._thread is not None and self._thread.is_alive():
+			return
+		self._stopping.clear()
+		self._thread = threading.Thread(
+			target=self._loop, name="queue-scheduler", daemon=True
+		)
+		self._thread.start()
+		self.governor.start()
+		if not self._remote:
+			for row in self.db.fetch_unfinished_playlists():
+				self._start_expansion(int(row["id"]))
+
+	def stop(self, cancel_running: bool = True, timeout: float = 10.0) -> None:
+		"""Stop scheduling; with `cancel_running`, also cancel the running jobs.
+
+		Waits up to `timeout` seconds for canceled jobs to report, so their items go
+		back to pending and release their leases before the process exits.
+		"""
+		self._stopping.set()
+		self._wake.set()
+		with self._lock:
+			for expansion in self._expansions.values():
+				expansion.stop()
+		if cancel_running:
+			with self._lock:
+				jobs = list(self._active.values())
+				threads = list(self._job_threads.values())
+			for job in jobs:
+				job.stop()
+			deadline = time.monotonic() + timeout
+			for thread in threads:
+				thread.join(max(0.0, deadline - time.monotonic()))
+		if self._thread is not None:
+			self._thread.join(timeout=5)
+			self._thread = None
+		self.governor.stop()
+		if self._process_pool is not None:
+			self._process_pool.shutdown()
+			self._process_pool = None
+
+	def wake(self) -> None:
+		"""Run a scheduling pass now instead of waiting for the next interval."""
+		self._wake.set()
+
+	def enqueue(
+		self, raws: Iterable[Union[str, Dict[str, Any]]], defaults: Dict[str, Any]
+	) -> EnqueueResult:
+		"""Bulk-add URLs or per-item option dicts; scheduling starts after the first chunk."""
+		return enqueue_items(self.db, raws, defaults, on_chunk=self._on_batch_queued)
+
+	def expand_playlist(self, url: str, item: Dict[str, Any]) -> int:
+		"""Queue every entry of a playlist or channel, streaming them in as they are listed.
+
+		`item` holds the queue options (mode, format, ...) applied to each entry.
+		Returns the `playlists` row id.
+		"""
+		pid = self.db.add_playlist(url, item)
+		self._start_expansion(pid)
+		return pid
+
+	def _start_expansion(self, pid: int) -> None:
+		expansion = PlaylistExpansion(
+			self.db,
+			pid,
+			on_batch=self._on_batch_queued,
+			on_log=lambda message: self._job_log(message, f"playlist-{pid}"),
+		)
+		with self._lock:
+			self._expansions[pid] = expansion
+
+		def run():
+			try:
+				expansion.run()
+			finally:
+				with self._lock:
+					self._expansions.pop(pid, None)
+
+		threading.Thread(target=run, name=f"playlist-{pid}", daemon=True).start()
+
+	def _on_batch_queued(self, count: int) -> None:
+		self.on_queued(count)
+		self.wake()
+
+	def cancel(self, qid: int) -> bool:
+		with self._lock:
+			job = self._active.get(qid)
+		if job is None:
+			return False
+		self._canceled.add(qid)
+		job.stop()
+		return True
+
+	def _loop(self) -> None:
+		# One profile for the scheduler's lifetime, written when it stops. Not with cProfile:
+		# from Python 3.12 one profiler per process is allowed, and the per-job ones need it
+		mode = profile_mode(self.db)
+		with profiled(PROFILE_OFF if mode == PROFILE_CPROFILE else mode, "scheduler"):
+			while not self._stopping.is_set():
+				try:
+					self.tick()
+				except Exception:
+					_log.exception("Scheduler pass failed")
+				self._wake.wait(self.interval)
+				self._wake.clear()
+
+	def tick(self) -> None:
+		# Refresh max_concurrent in case settings changed; the governor may lower it
+		# under load
+		self.max_concurrent = self._read_max_concurrent()
+		if self.governor.running:
+			self.max_concurrent = min(self.max_concurrent, self.governor.limit(SLOT_JOBS))
+		self._heartbeat()
+		with self._lock:
+			free = self.max_concurrent - len(self._active)
+			if free <= 0:
+				return
+			policy = scheduling_policy(self.db)
+			claimed = self.queue.claim(self.worker_id, policy, free, LEASE_SECONDS)
+			for row in claimed:
+				if self._admit(row):
+					self._start_row(row)
+
+	def _heartbeat(self) -> None:
+		"""Extend the leases of running items; stop jobs whose lease was taken over."""
+		now = time.monotonic()
+		if now - self._last_heartbeat < HEARTBEAT_SECONDS:
+			return
+		self._last_heartbeat = now
+		with self._lock:
+			qids = list(self._active)
+		if not qids:
+			return
+		held = set(self.queue.renew(self.worker_id, qids, LEASE_SECONDS))
+		for qid in qids:
+			if qid not in held:
+				self._job_log(f"[lease] Lost the lease on item {qid}; stopping it", f"queue-{qid}")
+				self.cancel(qid)
+
+	def _admit(self, row) -> bool:
+		"""Reserve disk space for the item's size estimate; defers the item if it can't fit.
+
+		Items without an estimate start right away and are checked by the job after its
+		probe.
+		"""
+		size = row["size_estimate"]
+		if not size:
+			return True
+		qid = int(row["id"])
+		need = int(size * WORKING_FACTOR)
+		admitted, available = BUDGET.reserve(
+			f"queue-{qid}", row["output_dir"], need, min_free_bytes(self.db)
+		)
+		if admitted:
+			return True
+		message = (
+			f"Not enough disk space: needs ~{human_size(need)}, "
+			f"{human_size(available)} available"
+		)
+		try:
+			report = {"outcome": "deferred", "message": message}
+			_, note = self.queue.finish(self.worker_id, qid, report)
+		except Exception as exc:
+			note = f"[lease] Could not defer item {qid}: {exc}"
+		self._job_log(note, f"queue-{qid}")
+		return False
+
+	def _start_row(self, row) -> None:
+		qid = int(row["id"])
+		scratch_dir, scratch_limit = scratch.scratch_settings(self.db)
+		options = DownloadOptions(
+			output_directory=row["output_dir"],
+			mode=row["mode"],
+			format_str=row["format"],
+			quality=row["quality"],
+			filename_template=row["filename_template"],
+			duplicate_policy=duplicate_policy(self.db),
+			progress_rate_hz=progress_rate(self.db),
+			profile_mode=profile_mode(self.db),
+			job_label=f"queue-{qid}",
+			min_free_bytes=min_free_bytes(self.db),
+			scratch_directory=scratch_dir,
+			scratch_limit_bytes=scratch_limit,
+		)
+		callbacks = {
+			"on_progress": lambda d, qid=qid: self._on_progress(qid, d),
+			"on_log": lambda message, qid=qid: self._job_log(message, f"queue-{qid}"),
+		}
+		if execution_mode(self.db) == EXECUTION_PROCESS:
+			if self._process_pool is None:
+				self._process_pool = ProcessPool()
+			job = ProcessDownloadJob(
+				row["url"], options, self._process_pool, db=self.db, **callbacks
+			)
+		else:
+			job = DownloadJob(row["url"], options, db=self.db, **callbacks)
+		job.on_finished = lambda success, msg, qid=qid, job=job: self._on_finished(
+			qid, success, msg, job
+		)
+		thread = threading.Thread(target=job.run, name=f"download-{qid}", daemon=True)
+		self._active[qid] = job
+		self._job_threads[qid] = thread
+		self.on_started(qid)
+		thread.start()
+
+	def _job_log(self, message: str, job: str) -> None:
+		"""Log a line about one job.
+
+		It goes to `on_job_log(message, job)`, else to `on_log` tagged with the job.
+		"""
+		if self.on_job_log is not None:
+			self.on_job_log(message, job)
+		else:
+			self.on_log(f"[{job}] {message}")
+
+	def _on_progress(self, qid: int, d: dict) -> None:
+		if d.get("status") == "downloading":
+			if not self._remote:
+				self.db.update_queue_progress(qid, d.get("percent"), d.get("speed"), d.get("eta"))
+			self._speeds[qid] = d.get("speed") or 0.0
+			# Jobs in pool processes keep their own budget; count their progress here too
+			BUDGET.consume(f"queue-{qid}", d.get("downloaded") or 0)
+			self.on_progress(qid, d)
+
+	def _on_finished(
+		self,
+		qid: int,
+		success: bool,
+		message: str,
+		job: Union[DownloadJob, ProcessDownloadJob],
+	) -> None:
+		skipped = job.dedup_action == "skipped"
+		with self._lock:
+			self._active.pop(qid, None)
+			self._job_threads.pop(qid, None)
+			canceled = qid in self._canceled
+			self._canceled.discard(qid)
+		self._speeds.pop(qid, None)
+		BUDGET.release(f"queue-{qid}")
+		if skipped:
+			outcome = "skipped"
+		elif success:
+			outcome = "completed"
+		elif canceled:
+			outcome = "canceled"
+		elif self._stopping.is_set():
+			outcome = "interrupted"
+		else:
+			outcome = "failed"
+		report = {
+			"outcome": outcome,
+			"message": message,
+			"errors": list(job.errors or []),
+			"last_size": job.last_size or job.size_estimate,
+			# Add to history for queue-runner initiated tasks
+			"history": {
+				"url": job.url,
+				"output_path": job.last_filename,
+				"title": job.last_title,
+				"fmt": job.last_format,
+				"size_bytes": job.last_size,
+				"source": "queue",
+				"extractor_key": job.last_extractor_key,
+				"video_id": job.last_video_id,
+			} if outcome == "completed" else None,
+			"metrics": job.metrics.to_report() if self._remote else None,
+		}
+		with job.metrics.phase("db_write"):
+			try:
+				status, note = self.queue.finish(self.worker_id, qid, report)
+			except Exception as exc:
+				# The lease expires and another pass or worker picks the item up again
+				status, note = "lost", f"[lease] Could not record the result of item {qid}: {exc}"
+		if note:
+			self._job_log(note, f"queue-{qid}")
+		done = status not in ("pending", "retrying", "deferred", "lost")
+		if done and job.options.scratch_directory:
+			# Done for good: partial data kept for resuming is no longer needed
+			scratch.discard(job.options.scratch_directory, f"queue-{qid}")
+		if not self._remote:
+			record_job_metrics(self.db, qid, job.url, success, job.metrics)
+		self.on_finished(qid, success)
+		self.wake()
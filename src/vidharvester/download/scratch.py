@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import errno
+import os
+import re
+import shutil
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from vidharvester.database.manager import DatabaseManager
+
+
+# Read size of the streamed copy when scratch and output are on different file systems
+COPY_BUFFER = 4 * 1024 * 1024
+# A copied file carries this suffix until it is complete, so the final name never
+# holds half a file
+_COPY_SUFFIX = ".vhpart"
+# yt-dlp's partial downloads, fragments, resume state and post-processor temporaries
+# (e.g. "a.mp4.part", "a.f137.mp4.part-Frag3", "a.mp4.ytdl", "a.temp.mp4"), left by
+# earlier attempts
+_LEFTOVER = re.compile(r"(\.part|\.ytdl|\.temp|\.part-Frag\d+(\.part)?|\.temp\.\w+)$")
+
+_lock = threading.Lock()
+# job key -> (scratch root, bytes expected in the job's directory)
+_claims: Dict[str, Tuple[str, int]] = {}
+# Destinations chosen by moves still in progress
+_targets: Set[str] = set()
+
+
+def scratch_settings(db: DatabaseManager) -> Tuple[Optional[str], int]:
+	"""(scratch directory or None when unset, cap in bytes or 0 for none)."""
+	root = (db.get_setting("scratch_directory", "") or "").strip()
+	try:
+		mb = int(db.get_setting("scratch_limit_mb", "0") or 0)
+	except ValueError:
+		mb = 0
+	return (os.path.expanduser(root) if root else None), max(0, mb) * 1024 * 1024
+
+
+def job_dir(root: str, key: str) -> str:
+	"""A job's own directory under the scratch root.
+
+	Queue jobs keep theirs across attempts, so they can resume.
+	"""
+	return os.path.join(root, key)
+
+
+def _tree_size(path: str) -> int:
+	total = 0
+	for base, _, files in os.walk(path):
+		for name in files:
+			try:
+				total += os.lstat(os.path.join(base, name)).st_size
+			except OSError:
+				pass
+	return total
+
+
+def claim(root: str, key: str, size: int, limit: int = 0) -> bool:
+	"""Make room for `size` bytes of in-progress data in `key`'s directory.
+
+	Returns False when it doesn't fit.
+
+	Every job directory counts with the larger of its current size and its claim, so
+	partial data left by interrupted jobs stays within `limit` too.
+	"""
+	with _lock:
+		os.makedirs(root, exist_ok=True)
+		if size > shutil.disk_usage(root).free:
+			return False
+		if limit:
+			names = set(os.listdir(root)) | {k for k, (r, _) in _claims.items() if r == root}
+			used = 0
+			for name in names - {key}:
+				claimed = _claims[name][1] if name in _claims and _claims[name][0] == root else 0
+				used += max(_tree_size(job_dir(root, name)), claimed)
+			if used + max(_tree_size(job_dir(root, key)), size) > limit:
+				return False
+		_claims[key] = (root, size)
+		os.makedirs(job_dir(root, key), exist_ok=True)
+		return True
+
+
+def release(key: str) -> None:
+	with _lock:
+		_claims.pop(key, None)
+
+
+def discard(root: str, key: str) -> None:
+	"""Drop `key`'s claim and delete its directory with any partial data."""
+	release(key)
+	shutil.rmtree(job_dir(root, key), ignore_errors=True)
+
+
+def _free_target(dst: str) -> str:
+	"""`dst`, or "name (2).ext", "name (3).ext"... when it is taken. Call with `_lock`."""
+	base, ext = os.path.splitext(dst)
+	candidate, n = dst, 1
+	while candidate in _targets or os.path.lexists(candidate):
+		n += 1
+		candidate = f"{base} ({n}){ext}"
+	_targets.add(candidate)
+	return candidate
+
+
+def move_file(src: str, dst: str) -> str:
+	"""Move `src` to `dst` without `dst` ever existing half-written.
+
+	An existing file is never replaced: the move then goes to "name (2).ext" and so
+	on. Returns the path used. On the same file system this is one atomic rename.
+	Otherwise the data is streamed once into a preallocated temporary file next to the
+	target, which is renamed to it when complete.
+	"""
+	os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+	with _lock:
+		dst = _free_target(dst)
+	try:
+		_move(src, dst)
+	finally:
+		with _lock:
+			_targets.discard(dst)
+	return dst
+
+
+def _move(src: str, dst: str) -> None:
+	try:
+		os.replace(src, dst)
+		return
+	except OSError as exc:
+		if exc.errno != errno.EXDEV:
+			raise
+	tmp = dst + _COPY_SUFFIX
+	try:
+		with open(src, "rb") as fin, open(tmp, "wb") as fout:
+			size = os.fstat(fin.fileno()).st_size
+			if size and hasattr(os, "posix_fallocate"):
+				try:
+					os.posix_fallocate(fout.fileno(), 0, size)
+				except OSError:
+					pass  # not supported by every (network) file system
+			shutil.copyfileobj(fin, fout, COPY_BUFFER)
+		try:
+			shutil.copystat(src, tmp)
+		except OSError:
+			pass
+		os.replace(tmp, dst)
+	except BaseException:
+		try:
+			os.unlink(tmp)
+		except OSError:
+			pass
+		raise
+	os.unlink(src)
+
+
+def move_tree(src_dir: str, dest_dir: str) -> Dict[str, str]:
+	"""Move the files under `src_dir` to the same relative path under `dest_dir`.
+
+	Returns {old: new}; a taken name gets a suffix as in `move_file`. Partial and
+	temporary files of interrupted attempts are left behind.
+	"""
+	moved: Dict[str, str] = {}
+	for base, _, files in os.walk(src_dir):
+		for name in files:
+			if _LEFTOVER.search(name):
+				continue
+			src = os.path.join(base, name)
+			dst = os.path.join(dest_dir, os.path.relpath(src, src_dir))
+			moved[src] = move_file(src, dst)
+	return moved
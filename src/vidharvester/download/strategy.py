@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.download.retry import FAILURE_PERMANENT, classify_failure
+from vidharvester.utils.urls import url_domain
+
+
+# Download paths, named as in the job metrics
+PATH_YTDLP = "ytdlp"
+PATH_FALLBACK = "fallback"
+PATH_HEADLESS = "headless"
+DEFAULT_ORDER = (PATH_YTDLP, PATH_FALLBACK, PATH_HEADLESS)
+
+# Outcomes lose half their weight per week, so a domain drifts back to the default order
+HALF_LIFE_SECONDS = 7 * 24 * 3600.0
+# A path goes first while its decayed successes are at least this (one success keeps
+# it for a half-life)
+PREFER_MIN_SUCCESSES = 0.5
+
+
+def _decayed(
+	rows: Iterable, now: datetime
+) -> Dict[str, Tuple[float, float, Optional[float]]]:
+	"""path -> (successes, failures, average seconds), decayed since the last update."""
+	scores = {}
+	for row in rows:
+		age = max(0.0, (now - datetime.fromisoformat(row["updated_at"])).total_seconds())
+		keep = 0.5 ** (age / HALF_LIFE_SECONDS)
+		scores[row["path"]] = (
+			row["successes"] * keep,
+			row["failures"] * keep,
+			row["avg_seconds"],
+		)
+	return scores
+
+
+def plan_order(
+	db: Optional[DatabaseManager], url: str
+) -> Tuple[Tuple[str, ...], Optional[str]]:
+	"""(order to try the download paths in, reason when it differs from the default).
+
+	The path that recently worked for the URL's domain goes first; the others follow
+	in the default order, so a site that changed is still handled and its new path
+	learned.
+	"""
+	domain = url_domain(url)
+	if db is None or not domain:
+		return DEFAULT_ORDER, None
+	scores = _decayed(db.get_domain_strategies(domain), datetime.utcnow())
+	working = [
+		path
+		for path, (successes, failures, _) in scores.items()
+		if path in DEFAULT_ORDER
+		and successes >= PREFER_MIN_SUCCESSES
+		and successes > failures
+	]
+	if not working:
+		return DEFAULT_ORDER, None
+	# Most net successes first; the faster path on a tie
+	best = max(
+		working, key=lambda p: (scores[p][0] - scores[p][1], -(scores[p][2] or 0.0))
+	)
+	if best == DEFAULT_ORDER[0]:
+		return DEFAULT_ORDER, None
+	order = (best,) + tuple(p for p in DEFAULT_ORDER if p != best)
+	successes, _, avg_seconds = scores[best]
+	skipped = [
+		f"{path} {scores[path][1]:.1f}"
+		for path in DEFAULT_ORDER[: DEFAULT_ORDER.index(best)]
+		if path in scores
+	]
+	reason = f"{best} worked for {domain} ({successes:.1f} recent successes"
+	reason += f", ~{avg_seconds:.1f}s)" if avg_seconds else ")"
+	if skipped:
+		reason += f"; recent failures: {', '.join(skipped)}"
+	return order, reason
+
+
+def record_outcome(
+	db: Optional[DatabaseManager],
+	url: str,
+	path: str,
+	success: bool,
+	seconds: float,
+	errors: Iterable[str] = (),
+) -> None:
+	"""Remember how download `path` did for the URL's domain.
+
+	Failures only count when they say something about the site: network errors,
+	rate limits and missing cookies would fail every path alike.
+	"""
+	domain = url_domain(url)
+	if db is None or not domain:
+		return
+	errors = [e for e in errors if e]
+	if not success and errors and classify_failure(errors) != FAILURE_PERMANENT:
+		return
+	try:
+		db.record_domain_outcome(domain, path, success, seconds, HALF_LIFE_SECONDS)
+	except Exception:
+		pass  # a locked or read-only database must not fail the download
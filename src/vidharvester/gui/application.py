@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+from PyQt6 import QtCore, QtWidgets
+
+from vidharvester.capture.extension_server import start_server
+from vidharvester.download.bulk import api_token
+from vidharvester.gui.main_window import MainWindow
+from vidharvester.gui.theme_manager import ThemeManager
+from vidharvester.utils.logger import get_logger
+
+
+_log = get_logger("gui.startup")
+
+# When set, print startup timings as JSON and quit after the first paint (used by
+# benchmarks/bench_startup.py).
+STARTUP_PROBE_ENV = "VIDHARVESTER_STARTUP_PROBE"
+
+
+class _FirstPaintProbe(QtCore.QObject):
+    """Reports the time to the main window's first paint, then warms up yt-dlp.
+
+    The warm-up runs off the GUI thread.
+    """
+
+    def __init__(
+        self, window: QtWidgets.QWidget, launched_at: float, window_created_at: float
+    ):
+        super().__init__(window)
+        self.launched_at = launched_at
+        self.window_created_at = window_created_at
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):  # noqa: N802
+        if event.type() == QtCore.QEvent.Type.Paint:
+            obj.removeEventFilter(self)
+            # Defer so the paint in progress completes first
+            QtCore.QTimer.singleShot(0, self._on_first_paint)
+        return False
+
+    def _on_first_paint(self):
+        created = self.window_created_at - self.launched_at
+        timings = {
+            "window_created_ms": round(created * 1000, 1),
+            "first_paint_ms": round((time.perf_counter() - self.launched_at) * 1000, 1),
+        }
+        _log.info("Startup: window created after %.1f ms, first paint after %.1f ms",
+                  timings["window_created_ms"], timings["first_paint_ms"])
+        if os.getenv(STARTUP_PROBE_ENV):
+            print(json.dumps(timings), flush=True)
+            QtWidgets.QApplication.quit()
+            return
+        threading.Thread(target=_prewarm, name="prewarm-yt-dlp", daemon=True).start()
+
+
+def _prewarm():
+    from vidharvester.download.engine import prewarm_extractors
+
+    started = time.perf_counter()
+    try:
+        prewarm_extractors()
+    except Exception as exc:
+        _log.warning("yt-dlp pre-warm failed: %s", exc)
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _log.info("yt-dlp extractors pre-warmed in %.0f ms", elapsed_ms)
+
+
+def run(capture_port: int, launched_at: Optional[float] = None) -> int:
+    """Build the QApplication and main window, start the capture server and run."""
+    launched_at = launched_at if launched_at is not None else time.perf_counter()
+    app = QtWidgets.QApplication(sys.argv)
+    app.setApplicationName("VidHarvester")
+
+    # Set app/tray icon
+    app.setWindowIcon(ThemeManager.build_app_icon("dark"))
+    window = MainWindow()
+    _FirstPaintProbe(window, launched_at, time.perf_counter())
+    window.show()
+
+    # Start local capture server; captures are queued for the capture writer straight
+    # from the server threads, and the window hears about them once a batch is stored.
+    # POST /queue takes the token shown in Settings
+    start_server(
+        capture_port,
+        window.on_capture_received,
+        enqueue=window.enqueue_items,
+        token=api_token(window.db),
+    )
+
+    return app.exec()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from PyQt6 import QtCore
+
+from vidharvester.database.manager import DatabaseManager
+
+
+COLUMNS = ["URL", "Streams", "Page", "Type", "Hits", "Last Seen"]
+
+
+class CapturesTableModel(QtCore.QAbstractTableModel):
+    """Captured URLs by most recent sighting, fetched a page at a time on scrolling.
+
+    `refresh_new` inserts what was captured since the newest loaded row at the top
+    instead of resetting, so the view keeps its selection and scroll position. At
+    most `limit` rows are held; the store prunes to the same cap.
+    """
+
+    PAGE_SIZE = 200
+
+    def __init__(self, db: DatabaseManager, limit: int, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.limit = limit
+        self._rows: List[Dict[str, Any]] = []
+        self._exhausted = False
+
+    def rowCount(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(  # noqa: N802
+        self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole
+    ):
+        if (
+            role == QtCore.Qt.ItemDataRole.DisplayRole
+            and orientation == QtCore.Qt.Orientation.Horizontal
+        ):
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self._rows[index.row()]
+        column = index.column()
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                url = item["url"]
+                return url if len(url) <= 80 else url[:80] + "..."
+            if column == 1:
+                return item["streams"] or ""
+            if column == 2:
+                return item["page_url"] or "-"
+            if column == 3:
+                return item["content_type"] or "-"
+            if column == 4:
+                return item["hits"]
+            return item["last_seen"][:19].replace("T", " ")
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole and column in (0, 2):
+            return item["url"] if column == 0 else item["page_url"]
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return item
+        return None
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        if parent.isValid() or self._exhausted:
+            return False
+        return len(self._rows) < self.limit
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        if not self.canFetchMore(parent):
+            return
+        last = self._rows[-1] if self._rows else None
+        before = (last["last_seen"], last["id"]) if last else None
+        size = min(self.PAGE_SIZE, self.limit - len(self._rows))
+        page = [dict(r) for r in self.db.fetch_captures(size, before)]
+        if len(page) < size:
+            self._exhausted = True
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def refresh_new(self) -> int:
+        """Move captures seen since the last refresh to the top; returns how many."""
+        if not self._rows:
+            self._exhausted = False
+            self.fetchMore()
+            return len(self._rows)
+        since = self._rows[0]["last_seen"]
+        fresh = [dict(r) for r in self.db.fetch_captures(self.limit, since=since)]
+        if not fresh:
+            return 0
+        # Captures seen again are already loaded further down
+        seen_ids = {r["id"] for r in fresh}
+        for row in range(len(self._rows) - 1, -1, -1):
+            if self._rows[row]["id"] in seen_ids:
+                self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+        self.beginInsertRows(QtCore.QModelIndex(), 0, len(fresh) - 1)
+        self._rows[:0] = fresh
+        self.endInsertRows()
+        if len(self._rows) > self.limit:
+            self.beginRemoveRows(QtCore.QModelIndex(), self.limit, len(self._rows) - 1)
+            del self._rows[self.limit:]
+            self.endRemoveRows()
+            self._exhausted = True
+        return len(fresh)
+
+    def refresh_capture(self, url: str) -> None:
+        """Re-read one capture, e.g. once its manifest summary is stored."""
+        fresh = self.db.get_capture(url)
+        if fresh is None:
+            return
+        for row, item in enumerate(self._rows):
+            if item["id"] == fresh["id"]:
+                self._rows[row] = dict(fresh)
+                self.dataChanged.emit(
+                    self.index(row, 0), self.index(row, len(COLUMNS) - 1)
+                )
+                return
+
+    def remove_ids(self, ids: List[int]) -> None:
+        doomed = set(ids)
+        for row in range(len(self._rows) - 1, -1, -1):
+            if self._rows[row]["id"] in doomed:
+                self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+
+    def reload(self) -> None:
+        self.beginResetModel()
+        self._rows.clear()
+        self._exhausted = False
+        self.endResetModel()
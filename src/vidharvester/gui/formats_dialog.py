@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from PyQt6 import QtCore, QtWidgets
+
+from vidharvester.capture.manifest import Manifest
+from vidharvester.download.diskspace import estimate_size
+from vidharvester.utils.formatting import human_size
+
+
+COLUMNS = ["ID", "Kind", "Ext", "Resolution", "Bitrate", "Codecs", "Size"]
+
+
+def manifest_rows(manifest: Manifest) -> List[Dict[str, Any]]:
+    """Dialog rows for the variants of an inspected HLS/DASH manifest."""
+    return [
+        {
+            "format_id": v.format_id,
+            "selector": v.format_id,
+            "kind": v.kind + (f" ({v.language})" if v.language else ""),
+            "resolution": v.resolution,
+            "kbps": round(v.bandwidth / 1000) if v.bandwidth else None,
+            "codecs": v.codecs,
+            "size": (
+                manifest.estimated_size(v)
+                if v.kind == "video"
+                else v.estimated_size(manifest.duration)
+            ),
+        }
+        for v in manifest.variants
+    ]
+
+
+def info_rows(info: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Dialog rows for the formats of a yt-dlp info dict, best first.
+
+    Choosing a video-only format also takes the best audio, as the Download button
+    would for its default selection.
+    """
+    rows = []
+    for fmt in reversed(info.get("formats") or []):
+        format_id = fmt.get("format_id")
+        vcodec, acodec = fmt.get("vcodec") or "none", fmt.get("acodec") or "none"
+        storyboard = vcodec == "none" and acodec == "none" and fmt.get("ext") == "mhtml"
+        if not format_id or storyboard:
+            continue
+        if vcodec != "none" and acodec == "none":
+            kind, selector = "video only", f"{format_id}+bestaudio/{format_id}"
+        elif vcodec == "none" and acodec != "none":
+            kind, selector = "audio only", format_id
+        else:
+            kind, selector = "video", format_id
+        has_size = fmt.get("height") or fmt.get("width")
+        tbr = fmt.get("tbr")
+        rows.append(
+            {
+                "format_id": format_id,
+                "selector": selector,
+                "kind": kind,
+                "ext": fmt.get("ext"),
+                "resolution": fmt.get("resolution") if has_size else None,
+                "kbps": round(tbr) if isinstance(tbr, (int, float)) else None,
+                "codecs": ", ".join(c for c in (vcodec, acodec) if c != "none") or None,
+                "size": estimate_size(info, format_id),
+            }
+        )
+    return rows
+
+
+class FormatsDialog(QtWidgets.QDialog):
+    """Formats of one or more URLs, listed as their results arrive.
+
+    Add each URL with `add_source`, then deliver its result from any thread through
+    `result_ready(url, result)`: a `Manifest`, a yt-dlp info dict or the exception the
+    probe raised. "Use Format" emits `format_chosen(url, selector)` and closes; the
+    selector is a yt-dlp format expression built from the format id.
+    """
+
+    result_ready = QtCore.pyqtSignal(str, object)
+    format_chosen = QtCore.pyqtSignal(str, str)
+
+    def __init__(self, title: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(900, 460)
+        self._results: Dict[str, List[Dict[str, Any]]] = {}
+        self.result_ready.connect(self._on_result)
+
+        self.sources = QtWidgets.QListWidget()
+        self.sources.currentItemChanged.connect(lambda *_: self._show_current())
+        self.summary_label = QtWidgets.QLabel()
+        self.summary_label.setWordWrap(True)
+
+        self.table = QtWidgets.QTableWidget(0, len(COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.setEditTriggers(
+            QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers
+        )
+        self.table.setSelectionBehavior(
+            QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.table.setSelectionMode(
+            QtWidgets.QAbstractItemView.SelectionMode.SingleSelection
+        )
+        self.table.doubleClicked.connect(lambda _: self._use_selected())
+
+        buttons = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Close
+        )
+        use_btn = buttons.addButton(
+            "Use Format", QtWidgets.QDialogButtonBox.ButtonRole.ActionRole
+        )
+        use_btn.clicked.connect(self._use_selected)
+        buttons.rejected.connect(self.reject)
+
+        right = QtWidgets.QWidget()
+        right_layout = QtWidgets.QVBoxLayout(right)
+        right_layout.setContentsMargins(0, 0, 0, 0)
+        right_layout.addWidget(self.summary_label)
+        right_layout.addWidget(self.table)
+        splitter = QtWidgets.QSplitter()
+        splitter.addWidget(self.sources)
+        splitter.addWidget(right)
+        splitter.setStretchFactor(1, 3)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(splitter)
+        layout.addWidget(buttons)
+
+    def add_source(self, url: str) -> None:
+        item = QtWidgets.QListWidgetItem(f"… {url}")
+        item.setData(QtCore.Qt.ItemDataRole.UserRole, url)
+        item.setToolTip(url)
+        self.sources.addItem(item)
+        if self.sources.currentItem() is None:
+            self.sources.setCurrentItem(item)
+
+    def _item(self, url: str) -> Optional[QtWidgets.QListWidgetItem]:
+        for row in range(self.sources.count()):
+            item = self.sources.item(row)
+            if item.data(QtCore.Qt.ItemDataRole.UserRole) == url:
+                return item
+        return None
+
+    def _on_result(self, url: str, result: Any) -> None:
+        if isinstance(result, Manifest):
+            self.set_formats(url, result.summary(), manifest_rows(result))
+        elif isinstance(result, dict):
+            title = result.get("title") or url
+            duration = result.get("duration_string") or ""
+            summary = f"{title} ({duration})" if duration else title
+            self.set_formats(url, summary, info_rows(result))
+        else:
+            self.set_error(url, str(result))
+
+    def set_formats(self, url: str, summary: str, rows: List[Dict[str, Any]]) -> None:
+        self._results[url] = rows
+        item = self._item(url)
+        if item is not None:
+            item.setText(summary)
+            item.setData(QtCore.Qt.ItemDataRole.UserRole + 1, summary)
+            if item is self.sources.currentItem():
+                self._show_current()
+
+    def set_error(self, url: str, message: str) -> None:
+        self._results[url] = []
+        item = self._item(url)
+        if item is not None:
+            item.setText(f"✗ {url}")
+            item.setData(QtCore.Qt.ItemDataRole.UserRole + 1, message)
+            if item is self.sources.currentItem():
+                self._show_current()
+
+    def _show_current(self) -> None:
+        item = self.sources.currentItem()
+        url = item.data(QtCore.Qt.ItemDataRole.UserRole) if item is not None else None
+        rows = self._results.get(url) or []
+        if item is None:
+            self.summary_label.clear()
+        elif url in self._results:
+            summary = item.data(QtCore.Qt.ItemDataRole.UserRole + 1)
+            self.summary_label.setText(f"{url}\n{summary}")
+        else:
+            self.summary_label.setText(f"{url}\nReading formats...")
+        self.table.setRowCount(len(rows))
+        for row, fmt in enumerate(rows):
+            values = [
+                fmt["format_id"],
+                fmt.get("kind") or "",
+                fmt.get("ext") or "-",
+                fmt.get("resolution") or "-",
+                f"{fmt['kbps']} kbps" if fmt.get("kbps") else "-",
+                fmt.get("codecs") or "-",
+                human_size(fmt["size"]) if fmt.get("size") else "-",
+            ]
+            for column, value in enumerate(values):
+                cell = QtWidgets.QTableWidgetItem(str(value))
+                cell.setData(QtCore.Qt.ItemDataRole.UserRole, fmt["selector"])
+                self.table.setItem(row, column, cell)
+
+    def _use_selected(self) -> None:
+        item = self.sources.currentItem()
+        cells = self.table.selectedItems()
+        if item is None or not cells:
+            return
+        url = item.data(QtCore.Qt.ItemDataRole.UserRole)
+        self.format_chosen.emit(url, cells[0].data(QtCore.Qt.ItemDataRole.UserRole))
+        self.accept()
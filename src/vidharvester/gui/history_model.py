@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from PyQt6 import QtCore
+
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.utils.formatting import human_size
+
+
+COLUMNS = ["Title", "URL", "Format", "Size", "Completed"]
+
+
+class HistoryTableModel(QtCore.QAbstractTableModel):
+    """Newest-first history, fetched a page at a time as the view scrolls.
+
+    `set_query` switches the model to full-text search results; an empty query shows
+    the whole history again.
+    """
+
+    PAGE_SIZE = 200
+
+    def __init__(self, db: DatabaseManager, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.query = ""
+        self._rows: List[Dict[str, Any]] = []
+        self._exhausted = False
+
+    def rowCount(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(  # noqa: N802
+        self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole
+    ):
+        if (
+            role == QtCore.Qt.ItemDataRole.DisplayRole
+            and orientation == QtCore.Qt.Orientation.Horizontal
+        ):
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self._rows[index.row()]
+        column = index.column()
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return item["title"] or "Unknown"
+            if column == 1:
+                url = item["url"]
+                return url if len(url) <= 50 else url[:50] + "..."
+            if column == 2:
+                return item["format"] or "-"
+            if column == 3:
+                return human_size(item["size_bytes"]) if item["size_bytes"] else "-"
+            return item["completed_at"]
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole and column == 1:
+            return item["url"]
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return item
+        return None
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        if parent.isValid() or self._exhausted:
+            return
+        before_id = self._rows[-1]["id"] if self._rows else None
+        rows = self.db.search_history(self.query, self.PAGE_SIZE, before_id)
+        page = [dict(r) for r in rows]
+        if len(page) < self.PAGE_SIZE:
+            self._exhausted = True
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def set_query(self, query: str) -> None:
+        self.query = query.strip()
+        self.reload()
+
+    def reload(self) -> None:
+        self.beginResetModel()
+        self._rows.clear()
+        self._exhausted = False
+        self.endResetModel()
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import itertools
 import os
+import threading
+import time
+from collections import deque
 from typing import Optional
 
 from PyQt6 import QtCore, QtGui, QtWidgets
@@ -9,27 +13,54 @@ from vidharvester.download.worker import DownloadWorker, DownloadOptions
 from vidharvester.database.manager import DatabaseManager
 from vidharvester.gui.settings_dialog import SettingsDialog
 from vidharvester.gui.system_tray import SystemTrayManager
+from vidharvester.capture.capture_store import CaptureWriter, max_captures
+from vidharvester.capture.manifest import ManifestError, inspect, manifest_protocol
 from vidharvester.capture.proxy_controller import ProxyController
 from vidharvester.download.queue_runner import QueueRunner
+from vidharvester.download.bulk import default_queue_item, read_import_file
+from vidharvester.download.dedup import (
+    POLICY_FORCE,
+    POLICY_LINK,
+    duplicate_policy,
+    link_existing,
+)
+from vidharvester.download.diskspace import min_free_bytes
+from vidharvester.download.metadata import METADATA, probe_many
+from vidharvester.download.metrics import record_job_metrics
+from vidharvester.download.progress import progress_rate
+from vidharvester.download.scratch import scratch_settings
 from vidharvester.gui.theme_manager import ThemeManager
 from vidharvester.gui.animated_progress import AnimatedProgressBar
-
-
-def human_size(n_bytes: Optional[float]) -> str:
-    if n_bytes is None:
-        return "?"
-    units = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    v = float(n_bytes)
-    while v >= 1024 and i < len(units) - 1:
-        v /= 1024.0
-        i += 1
-    if i == 0:
-        return f"{int(v)} {units[i]}"
-    return f"{v:.1f} {units[i]}"
+from vidharvester.gui.captures_model import CapturesTableModel
+from vidharvester.gui.formats_dialog import FormatsDialog
+from vidharvester.gui.history_model import HistoryTableModel
+from vidharvester.gui.queue_model import QueueTableModel
+from vidharvester.utils.formatting import human_size
+from vidharvester.utils.log_pipeline import (
+    NO_JOB,
+    RING_SIZE,
+    LogEntry,
+    LogPipeline,
+    logs_dir,
+)
+from vidharvester.utils.profiling import dump_thread_stacks, profile_mode
+
+
+# The log view takes new lines about 30 times a second, in one edit per tick
+LOG_DRAIN_MS = 33
+LOG_VIEW_LINES = 5000
+LOG_JOB_CHOICES = 200
+# At most one "URLs captured" tray notification this often
+CAPTURE_NOTIFY_SECONDS = 10.0
 
 
 class MainWindow(QtWidgets.QMainWindow):
+    # Emitted from the capture writer thread after each stored batch, with the number
+    # of new URLs
+    captures_stored = QtCore.pyqtSignal(int)
+    # Emitted from Get Info threads once a captured manifest's summary is stored
+    capture_inspected = QtCore.pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("VidHarvester")
@@ -38,16 +69,32 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.worker: Optional[DownloadWorker] = None
         self.db = DatabaseManager()
+        self.log_pipeline = LogPipeline()
+        self._log_history: deque = deque(maxlen=RING_SIZE)
+        self._log_filter: Optional[str] = None
+        self._direct_ids = itertools.count(1)
+        self._capture_notified_at = 0.0
 
         self._build_ui()
         self.tray = SystemTrayManager(self)
         self.proxy = ProxyController()
         self.tray.toggle_capture_action.triggered.connect(self.on_toggle_proxy)
         self.tray.quit_action.triggered.connect(self.close)
-        self.queue_runner = QueueRunner(self.db, self)
-        self.queue_runner.log.connect(self.append_log)
-        self.queue_runner.started.connect(lambda qid: self._refresh_queue_ui())
-        self.queue_runner.finished.connect(lambda qid, ok: (self._refresh_queue_ui(), self._refresh_history_ui()))
+        self.queue_runner = QueueRunner(self.db, self, log_pipeline=self.log_pipeline)
+        self.queue_runner.started.connect(
+            lambda qid: self.queue_model.refresh_rows([qid])
+        )
+        self.queue_runner.finished.connect(
+            lambda qid, ok: (
+                self.queue_model.refresh_rows([qid]),
+                self._refresh_history_ui(),
+            )
+        )
+        self.queue_runner.progress.connect(self.queue_model.update_progress)
+        self.captures_stored.connect(self._on_captures_stored)
+        self.capture_inspected.connect(self.captured_model.refresh_capture)
+        self.capture_writer = CaptureWriter(self.db, on_batch=self.captures_stored.emit)
+        self.queue_runner.queued.connect(lambda count: self.queue_model.refresh_total())
 
         self.apply_theme()
         self._refresh_queue_ui()
@@ -102,6 +149,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.embed_subs_cb = QtWidgets.QCheckBox("Embed Subtitles")
         self.embed_thumb_cb = QtWidgets.QCheckBox("Embed Thumbnail")
+        self.playlist_cb = QtWidgets.QCheckBox("Whole Playlist")
+        self.playlist_cb.setToolTip("Queue every video of a playlist or channel URL.")
 
         options_layout.addWidget(QtWidgets.QLabel("Mode:"))
         options_layout.addWidget(self.mode_combo)
@@ -112,6 +161,7 @@ class MainWindow(QtWidgets.QMainWindow):
         options_layout.addWidget(self.cookies_btn)
         options_layout.addWidget(self.embed_subs_cb)
         options_layout.addWidget(self.embed_thumb_cb)
+        options_layout.addWidget(self.playlist_cb)
         options_layout.addStretch()
 
         # Update format combo when mode changes
@@ -132,30 +182,119 @@ class MainWindow(QtWidgets.QMainWindow):
         # Main content tabs
         self.tabs = QtWidgets.QTabWidget()
 
-        # Captured URLs tab
-        self.captured_list = QtWidgets.QListWidget()
-        self.captured_list.itemDoubleClicked.connect(self.on_captured_item_clicked)
-        self.tabs.addTab(self.captured_list, "Captured")
+        # Captured URLs tab: persisted by the capture writer, loaded a page at a time
+        captured_tab = QtWidgets.QWidget()
+        captured_layout = QtWidgets.QVBoxLayout(captured_tab)
+        captured_layout.setContentsMargins(0, 0, 0, 0)
+        captured_bar = QtWidgets.QHBoxLayout()
+        enqueue_captured_btn = QtWidgets.QPushButton("Enqueue Selected")
+        enqueue_captured_btn.clicked.connect(self.enqueue_selected_captures)
+        delete_captured_btn = QtWidgets.QPushButton("Delete Selected")
+        delete_captured_btn.clicked.connect(self.delete_selected_captures)
+        self.captured_count_label = QtWidgets.QLabel()
+        captured_bar.addWidget(enqueue_captured_btn)
+        captured_bar.addWidget(delete_captured_btn)
+        captured_bar.addStretch(1)
+        captured_bar.addWidget(self.captured_count_label)
+        self.captured_model = CapturesTableModel(self.db, max_captures(self.db), self)
+        self.captured_table = QtWidgets.QTableView()
+        self.captured_table.setModel(self.captured_model)
+        self.captured_table.setSelectionBehavior(
+            QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.captured_table.verticalHeader().setDefaultSectionSize(22)
+        self.captured_table.horizontalHeader().setStretchLastSection(True)
+        self.captured_table.setContextMenuPolicy(
+            QtCore.Qt.ContextMenuPolicy.CustomContextMenu
+        )
+        self.captured_table.customContextMenuRequested.connect(self._show_captured_menu)
+        self.captured_table.doubleClicked.connect(self.on_captured_item_clicked)
+        captured_layout.addLayout(captured_bar)
+        captured_layout.addWidget(self.captured_table)
+        self.tabs.addTab(captured_tab, "Captured")
+        self._update_captured_count()
 
         # Queue tab
-        self.queue_table = QtWidgets.QTableWidget()
-        self.queue_table.setColumnCount(6)
-        self.queue_table.setHorizontalHeaderLabels(["URL", "Status", "Progress", "Speed", "ETA", "Title"])
+        self.queue_model = QueueTableModel(self.db, self)
+        self.queue_table = QtWidgets.QTableView()
+        self.queue_table.setModel(self.queue_model)
+        self.queue_table.setSelectionBehavior(
+            QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.queue_table.verticalHeader().setDefaultSectionSize(22)
         self.queue_table.horizontalHeader().setStretchLastSection(True)
+        self.queue_table.setContextMenuPolicy(
+            QtCore.Qt.ContextMenuPolicy.CustomContextMenu
+        )
+        self.queue_table.customContextMenuRequested.connect(self._show_queue_menu)
         self.tabs.addTab(self.queue_table, "Queue")
 
         # History tab
-        self.history_table = QtWidgets.QTableWidget()
-        self.history_table.setColumnCount(5)
-        self.history_table.setHorizontalHeaderLabels(["Title", "URL", "Format", "Size", "Completed"])
-        self.history_table.horizontalHeader().setStretchLastSection(True)
-        self.tabs.addTab(self.history_table, "History")
+        history_tab = QtWidgets.QWidget()
+        history_layout = QtWidgets.QVBoxLayout(history_tab)
+        history_layout.setContentsMargins(0, 0, 0, 0)
+        self.history_search = QtWidgets.QLineEdit()
+        self.history_search.setPlaceholderText("Search history by title or URL...")
+        self.history_search.setClearButtonEnabled(True)
+        self._history_search_timer = QtCore.QTimer(self)
+        self._history_search_timer.setSingleShot(True)
+        self._history_search_timer.setInterval(200)
+        self._history_search_timer.timeout.connect(
+            lambda: self.history_model.set_query(self.history_search.text())
+        )
+        self.history_search.textChanged.connect(
+            lambda _: self._history_search_timer.start()
+        )
 
-        # Log tab
+        self.history_model = HistoryTableModel(self.db, self)
+        self.history_table = QtWidgets.QTableView()
+        self.history_table.setModel(self.history_model)
+        self.history_table.setSelectionBehavior(
+            QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.history_table.verticalHeader().setDefaultSectionSize(22)
+        self.history_table.horizontalHeader().setStretchLastSection(True)
+        history_layout.addWidget(self.history_search)
+        history_layout.addWidget(self.history_table)
+        self.tabs.addTab(history_tab, "History")
+
+        # Log tab: lines arrive through the log pipeline and are drained in batches
+        self.log_tab = QtWidgets.QWidget()
+        log_layout = QtWidgets.QVBoxLayout(self.log_tab)
+        log_layout.setContentsMargins(0, 0, 0, 0)
+        log_bar = QtWidgets.QHBoxLayout()
+        self.log_job_combo = QtWidgets.QComboBox()
+        self.log_job_combo.setEditable(True)
+        self.log_job_combo.setMinimumWidth(180)
+        self.log_job_combo.addItem("All jobs")
+        self.log_job_combo.setToolTip("Show one job's lines, e.g. queue-42")
+        self._log_filter_timer = QtCore.QTimer(self)
+        self._log_filter_timer.setSingleShot(True)
+        self._log_filter_timer.setInterval(200)
+        self._log_filter_timer.timeout.connect(self._apply_log_filter)
+        self.log_job_combo.currentTextChanged.connect(
+            lambda _: self._log_filter_timer.start()
+        )
+        open_logs_btn = QtWidgets.QPushButton("Open Log Folder")
+        open_logs_btn.clicked.connect(
+            lambda: QtGui.QDesktopServices.openUrl(
+                QtCore.QUrl.fromLocalFile(logs_dir())
+            )
+        )
+        log_bar.addWidget(QtWidgets.QLabel("Job:"))
+        log_bar.addWidget(self.log_job_combo)
+        log_bar.addStretch(1)
+        log_bar.addWidget(open_logs_btn)
         self.log_text = QtWidgets.QPlainTextEdit()
-        self.log_text.setMaximumBlockCount(1000)
+        self.log_text.setMaximumBlockCount(LOG_VIEW_LINES)
         self.log_text.setReadOnly(True)
-        self.tabs.addTab(self.log_text, "Log")
+        log_layout.addLayout(log_bar)
+        log_layout.addWidget(self.log_text)
+        self.tabs.addTab(self.log_tab, "Log")
+        self._log_timer = QtCore.QTimer(self)
+        self._log_timer.setInterval(LOG_DRAIN_MS)
+        self._log_timer.timeout.connect(self._drain_logs)
+        self._log_timer.start()
 
         # Add everything to main layout
         layout.addWidget(input_frame)
@@ -173,6 +312,8 @@ class MainWindow(QtWidgets.QMainWindow):
         file_menu = menubar.addMenu("&File")
         settings_action = file_menu.addAction("Settings...")
         settings_action.triggered.connect(self.show_settings)
+        import_action = file_menu.addAction("Import URLs...")
+        import_action.triggered.connect(self.on_import_urls)
         file_menu.addSeparator()
         exit_action = file_menu.addAction("Exit")
         exit_action.triggered.connect(self.close)
@@ -186,6 +327,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Help menu
         help_menu = menubar.addMenu("&Help")
+        stacks_action = help_menu.addAction("Dump Thread Stacks")
+        stacks_action.triggered.connect(self.dump_thread_stacks)
+        help_menu.addSeparator()
         about_action = help_menu.addAction("About")
         about_action.triggered.connect(self.show_about)
 
@@ -216,6 +360,16 @@ class MainWindow(QtWidgets.QMainWindow):
             "VidHarvester v0.1.0\n\nA comprehensive video downloading application with PyQt6 GUI, browser extension integration, and proxy-based video capture capabilities."
         )
 
+    def dump_thread_stacks(self):
+        """Write the stacks of all threads (e.g. a stuck download) to a file."""
+        try:
+            path = dump_thread_stacks()
+        except OSError as exc:
+            self.append_log(f"[error] Could not write thread stacks: {exc}")
+            return
+        self.append_log(f"[info] Thread stacks written to {path}")
+        self.status_label.setText("Thread stacks dumped.")
+
     def browse_cookies(self):
         path, _ = QtWidgets.QFileDialog.getOpenFileName(
             self, "Select Cookies File", "", "Text Files (*.txt);;All Files (*)"
@@ -228,18 +382,155 @@ class MainWindow(QtWidgets.QMainWindow):
             self.cookies_btn.setText("Browse Cookies...")
 
     def on_capture_received(self, payload: dict):
-        """Called when extension/proxy captures a URL."""
-        url = payload.get("url", "")
-        if url:
-            item = QtWidgets.QListWidgetItem(url)
-            self.captured_list.insertItem(0, item)
-            self.tabs.setCurrentWidget(self.captured_list)
-            self.tray.show_message("URL Captured", f"Captured: {url[:50]}...")
-
-    def on_captured_item_clicked(self, item):
+        """Called when extension/proxy captures a URL.
+
+        Safe from any thread, as it only queues the write.
+        """
+        self.capture_writer.add(payload)
+
+    def _on_captures_stored(self, added: int):
+        """A batch of captures was written: show it at the top of the Captured tab."""
+        self.captured_model.refresh_new()
+        self._update_captured_count()
+        now = time.monotonic()
+        if added and now - self._capture_notified_at >= CAPTURE_NOTIFY_SECONDS:
+            self._capture_notified_at = now
+            self.tray.show_message(
+                "URLs Captured", f"{added} new URL(s) in the Captured tab"
+            )
+
+    def _update_captured_count(self):
+        self.captured_count_label.setText(f"{self.db.count_captures()} captured")
+
+    def _selected_captures(self) -> list:
+        selected = self.captured_table.selectionModel().selectedRows()
+        rows = sorted({index.row() for index in selected})
+        role = QtCore.Qt.ItemDataRole.UserRole
+        return [self.captured_model.index(row, 0).data(role) for row in rows]
+
+    def on_captured_item_clicked(self, index):
         """Double-click on captured URL to load it."""
-        self.url_edit.setText(item.text())
-        self.tabs.setCurrentIndex(0)  # Switch to first tab
+        item = index.data(QtCore.Qt.ItemDataRole.UserRole)
+        if item:
+            self.url_edit.setText(item["url"])
+
+    def _show_captured_menu(self, pos):
+        captures = self._selected_captures()
+        if not captures:
+            return
+        menu = QtWidgets.QMenu(self)
+        menu.addAction("Enqueue Selected", self.enqueue_selected_captures)
+        if len(captures) == 1:
+            capture = captures[0]
+            menu.addAction("Load URL", lambda: self.url_edit.setText(capture["url"]))
+            if manifest_protocol(capture["url"], capture["content_type"]):
+                menu.addAction(
+                    "Show Streams...",
+                    lambda: self.show_formats([capture["url"]], capture["page_url"]),
+                )
+            menu.addAction(
+                "Copy URL",
+                lambda: QtWidgets.QApplication.clipboard().setText(captures[0]["url"]),
+            )
+        menu.addSeparator()
+        menu.addAction("Delete Selected", self.delete_selected_captures)
+        menu.exec(self.captured_table.viewport().mapToGlobal(pos))
+
+    def show_formats(self, urls: list, page_url: Optional[str] = None):
+        """Open the format browser and probe `urls` concurrently off the GUI thread.
+
+        HLS/DASH manifests are parsed directly, and the summary of a captured one is
+        stored for the Captured tab; other URLs go through yt-dlp into the shared
+        metadata cache, so downloading one of them right after skips extraction.
+        """
+        dialog = FormatsDialog("Get Info / Formats", self)
+        dialog.setAttribute(QtCore.Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.format_chosen.connect(self._use_chosen_format)
+        for url in urls:
+            dialog.add_source(url)
+        dialog.show()
+        cookies = self.cookies_path
+        headers = {"Referer": page_url} if page_url else None
+        signal = dialog.result_ready
+
+        def extract(url: str):
+            if not manifest_protocol(url):
+                return METADATA.extract(url, cookies)
+            try:
+                manifest = inspect(url, headers)
+            except ManifestError:
+                self._store_streams(url, "unavailable")
+                raise
+            self._store_streams(url, manifest.summary())
+            return manifest
+
+        def deliver(url: str, result):
+            try:
+                signal.emit(url, result)
+            except RuntimeError:
+                pass  # the dialog was closed before this URL finished
+
+        threading.Thread(
+            target=probe_many,
+            args=(urls, deliver, extract),
+            name="get-formats",
+            daemon=True,
+        ).start()
+
+    def _store_streams(self, url: str, summary: str):
+        """Show `summary` in the Captured tab row of `url`, if captured; any thread."""
+        try:
+            self.db.set_capture_streams(url, summary)
+        except Exception as exc:
+            self.log_pipeline.emit(f"[warn] Could not store the stream summary: {exc}")
+            return
+        self.capture_inspected.emit(url)
+
+    def _use_chosen_format(self, url: str, selector: str):
+        self.url_edit.setText(url)
+        self.use_format(selector)
+        self.append_log(f"[info] Using format {selector} for {url}")
+
+    def use_format(self, format_id: str):
+        """Download the next URL as `format_id`.
+
+        It is passed to the downloader as the quality expression.
+        """
+        if self.quality_combo.findText(format_id) < 0:
+            self.quality_combo.addItem(format_id)
+        self.quality_combo.setCurrentText(format_id)
+        if self.mode_combo.currentText().lower() != "video":
+            self.mode_combo.setCurrentText("Video")
+
+    def enqueue_selected_captures(self):
+        """Queue the selected captured URLs with the current options, off-thread."""
+        urls = [capture["url"] for capture in self._selected_captures()]
+        if not urls:
+            return
+        defaults = self._current_queue_options()
+        runner = self.queue_runner
+        log = self.log_pipeline.emit
+
+        def run():
+            try:
+                result = runner.enqueue(urls, defaults)
+            except Exception as exc:
+                log(f"[error] Could not queue captured URLs: {exc}")
+                return
+            log(
+                f"[queue] {result.queued} captured URL(s) queued, "
+                f"{result.skipped} already downloaded"
+            )
+
+        threading.Thread(target=run, name="enqueue-captures", daemon=True).start()
+
+    def delete_selected_captures(self):
+        ids = [capture["id"] for capture in self._selected_captures()]
+        if not ids:
+            return
+        self.db.delete_captures(ids)
+        self.captured_model.remove_ids(ids)
+        self._update_captured_count()
 
     def on_get_formats(self):
         """Get available formats for the URL."""
@@ -248,10 +539,9 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Warning", "Please enter a URL first.")
             return
 
-        self.append_log(f"[info] Getting formats for: {url}")
-        # This would typically show a dialog with available formats
-        # For now, just log the action
-        QtWidgets.QMessageBox.information(self, "Info", "Format detection would be implemented here.")
+        urls = list(dict.fromkeys(url.split()))
+        self.append_log(f"[info] Getting formats for: {', '.join(urls)}")
+        self.show_formats(urls)
 
     def on_download(self):
         """Start download."""
@@ -260,6 +550,10 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.warning(self, "Warning", "Please enter a URL first.")
             return
 
+        if self.playlist_cb.isChecked():
+            self._queue_playlist(url)
+            return
+
         if self.worker and self.worker.isRunning():
             QtWidgets.QMessageBox.warning(self, "Warning", "A download is already in progress.")
             return
@@ -271,6 +565,13 @@ class MainWindow(QtWidgets.QMainWindow):
                 QtCore.QStandardPaths.StandardLocation.DownloadLocation
             )[0]
 
+        policy = duplicate_policy(self.db)
+        if policy != POLICY_FORCE and self._handle_known_duplicate(
+            url, output_dir, policy
+        ):
+            return
+
+        scratch_dir, scratch_limit = scratch_settings(self.db)
         options = DownloadOptions(
             output_directory=output_dir,
             mode=self.mode_combo.currentText().lower(),
@@ -279,12 +580,25 @@ class MainWindow(QtWidgets.QMainWindow):
             filename_template="%(title)s.%(ext)s",
             embed_subtitles=self.embed_subs_cb.isChecked(),
             embed_thumbnail=self.embed_thumb_cb.isChecked(),
-            cookies_file=self.cookies_path
+            cookies_file=self.cookies_path,
+            duplicate_policy=policy,
+            progress_rate_hz=progress_rate(self.db),
+            profile_mode=profile_mode(self.db),
+            min_free_bytes=min_free_bytes(self.db),
+            scratch_directory=scratch_dir,
+            scratch_limit_bytes=scratch_limit,
+            job_label=f"direct-{next(self._direct_ids)}",
         )
 
-        self.worker = DownloadWorker(url, options)
+        self.worker = DownloadWorker(
+            url,
+            options,
+            db=self.db,
+            on_log=lambda message, job=options.job_label: self.log_pipeline.emit(
+                message, job
+            ),
+        )
         self.worker.progress_signal.connect(self.on_progress)
-        self.worker.log_signal.connect(self.append_log)
         self.worker.finished_signal.connect(self.on_download_finished)
 
         self.download_btn.setEnabled(False)
@@ -293,7 +607,160 @@ class MainWindow(QtWidgets.QMainWindow):
         self.status_label.setText("Starting download...")
 
         self.worker.start()
-        self.tabs.setCurrentWidget(self.log_text)
+        self.tabs.setCurrentWidget(self.log_tab)
+
+    def _show_queue_menu(self, pos):
+        selected = self.queue_table.selectionModel().selectedRows()
+        rows = sorted({index.row() for index in selected})
+        qids = [qid for qid in map(self.queue_model.queue_id, rows) if qid is not None]
+        if not qids:
+            return
+        menu = QtWidgets.QMenu(self)
+        menu.addAction("Move to Top", lambda: self._reprioritize(qids, "top"))
+        menu.addAction("Raise Priority", lambda: self._reprioritize(qids, "up"))
+        menu.addAction("Lower Priority", lambda: self._reprioritize(qids, "down"))
+        menu.addAction("Move to Bottom", lambda: self._reprioritize(qids, "bottom"))
+        menu.addSeparator()
+        menu.addAction("Retry Now", lambda: self._retry_now(qids))
+        if len(qids) == 1:
+            menu.addAction("Show Attempts...", lambda: self._show_attempts(qids[0]))
+            menu.addAction("Show Log", lambda: self.show_job_log(f"queue-{qids[0]}"))
+        menu.exec(self.queue_table.viewport().mapToGlobal(pos))
+
+    def _reprioritize(self, qids: list, where: str):
+        """Change the priority of queue items, as read by the scheduling policy."""
+        lowest, highest = self.db.queue_priority_bounds()
+        if where in ("top", "bottom"):
+            self.db.set_queue_priority(
+                qids, highest + 1 if where == "top" else lowest - 1
+            )
+        else:
+            step = 1 if where == "up" else -1
+            for row in self.db.fetch_queue_items(qids):
+                self.db.set_queue_priority([row["id"]], row["priority"] + step)
+        self.queue_model.refresh_rows(qids)
+        self.queue_runner.scheduler.wake()
+
+    def _retry_now(self, qids: list):
+        self.db.retry_queue_items(qids)
+        self.queue_model.refresh_rows(qids)
+        self.queue_runner.scheduler.wake()
+
+    def _show_attempts(self, qid: int):
+        attempts = self.db.fetch_queue_attempts(qid)
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle(f"Attempts for queue item {qid}")
+        dialog.resize(760, 300)
+        table = QtWidgets.QTableWidget(len(attempts), 5, dialog)
+        table.setHorizontalHeaderLabels(
+            ["Started (UTC)", "Finished (UTC)", "Outcome", "Class", "Error"]
+        )
+        table.horizontalHeader().setStretchLastSection(True)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        for row, attempt in enumerate(attempts):
+            values = [
+                (attempt["started_at"] or "")[:19],
+                attempt["finished_at"][:19],
+                attempt["outcome"],
+                attempt["failure_class"] or "",
+                attempt["error"] or "",
+            ]
+            for column, value in enumerate(values):
+                table.setItem(row, column, QtWidgets.QTableWidgetItem(value))
+        layout = QtWidgets.QVBoxLayout(dialog)
+        layout.addWidget(table)
+        dialog.exec()
+
+    def _current_queue_options(self) -> dict:
+        output_dir = self.db.get_setting("output_directory", "")
+        if not output_dir:
+            output_dir = QtCore.QStandardPaths.standardLocations(
+                QtCore.QStandardPaths.StandardLocation.DownloadLocation
+            )[0]
+        return {
+            "mode": self.mode_combo.currentText().lower(),
+            "format": self.format_combo.currentText(),
+            "quality": self.quality_combo.currentText(),
+            "output_dir": output_dir,
+            "filename_template": "%(title)s.%(ext)s",
+        }
+
+    def on_import_urls(self):
+        """Queue every URL of a text file or CSV file.
+
+        Text files hold one URL per line; CSV files a url column plus options.
+        """
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Import URLs", "", "URL Lists (*.txt *.csv);;All Files (*)"
+        )
+        if not path:
+            return
+        defaults = self._current_queue_options()
+        runner = self.queue_runner
+        log = self.log_pipeline.emit
+
+        def run():
+            try:
+                result = runner.enqueue(read_import_file(path), defaults)
+            except Exception as exc:
+                log(f"[error] Could not import {path}: {exc}")
+                return
+            log(
+                f"[import] {os.path.basename(path)}: {result.queued} queued, "
+                f"{result.skipped} already downloaded, {len(result.errors)} invalid"
+            )
+            for index, message in result.errors[:20]:
+                log(f"[import] entry {index + 1}: {message}")
+
+        threading.Thread(target=run, name="import-urls", daemon=True).start()
+        self.append_log(f"[import] Reading {path}")
+        self.tabs.setCurrentWidget(self.queue_table)
+
+    def enqueue_items(self, raws: list, defaults: dict) -> dict:
+        """POST /queue handler; runs on the capture server thread, so no widgets."""
+        result = self.queue_runner.enqueue(
+            raws, dict(default_queue_item(self.db), **defaults)
+        )
+        self.log_pipeline.emit(
+            f"[queue] {result.queued} item(s) added via API, "
+            f"{result.skipped} already downloaded"
+        )
+        return {
+            "queued": result.queued,
+            "skipped": result.skipped,
+            "errors": result.errors,
+        }
+
+    def _queue_playlist(self, url: str):
+        """Expand a playlist/channel into the queue; entries download as they arrive."""
+        item = dict(self._current_queue_options(), cookies_file=self.cookies_path)
+        self.queue_runner.expand_playlist(url, item)
+        self.append_log(f"[playlist] Listing entries of {url}")
+        self.status_label.setText("Queueing playlist entries...")
+        self.tabs.setCurrentWidget(self.queue_table)
+
+    def _handle_known_duplicate(self, url: str, output_dir: str, policy: str) -> bool:
+        """Apply the duplicate policy at enqueue time.
+
+        Returns True when no download is needed.
+        """
+        existing = self.db.find_duplicate(url)
+        if existing is None:
+            return False
+        if policy == POLICY_LINK:
+            path = link_existing(existing["output_path"], output_dir)
+            if path is None:
+                self.append_log("[dedup] Previous file is missing; downloading again.")
+                return False
+            self.append_log(f"[dedup] Linked existing download: {path}")
+            self.status_label.setText("Linked to existing file.")
+            return True
+        self.append_log(
+            f"[dedup] Already downloaded on {existing['completed_at']}: "
+            f"{existing['output_path']}"
+        )
+        self.status_label.setText("Already downloaded; skipped.")
+        return True
 
     def on_pause(self):
         """Pause/stop download."""
@@ -332,16 +799,30 @@ class MainWindow(QtWidgets.QMainWindow):
         self.download_btn.setEnabled(True)
         self.pause_btn.setEnabled(False)
         self.progress_bar.setAnimated(False)
-        
+        worker = self.worker
+
         if success:
             self.progress_bar.setValue(100)
             self.status_label.setText("Download completed!")
             self.append_log(f"[success] {message}")
+            if worker is not None and worker.dedup_action != "skipped":
+                self.db.add_history(
+                    worker.url,
+                    worker.last_filename,
+                    worker.last_title,
+                    worker.last_format,
+                    worker.last_size,
+                    "direct",
+                    worker.last_extractor_key,
+                    worker.last_video_id,
+                )
         else:
             self.progress_bar.setValue(0)
             self.status_label.setText("Download failed!")
             self.append_log(f"[error] {message}")
 
+        if worker is not None:
+            record_job_metrics(self.db, None, worker.url, success, worker.metrics)
         self.worker = None
         self._refresh_history_ui()
 
@@ -361,48 +842,52 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def append_log(self, message: str):
         """Add message to log."""
-        self.log_text.appendPlainText(message)
+        self.log_pipeline.emit(message)
+
+    @staticmethod
+    def _format_log(entry: LogEntry) -> str:
+        return entry.text if entry.job == NO_JOB else f"[{entry.job}] {entry.text}"
+
+    def _drain_logs(self):
+        """Append everything logged since the last tick in one edit."""
+        entries = self.log_pipeline.drain()
+        if not entries:
+            return
+        self._log_history.extend(entries)
+        for entry in entries:
+            if entry.job != NO_JOB and self.log_job_combo.findText(entry.job) < 0:
+                self.log_job_combo.insertItem(1, entry.job)
+                if self.log_job_combo.count() > LOG_JOB_CHOICES:
+                    self.log_job_combo.removeItem(self.log_job_combo.count() - 1)
+        lines = [
+            self._format_log(e) for e in entries if self._log_filter in (None, e.job)
+        ]
+        if lines:
+            self.log_text.appendPlainText("\n".join(lines))
+
+    def _apply_log_filter(self):
+        text = self.log_job_combo.currentText().strip()
+        self._log_filter = None if text in ("", "All jobs") else text
+        matching = [e for e in self._log_history if self._log_filter in (None, e.job)]
+        self.log_text.setPlainText(
+            "\n".join(self._format_log(e) for e in matching[-LOG_VIEW_LINES:])
+        )
+        self.log_text.moveCursor(QtGui.QTextCursor.MoveOperation.End)
+
+    def show_job_log(self, job: str):
+        """Switch to the Log tab showing only `job`'s lines."""
+        self._drain_logs()
+        self.log_job_combo.setCurrentText(job)
+        self._apply_log_filter()
+        self.tabs.setCurrentWidget(self.log_tab)
 
     def _refresh_queue_ui(self):
-        """Refresh the queue table."""
-        queue_items = self.db.fetch_queue()
-        self.queue_table.setRowCount(len(queue_items))
-        
-        for row, item in enumerate(queue_items):
-            self.queue_table.setItem(row, 0, QtWidgets.QTableWidgetItem(item["url"][:50] + "..."))
-            self.queue_table.setItem(row, 1, QtWidgets.QTableWidgetItem(item["status"]))
-            
-            progress = item["progress"]
-            progress_text = f"{progress:.1f}%" if progress else "-"
-            self.queue_table.setItem(row, 2, QtWidgets.QTableWidgetItem(progress_text))
-            
-            speed = item["speed"]
-            speed_text = f"{human_size(speed)}/s" if speed else "-"
-            self.queue_table.setItem(row, 3, QtWidgets.QTableWidgetItem(speed_text))
-            
-            eta = item["eta"]
-            eta_text = f"{eta}s" if eta else "-"
-            self.queue_table.setItem(row, 4, QtWidgets.QTableWidgetItem(eta_text))
-            
-            title = item["title"] or "Unknown"
-            self.queue_table.setItem(row, 5, QtWidgets.QTableWidgetItem(title))
+        """Reload the queue view from the first page."""
+        self.queue_model.reload()
 
     def _refresh_history_ui(self):
-        """Refresh the history table."""
-        history_items = self.db.fetch_history()
-        self.history_table.setRowCount(len(history_items))
-        
-        for row, item in enumerate(history_items):
-            title = item["title"] or "Unknown"
-            self.history_table.setItem(row, 0, QtWidgets.QTableWidgetItem(title))
-            self.history_table.setItem(row, 1, QtWidgets.QTableWidgetItem(item["url"][:50] + "..."))
-            self.history_table.setItem(row, 2, QtWidgets.QTableWidgetItem(item["format"] or "-"))
-            
-            size = item["size_bytes"]
-            size_text = human_size(size) if size else "-"
-            self.history_table.setItem(row, 3, QtWidgets.QTableWidgetItem(size_text))
-            
-            self.history_table.setItem(row, 4, QtWidgets.QTableWidgetItem(item["completed_at"]))
+        """Reload the history view (keeping the current search)."""
+        self.history_model.reload()
 
     def dragEnterEvent(self, event):
         """Handle drag enter for URLs."""
@@ -432,5 +917,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
         if self.proxy.is_running():
             self.proxy.stop()
-        
+
+        # Interrupted queue items go back to pending and release their leases
+        self.queue_runner.stop()
+        self.capture_writer.close()
+        self.log_pipeline.close()
         super().closeEvent(event)
\ No newline at end of file
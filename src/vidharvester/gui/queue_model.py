@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from PyQt6 import QtCore
+
+from vidharvester.database.manager import DatabaseManager
+from vidharvester.utils.formatting import human_size
+
+
+COLUMNS = ["URL", "Status", "Priority", "Progress", "Speed", "ETA", "Title"]
+COL_PRIORITY, COL_PROGRESS, COL_SPEED, COL_ETA = 2, 3, 4, 5
+
+
+def _local_time(utc_iso: str) -> str:
+    try:
+        moment = datetime.fromisoformat(utc_iso).replace(tzinfo=timezone.utc)
+        return moment.astimezone().strftime("%H:%M:%S")
+    except ValueError:
+        return utc_iso
+
+
+class QueueTableModel(QtCore.QAbstractTableModel):
+    """Lazily paged model over the `queue` table.
+
+    Rows are fetched in pages as the view scrolls. Changes are applied per queue id:
+    `refresh_rows` re-reads only the given items and `update_progress` touches just
+    the progress, speed and ETA cells of a running item.
+    """
+
+    PAGE_SIZE = 200
+
+    def __init__(self, db: DatabaseManager, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self._rows: List[Dict[str, Any]] = []
+        self._index: Dict[int, int] = {}  # queue id -> row number
+        self._total = 0
+
+    # Qt model API
+    def rowCount(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(  # noqa: N802
+        self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole
+    ):
+        if (
+            role == QtCore.Qt.ItemDataRole.DisplayRole
+            and orientation == QtCore.Qt.Orientation.Horizontal
+        ):
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self._rows[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self._display(item, index.column())
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole and index.column() == 0:
+            return item["url"]
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return item["id"]
+        return None
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        return not parent.isValid() and len(self._rows) < self._total
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):  # noqa: N802
+        if parent.isValid():
+            return
+        after_id = self._rows[-1]["id"] if self._rows else 0
+        page = [dict(r) for r in self.db.fetch_queue_page(after_id, self.PAGE_SIZE)]
+        if not page:
+            self._total = len(self._rows)
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(page) - 1)
+        for offset, item in enumerate(page):
+            self._index[item["id"]] = first + offset
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    # Incremental updates
+    def reload(self) -> None:
+        """Drop loaded rows and start paging from the beginning."""
+        self.beginResetModel()
+        self._rows.clear()
+        self._index.clear()
+        self._total = self.db.count_queue()
+        self.endResetModel()
+
+    def refresh_total(self) -> None:
+        """Pick up rows appended elsewhere (e.g. by playlists); they page in lazily."""
+        self._total = self.db.count_queue()
+        if len(self._rows) < self.PAGE_SIZE and self.canFetchMore():
+            # The view only asks for more when scrolled; fill a short table now
+            self.fetchMore()
+
+    def queue_id(self, row: int) -> Optional[int]:
+        return self._rows[row]["id"] if 0 <= row < len(self._rows) else None
+
+    def refresh_rows(self, qids: Iterable[int]) -> None:
+        """Re-read the given queue items and apply them as row-level diffs."""
+        qids = set(qids)
+        fresh = {int(r["id"]): dict(r) for r in self.db.fetch_queue_items(qids)}
+        for qid in sorted(qids, reverse=True):
+            row = self._index.get(qid)
+            if row is None:
+                continue
+            if qid in fresh:
+                self._rows[row] = fresh[qid]
+                self.dataChanged.emit(
+                    self.index(row, 0), self.index(row, len(COLUMNS) - 1)
+                )
+            else:
+                self._remove_row(row)
+        for qid in sorted(q for q in fresh if q not in self._index):
+            loaded_all = len(self._rows) >= self._total
+            self._total += 1
+            if loaded_all:
+                # Ids only grow, so a new item belongs at the end; when the window is
+                # still partial, fetchMore picks it up instead.
+                self._append(fresh[qid])
+
+    def update_progress(self, qid: int, d: Dict[str, Any]) -> None:
+        row = self._index.get(qid)
+        if row is None:
+            return
+        item = self._rows[row]
+        item["progress"] = d.get("percent")
+        item["speed"] = d.get("speed")
+        item["eta"] = d.get("eta")
+        self.dataChanged.emit(self.index(row, COL_PROGRESS), self.index(row, COL_ETA))
+
+    def _append(self, item: Dict[str, Any]) -> None:
+        row = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._rows.append(item)
+        self._index[item["id"]] = row
+        self.endInsertRows()
+
+    def _remove_row(self, row: int) -> None:
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        item = self._rows.pop(row)
+        self.endRemoveRows()
+        self._index.pop(item["id"], None)
+        for i in range(row, len(self._rows)):
+            self._index[self._rows[i]["id"]] = i
+        self._total -= 1
+
+    @staticmethod
+    def _display(item: Dict[str, Any], column: int) -> str:
+        if column == 0:
+            url = item["url"]
+            return url if len(url) <= 50 else url[:50] + "..."
+        if column == 1:
+            if item["status"] == "retrying" and item["failure_class"] == "disk_space":
+                due = _local_time(item["next_attempt_at"])
+                return f"waiting for disk space ({due})"
+            if item["status"] == "retrying" and item["next_attempt_at"]:
+                return f"retrying at {_local_time(item['next_attempt_at'])}"
+            if item["attempts"] and item["status"] == "failed":
+                return f"failed ({item['failure_class'] or 'error'})"
+            return item["status"]
+        if column == COL_PRIORITY:
+            return str(item["priority"])
+        if column == COL_PROGRESS:
+            progress = item["progress"]
+            return f"{progress:.1f}%" if progress else "-"
+        if column == COL_SPEED:
+            speed = item["speed"]
+            return f"{human_size(speed)}/s" if speed else "-"
+        if column == COL_ETA:
+            eta = item["eta"]
+            return f"{eta}s" if eta else "-"
+        return item["title"] or "Unknown"
@@ -2,7 +2,49 @@ from __future__ import annotations
 
 from PyQt6 import QtCore, QtWidgets
 
+from vidharvester.capture.capture_store import max_captures
 from vidharvester.database.manager import DatabaseManager
+from vidharvester.download.bulk import api_token
+from vidharvester.download.dedup import DUPLICATE_POLICIES, duplicate_policy
+from vidharvester.download.diskspace import min_free_bytes
+from vidharvester.download.governor import (
+    SLOT_BROWSER,
+    SLOT_JOBS,
+    SLOT_POSTPROCESS,
+    governor_bounds,
+    governor_enabled,
+)
+from vidharvester.download.process_pool import EXECUTION_MODES, execution_mode
+from vidharvester.download.progress import progress_rate
+from vidharvester.download.retry import max_attempts
+from vidharvester.download.scratch import scratch_settings
+from vidharvester.download.scheduler import SCHEDULING_POLICIES, scheduling_policy
+from vidharvester.utils.profiling import PROFILE_MODES, profile_mode
+
+
+_POLICY_LABELS = {
+    "skip": "Skip",
+    "link": "Link to existing file",
+    "force": "Download again",
+}
+
+_EXECUTION_LABELS = {
+    "thread": "Threads (default)",
+    "process": "Separate processes",
+}
+
+_SCHEDULING_LABELS = {
+    "fifo": "First in, first out",
+    "priority_aging": "Priority (waiting items gain priority)",
+    "shortest_first": "Smallest estimated size first",
+}
+
+_PROFILE_LABELS = {
+    "off": "Off",
+    "cprofile": "cProfile (function timings)",
+    "tracemalloc": "tracemalloc (allocations)",
+    "sampling": "Sampled stacks",
+}
 
 
 class SettingsDialog(QtWidgets.QDialog):
@@ -32,6 +74,30 @@ class SettingsDialog(QtWidgets.QDialog):
         folder_row.addWidget(self.folder_edit)
         folder_row.addWidget(folder_browse)
         folder_layout.addLayout(folder_row)
+
+        scratch_form = QtWidgets.QFormLayout()
+        scratch_row = QtWidgets.QHBoxLayout()
+        self.scratch_edit = QtWidgets.QLineEdit()
+        self.scratch_edit.setPlaceholderText("None (write into the output folder)")
+        self.scratch_edit.setToolTip(
+            "Fragments, partial files and merges are written here (e.g. a local SSD) "
+            "and the finished file is moved to the output folder."
+        )
+        scratch_browse = QtWidgets.QPushButton("Browse...")
+        scratch_browse.clicked.connect(self._browse_scratch)
+        scratch_row.addWidget(self.scratch_edit)
+        scratch_row.addWidget(scratch_browse)
+        scratch_form.addRow("Scratch folder:", scratch_row)
+        self.scratch_limit_spin = QtWidgets.QSpinBox()
+        self.scratch_limit_spin.setRange(0, 1024 * 1024)
+        self.scratch_limit_spin.setSingleStep(1024)
+        self.scratch_limit_spin.setSuffix(" MB")
+        self.scratch_limit_spin.setSpecialValueText("No limit")
+        self.scratch_limit_spin.setToolTip(
+            "Downloads that would exceed it write into the output folder instead."
+        )
+        scratch_form.addRow("Scratch limit:", self.scratch_limit_spin)
+        folder_layout.addLayout(scratch_form)
         
         # Max concurrent downloads
         concurrent_group = QtWidgets.QGroupBox("Downloads")
@@ -42,6 +108,89 @@ class SettingsDialog(QtWidgets.QDialog):
         self.concurrent_spin.setMaximum(10)
         self.concurrent_spin.setValue(2)
         concurrent_layout.addRow("Max concurrent downloads:", self.concurrent_spin)
+
+        self.governor_cb = QtWidgets.QCheckBox(
+            "Adapt to CPU, memory, disk and network load"
+        )
+        self.governor_cb.setToolTip(
+            "Runs fewer downloads, conversions and browser captures at once while the "
+            "system is under pressure, within the limits below."
+        )
+        concurrent_layout.addRow("", self.governor_cb)
+        self.min_concurrent_spin = QtWidgets.QSpinBox()
+        self.min_concurrent_spin.setRange(1, 10)
+        concurrent_layout.addRow("Min concurrent downloads:", self.min_concurrent_spin)
+        self.max_postprocess_spin = QtWidgets.QSpinBox()
+        self.max_postprocess_spin.setRange(1, 32)
+        concurrent_layout.addRow(
+            "Max concurrent conversions:", self.max_postprocess_spin
+        )
+        self.max_browser_spin = QtWidgets.QSpinBox()
+        self.max_browser_spin.setRange(1, 10)
+        concurrent_layout.addRow("Max headless browser pages:", self.max_browser_spin)
+
+        self.duplicate_combo = QtWidgets.QComboBox()
+        for policy in DUPLICATE_POLICIES:
+            self.duplicate_combo.addItem(_POLICY_LABELS[policy], policy)
+        concurrent_layout.addRow("Already downloaded:", self.duplicate_combo)
+
+        self.progress_rate_spin = QtWidgets.QSpinBox()
+        self.progress_rate_spin.setRange(1, 30)
+        self.progress_rate_spin.setSuffix(" /s")
+        concurrent_layout.addRow(
+            "Progress updates per download:", self.progress_rate_spin
+        )
+
+        self.execution_combo = QtWidgets.QComboBox()
+        for mode in EXECUTION_MODES:
+            self.execution_combo.addItem(_EXECUTION_LABELS[mode], mode)
+        self.execution_combo.setToolTip(
+            "Separate processes keep heavy extractions from stalling the UI."
+        )
+        concurrent_layout.addRow("Run queued downloads in:", self.execution_combo)
+
+        self.scheduling_combo = QtWidgets.QComboBox()
+        for policy in SCHEDULING_POLICIES:
+            self.scheduling_combo.addItem(_SCHEDULING_LABELS[policy], policy)
+        concurrent_layout.addRow("Start queued items by:", self.scheduling_combo)
+
+        self.attempts_spin = QtWidgets.QSpinBox()
+        self.attempts_spin.setRange(1, 20)
+        self.attempts_spin.setToolTip(
+            "Network errors and rate limits are retried with growing delays."
+        )
+        concurrent_layout.addRow("Attempts per queued item:", self.attempts_spin)
+
+        self.min_free_spin = QtWidgets.QSpinBox()
+        self.min_free_spin.setRange(0, 1024 * 1024)
+        self.min_free_spin.setSingleStep(256)
+        self.min_free_spin.setSuffix(" MB")
+        self.min_free_spin.setToolTip(
+            "Downloads that would leave less free space wait until the disk has room."
+        )
+        concurrent_layout.addRow("Keep free on output disk:", self.min_free_spin)
+
+        self.profile_combo = QtWidgets.QComboBox()
+        for mode in PROFILE_MODES:
+            self.profile_combo.addItem(_PROFILE_LABELS[mode], mode)
+        self.profile_combo.setToolTip(
+            "Writes a profile per download to the profiles folder in the app data "
+            "directory."
+        )
+        concurrent_layout.addRow("Profile downloads:", self.profile_combo)
+        self.max_captures_spin = QtWidgets.QSpinBox()
+        self.max_captures_spin.setRange(100, 1_000_000)
+        self.max_captures_spin.setSingleStep(1000)
+        self.max_captures_spin.setToolTip(
+            "The least recently seen captured URLs are removed beyond this."
+        )
+        concurrent_layout.addRow("Captured URLs to keep:", self.max_captures_spin)
+        self.token_edit = QtWidgets.QLineEdit()
+        self.token_edit.setReadOnly(True)
+        self.token_edit.setToolTip(
+            "Send as 'Authorization: Bearer <token>' with POST /queue."
+        )
+        concurrent_layout.addRow("Queue API token:", self.token_edit)
         
         # Buttons
         button_box = QtWidgets.QDialogButtonBox(
@@ -62,6 +211,13 @@ class SettingsDialog(QtWidgets.QDialog):
         if folder:
             self.folder_edit.setText(folder)
             
+    def _browse_scratch(self):
+        folder = QtWidgets.QFileDialog.getExistingDirectory(
+            self, "Select Scratch Folder", self.scratch_edit.text()
+        )
+        if folder:
+            self.scratch_edit.setText(folder)
+
     def _load_settings(self):
         output_dir = self.db.get_setting("output_directory", "")
         if not output_dir:
@@ -69,11 +225,58 @@ class SettingsDialog(QtWidgets.QDialog):
                 QtCore.QStandardPaths.StandardLocation.DownloadLocation
             )[0]
         self.folder_edit.setText(output_dir)
+        scratch_dir, scratch_limit = scratch_settings(self.db)
+        self.scratch_edit.setText(scratch_dir or "")
+        self.scratch_limit_spin.setValue(scratch_limit // (1024 * 1024))
         
         max_concurrent = int(self.db.get_setting("max_concurrent_downloads", "2") or "2")
         self.concurrent_spin.setValue(max_concurrent)
+        bounds = governor_bounds(self.db, max_concurrent)
+        self.governor_cb.setChecked(governor_enabled(self.db))
+        self.min_concurrent_spin.setValue(bounds[SLOT_JOBS][0])
+        self.max_postprocess_spin.setValue(bounds[SLOT_POSTPROCESS][1])
+        self.max_browser_spin.setValue(bounds[SLOT_BROWSER][1])
+
+        index = self.duplicate_combo.findData(duplicate_policy(self.db))
+        self.duplicate_combo.setCurrentIndex(max(0, index))
+        self.progress_rate_spin.setValue(int(progress_rate(self.db)))
+        self.execution_combo.setCurrentIndex(
+            max(0, self.execution_combo.findData(execution_mode(self.db)))
+        )
+        self.attempts_spin.setValue(max_attempts(self.db))
+        self.min_free_spin.setValue(min_free_bytes(self.db) // (1024 * 1024))
+        self.scheduling_combo.setCurrentIndex(
+            max(0, self.scheduling_combo.findData(scheduling_policy(self.db)))
+        )
+        self.profile_combo.setCurrentIndex(
+            max(0, self.profile_combo.findData(profile_mode(self.db)))
+        )
+        self.max_captures_spin.setValue(max_captures(self.db))
+        self.token_edit.setText(api_token(self.db))
         
     def _save_and_accept(self):
         self.db.set_setting("output_directory", self.folder_edit.text())
-        self.db.set_setting("max_concurrent_downloads", str(self.concurrent_spin.value()))
+        self.db.set_setting("scratch_directory", self.scratch_edit.text().strip())
+        self.db.set_setting("scratch_limit_mb", str(self.scratch_limit_spin.value()))
+        self.db.set_setting(
+            "max_concurrent_downloads", str(self.concurrent_spin.value())
+        )
+        self.db.set_setting(
+            "governor_enabled", "1" if self.governor_cb.isChecked() else "0"
+        )
+        self.db.set_setting(
+            "min_concurrent_downloads", str(self.min_concurrent_spin.value())
+        )
+        self.db.set_setting(
+            "max_postprocess_tasks", str(self.max_postprocess_spin.value())
+        )
+        self.db.set_setting("max_browser_pages", str(self.max_browser_spin.value()))
+        self.db.set_setting("duplicate_policy", self.duplicate_combo.currentData())
+        self.db.set_setting("progress_rate_hz", str(self.progress_rate_spin.value()))
+        self.db.set_setting("execution_mode", self.execution_combo.currentData())
+        self.db.set_setting("scheduling_policy", self.scheduling_combo.currentData())
+        self.db.set_setting("max_attempts", str(self.attempts_spin.value()))
+        self.db.set_setting("min_free_space_mb", str(self.min_free_spin.value()))
+        self.db.set_setting("profile_mode", self.profile_combo.currentData())
+        self.db.set_setting("max_captures", str(self.max_captures_spin.value()))
         self.accept()
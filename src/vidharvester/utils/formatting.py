@@ -0,0 +1,16 @@
+from typing import Optional
+
+
+def human_size(n_bytes: Optional[float]) -> str:
+    """Format a byte count with a binary unit suffix (e.g. ``1.5 MB``)."""
+    if n_bytes is None:
+        return "?"
+    units = ["B", "KB", "MB", "GB", "TB"]
+    i = 0
+    v = float(n_bytes)
+    while v >= 1024 and i < len(units) - 1:
+        v /= 1024.0
+        i += 1
+    if i == 0:
+        return f"{int(v)} {units[i]}"
+    return f"{v:.1f} {units[i]}"
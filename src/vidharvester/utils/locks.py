@@ -0,0 +1,32 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterator, List
+
+
+class KeyedLocks:
+    """One lock per key, kept only while a caller holds or waits for it.
+
+    Callers after the same expensive result (e.g. one URL's metadata) take turns, so
+    the first computes it and the others find it cached. Unlike a dict of locks that
+    is cleared by whoever finishes, a key never has two locks at once, so two of
+    them never run concurrently.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, List] = {}  # key -> [lock, holders and waiters]
+
+    @contextmanager
+    def hold(self, key: Hashable) -> Iterator[None]:
+        """Hold `key`'s lock for the duration of the `with` block."""
+        with self._lock:
+            entry = self._entries.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._entries[key]
@@ -0,0 +1,86 @@
+import itertools
+import logging
+import os
+import queue
+import time
+from collections import deque
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import List, NamedTuple, Optional
+
+from vidharvester.utils.paths import app_data_dir
+
+
+NO_JOB = "-"
+
+RING_SIZE = 20_000
+LOG_FILE_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
+
+
+class LogEntry(NamedTuple):
+    seq: int
+    created: float
+    job: str  # e.g. "queue-42", "direct-3" or NO_JOB
+    text: str
+
+
+def logs_dir() -> str:
+    path = os.path.join(app_data_dir(), "logs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class LogPipeline:
+    """
+    Collects log lines from any thread without blocking on the reader or the disk.
+
+    `emit` appends to a bounded ring (a deque, whose appends are atomic) and hands a
+    record to a background thread that writes ``vidharvester.log`` in the logs
+    directory, rotated by size, one ``[job]``-tagged line per message. A reader such
+    as the GUI calls `drain` periodically to take everything new in one batch; when
+    it falls more than `ring_size` entries behind, the oldest are dropped from the
+    ring (they are still in the file).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ring_size: int = RING_SIZE,
+        max_bytes: int = LOG_FILE_BYTES,
+        backups: int = LOG_FILE_BACKUPS,
+    ):
+        self.path = path or os.path.join(logs_dir(), "vidharvester.log")
+        self._ring: deque = deque(maxlen=ring_size)
+        self._seq = itertools.count(1)
+        self._records: queue.SimpleQueue = queue.SimpleQueue()
+        handler = RotatingFileHandler(
+            self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s [%(job)s] %(message)s"))
+        self._listener = QueueListener(self._records, handler)
+        self._listener.start()
+
+    def emit(self, text: str, job: str = NO_JOB) -> None:
+        entry = LogEntry(next(self._seq), time.time(), job, text)
+        self._ring.append(entry)
+        record = logging.LogRecord(
+            "vidharvester.jobs", logging.INFO, "", 0, text, None, None
+        )
+        record.job = job
+        self._records.put(record)
+
+    def drain(self, limit: int = 5000) -> List[LogEntry]:
+        """Take up to `limit` entries not drained before, oldest first."""
+        entries = []
+        try:
+            while len(entries) < limit:
+                entries.append(self._ring.popleft())
+        except IndexError:
+            pass
+        return entries
+
+    def close(self) -> None:
+        """Write out pending records and stop the writer thread."""
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
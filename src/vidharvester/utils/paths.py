@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 
@@ -20,3 +21,13 @@ def resource_path(relative_path: str) -> Path:
         base_path = Path(__file__).parent.parent.parent.parent
     
     return base_path / relative_path
+
+
+def app_data_dir() -> str:
+    """Per-user data directory (database, profiles); created on first use."""
+    base = os.getenv("APPDATA") or os.path.join(
+        os.path.expanduser("~"), ".local", "share"
+    )
+    path = os.path.join(base, "VidHarvester")
+    os.makedirs(path, exist_ok=True)
+    return path
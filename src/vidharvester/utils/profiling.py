@@ -0,0 +1,183 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+from vidharvester.utils.logger import get_logger
+from vidharvester.utils.paths import app_data_dir
+
+
+PROFILE_OFF = "off"
+PROFILE_CPROFILE = "cprofile"
+PROFILE_TRACEMALLOC = "tracemalloc"
+PROFILE_SAMPLING = "sampling"
+PROFILE_MODES = (PROFILE_OFF, PROFILE_CPROFILE, PROFILE_TRACEMALLOC, PROFILE_SAMPLING)
+
+# Takes precedence over the `profile_mode` setting, e.g. for the headless daemon
+PROFILE_ENV = "VIDHARVESTER_PROFILE"
+
+SAMPLE_INTERVAL = 0.005
+
+_log = get_logger("profiling")
+
+# tracemalloc is process-wide; keep it running while any profiled block needs it
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def profile_mode(db: Any = None) -> str:
+    """Active profiling mode from the environment, else the `profile_mode` setting."""
+    mode = os.getenv(PROFILE_ENV)
+    if not mode and db is not None:
+        mode = db.get_setting("profile_mode", PROFILE_OFF)
+    mode = (mode or PROFILE_OFF).lower()
+    return mode if mode in PROFILE_MODES else PROFILE_OFF
+
+
+def profiles_dir() -> str:
+    path = os.path.join(app_data_dir(), "profiles")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _output_path(label: str, suffix: str) -> str:
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)
+    return os.path.join(profiles_dir(), f"{safe}-{stamp}{suffix}")
+
+
+@contextmanager
+def profiled(mode: str, label: str) -> Iterator[None]:
+    """
+    Profile the enclosed block on the calling thread and write the result to
+    the profiles directory as ``<label>-<timestamp>.<ext>``.
+
+    Args:
+        mode: one of `PROFILE_MODES`; "off" runs the block unchanged
+        label: file name prefix, e.g. ``queue-42``
+    """
+    if mode == PROFILE_CPROFILE:
+        with _cprofile(label):
+            yield
+    elif mode == PROFILE_TRACEMALLOC:
+        with _tracemalloc(label):
+            yield
+    elif mode == PROFILE_SAMPLING:
+        with _sampling(label):
+            yield
+    else:
+        yield
+
+
+@contextmanager
+def _cprofile(label: str) -> Iterator[None]:
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as exc:
+        # Python 3.12+ allows one active profiler per process
+        _log.warning("cProfile unavailable for %s: %s", label, exc)
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = _output_path(label, ".prof")
+        profiler.dump_stats(path)
+        with open(path[:-5] + ".txt", "w", encoding="utf-8") as fh:
+            pstats.Stats(profiler, stream=fh).sort_stats("cumulative").print_stats(60)
+        _log.info("Wrote profile %s", path)
+
+
+@contextmanager
+def _tracemalloc(label: str) -> Iterator[None]:
+    import tracemalloc
+
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+        _tracemalloc_users += 1
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        with _tracemalloc_lock:
+            _tracemalloc_users -= 1
+            if _tracemalloc_users == 0:
+                tracemalloc.stop()
+        path = _output_path(label, "-tracemalloc.txt")
+        with open(path, "w", encoding="utf-8") as fh:
+            # Other jobs running at the same time are included in the traces
+            fh.write(f"traced current={current} peak={peak} bytes\n\n")
+            for stat in after.compare_to(before, "lineno")[:50]:
+                fh.write(f"{stat}\n")
+        _log.info("Wrote allocation snapshot %s", path)
+
+
+@contextmanager
+def _sampling(label: str) -> Iterator[None]:
+    target = threading.get_ident()
+    stacks: Counter = Counter()
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                where = f"{os.path.basename(code.co_filename)}:{frame.f_lineno}"
+                names.append(f"{code.co_name} ({where})")
+                frame = frame.f_back
+            stacks[";".join(reversed(names))] += 1
+
+    sampler = threading.Thread(target=sample, name=f"sampler-{label}", daemon=True)
+    sampler.start()
+    try:
+        yield
+    finally:
+        done.set()
+        sampler.join()
+        # Collapsed-stack format, readable by flamegraph.pl and speedscope
+        path = _output_path(label, "-stacks.txt")
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        _log.info("Wrote %d stack samples to %s", sum(stacks.values()), path)
+
+
+def format_thread_stacks() -> str:
+    """Current stack of every live thread, named, as text."""
+    names = {t.ident: t.name for t in threading.enumerate()}
+    parts = []
+    for ident, frame in sys._current_frames().items():
+        parts.append(f'Thread "{names.get(ident, "?")}" ({ident}):\n')
+        parts.append("".join(traceback.format_stack(frame)))
+        parts.append("\n")
+    return "".join(parts)
+
+
+def dump_thread_stacks(path: Optional[str] = None) -> str:
+    """Write `format_thread_stacks()` to `path` and return the path.
+
+    `path` defaults to a new file in the profiles directory.
+    """
+    path = path or _output_path("threads", ".txt")
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(f"# {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        fh.write(format_thread_stacks())
+    return path
@@ -0,0 +1,69 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Query parameters that only track where a link was shared from.
+_TRACKING_PARAMS = {
+    "fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "si", "feature", "ref", "ref_src",
+}
+
+_HOST_PREFIXES = ("www.", "m.", "mobile.")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Reduce a URL to a canonical form for duplicate detection.
+
+    Lower-cases scheme and host, drops common host prefixes, fragments,
+    tracking parameters and trailing slashes, and sorts the query string.
+    `youtu.be/<id>` short links are expanded to the watch URL.
+
+    Args:
+        url: URL as pasted or captured
+
+    Returns:
+        Normalized URL (the stripped input if it cannot be parsed)
+    """
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    if not parts.scheme or not parts.netloc:
+        return url
+
+    host = parts.hostname or ""
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith("utm_")
+    ]
+    if host == "youtu.be" and path != "/":
+        host, query, path = "youtube.com", [("v", path.lstrip("/"))] + query, "/watch"
+
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+def url_domain(url: str) -> str:
+    """
+    Host name of a URL without common prefixes (``www.``, ``m.``), lower-cased.
+
+    Returns an empty string when the URL has no host.
+    """
+    try:
+        host = (urlsplit((url or "").strip()).hostname or "").lower()
+    except ValueError:
+        return ""
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
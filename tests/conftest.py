@@ -0,0 +1,8 @@
+import pytest
+
+from vidharvester.database.manager import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(str(tmp_path / "vidharvester.db"))
@@ -0,0 +1,108 @@
+import socket
+import urllib.error
+import urllib.request
+
+import pytest
+
+from vidharvester.capture.extension_server import start_server
+from vidharvester.download.bulk import api_token, make_queue_item, read_import_file
+
+DEFAULTS = {
+    "mode": "video",
+    "format": "mp4",
+    "quality": "auto-best",
+    "output_dir": "/downloads",
+    "filename_template": "%(title)s.%(ext)s",
+}
+
+
+def test_url_takes_the_defaults():
+    item = make_queue_item("  https://example.com/v  ", DEFAULTS)
+    assert item == dict(DEFAULTS, url="https://example.com/v")
+
+
+def test_item_options_override_defaults():
+    item = make_queue_item(
+        {"url": "https://example.com/v", "quality": "720p", "priority": "3"}, DEFAULTS
+    )
+    assert item["quality"] == "720p"
+    assert item["priority"] == 3
+    assert item["format"] == "mp4"
+
+
+def test_other_mode_gets_its_default_format():
+    item = make_queue_item({"url": "https://example.com/v", "mode": "AUDIO"}, DEFAULTS)
+    assert (item["mode"], item["format"]) == ("audio", "mp3")
+    item = make_queue_item(
+        {"url": "https://example.com/v", "mode": "audio", "format": "opus"}, DEFAULTS
+    )
+    assert item["format"] == "opus"
+
+
+def test_default_priority_and_size_apply():
+    defaults = dict(DEFAULTS, priority=5, size_estimate="")
+    item = make_queue_item("https://example.com/v", defaults)
+    assert item["priority"] == 5
+    assert "size_estimate" not in item
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "ftp://example.com/v",
+        "",
+        {"title": "no url"},
+        ["https://example.com/v"],
+        {"url": "https://example.com/v", "mode": "podcast"},
+        {"url": "https://example.com/v", "priority": "high"},
+    ],
+)
+def test_invalid_items_raise(raw):
+    with pytest.raises(ValueError):
+        make_queue_item(raw, DEFAULTS)
+
+
+def test_api_token_is_generated_once(db):
+    token = api_token(db)
+    assert len(token) >= 32
+    assert api_token(db) == token
+
+
+def test_read_import_file(tmp_path):
+    text = tmp_path / "urls.txt"
+    text.write_text("# list\nhttps://example.com/1\n\n  https://example.com/2\n")
+    assert list(read_import_file(str(text))) == [
+        "https://example.com/1",
+        "https://example.com/2",
+    ]
+    csv = tmp_path / "urls.csv"
+    csv.write_text("URL,Mode\nhttps://example.com/3, audio\n")
+    assert list(read_import_file(str(csv))) == [
+        {"url": "https://example.com/3", "mode": "audio"}
+    ]
+
+
+def _post_capture(port, headers):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/capture",
+        data=b'{"url": "https://example.com/v"}',
+        headers=headers,
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+def test_capture_requires_token_when_it_enqueues():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    received = []
+    start_server(port, received.append, token="s3cret", capture_requires_token=True)
+    assert _post_capture(port, {}) == 401
+    assert _post_capture(port, {"Authorization": "Bearer wrong"}) == 401
+    assert _post_capture(port, {"Authorization": "Bearer s3cret"}) == 200
+    assert [payload["url"] for payload in received] == ["https://example.com/v"]
@@ -0,0 +1,56 @@
+from vidharvester.utils.urls import normalize_url, url_domain
+
+
+def test_normalize_url_strips_tracking_and_prefixes():
+    assert normalize_url(
+        "HTTP://www.Example.com/watch/?b=2&utm_source=x&a=1&fbclid=y#t=10"
+    ) == "https://example.com/watch?a=1&b=2"
+
+
+def test_normalize_url_expands_youtu_be():
+    assert normalize_url("https://youtu.be/abc123?si=share") == (
+        "https://youtube.com/watch?v=abc123"
+    )
+    assert normalize_url("https://m.youtube.com/watch?v=abc123&feature=share") == (
+        normalize_url("https://youtu.be/abc123")
+    )
+
+
+def test_normalize_url_keeps_unparseable_input():
+    assert normalize_url("  not a url ") == "not a url"
+    assert normalize_url("") == ""
+
+
+def test_url_domain():
+    assert url_domain("https://www.Vimeo.com/123") == "vimeo.com"
+    assert url_domain("nonsense") == ""
+
+
+def test_find_duplicate_by_normalized_url(db):
+    db.add_history("https://www.example.com/v/1?utm_campaign=x", "/out/1.mp4",
+                   "One", "mp4", 10, "ytdlp")
+    row = db.find_duplicate("https://example.com/v/1/")
+    assert row is not None
+    assert row["output_path"] == "/out/1.mp4"
+    assert db.find_duplicate("https://example.com/v/2") is None
+
+
+def test_find_duplicate_by_extractor_id(db):
+    db.add_history("https://youtube.com/watch?v=abc", "/out/abc.mp4", "A", "mp4", 1,
+                   "ytdlp", extractor_key="Youtube", video_id="abc")
+    row = db.find_duplicate("https://music.youtube.com/watch?v=abc",
+                            extractor_key="Youtube", video_id="abc")
+    assert row is not None
+    assert row["output_path"] == "/out/abc.mp4"
+
+
+def test_find_downloaded_returns_positions(db):
+    db.add_history("https://example.com/a", None, "A", "mp4", None, "ytdlp")
+    db.add_history("https://example.com/b", None, "B", "mp4", None, "ytdlp",
+                   extractor_key="Generic", video_id="b")
+    found = db.find_downloaded([
+        ("https://example.com/x", None, None),
+        ("https://www.example.com/a", None, None),
+        ("https://other.example/b", "Generic", "b"),
+    ])
+    assert found == {1, 2}
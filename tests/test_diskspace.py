@@ -0,0 +1,62 @@
+import shutil
+
+import pytest
+
+from vidharvester.download import diskspace
+from vidharvester.download.diskspace import DiskBudget, estimate_size
+
+FREE = 1000
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    usage = shutil._ntuple_diskusage(10 * FREE, 9 * FREE, FREE)
+    monkeypatch.setattr(diskspace.shutil, "disk_usage", lambda path: usage)
+    return DiskBudget()
+
+
+def test_reservations_count_against_free_space(budget, tmp_path):
+    assert budget.reserve("a", str(tmp_path), 600) == (True, FREE)
+    admitted, available = budget.reserve("b", str(tmp_path), 600)
+    assert not admitted
+    assert available == 400
+    assert budget.reserve("b", str(tmp_path), 300, min_free=100) == (True, 300)
+    assert budget.reserved() == 900
+
+
+def test_written_bytes_free_the_outstanding_part(budget, tmp_path):
+    budget.reserve("a", str(tmp_path), 600)
+    budget.consume("a", 500)
+    budget.consume("a", 100)  # progress never goes backwards
+    assert budget.reserved() == 100
+    assert budget.reserve("b", str(tmp_path), 900)[0]
+
+
+def test_reserving_again_replaces_the_amount(budget, tmp_path):
+    budget.reserve("a", str(tmp_path), 600)
+    assert budget.reserve("a", str(tmp_path), 900)[0]
+    assert budget.reserved() == 900
+    budget.release("a")
+    assert budget.reserved() == 0
+
+
+def test_missing_output_dir_uses_its_parent(budget, tmp_path):
+    assert budget.reserve("a", str(tmp_path / "not" / "yet"), 100)[0]
+
+
+def test_min_free_bytes_setting(db):
+    assert diskspace.min_free_bytes(db) == diskspace.DEFAULT_MIN_FREE_MB * 1024 * 1024
+    db.set_setting("min_free_space_mb", "-5")
+    assert diskspace.min_free_bytes(db) == 0
+
+
+def test_estimate_size():
+    info = {
+        "duration": 100,
+        "formats": [{"format_id": "140", "tbr": 128}],
+        "requested_formats": [{"filesize": 1000}, {"filesize_approx": 500}],
+    }
+    assert estimate_size(info, "140") == 1_600_000
+    assert estimate_size(info) == 1500
+    assert estimate_size({"requested_formats": [{"filesize": 1}, {}]}) is None
+    assert estimate_size(None) is None
@@ -0,0 +1,67 @@
+from vidharvester.download.format_planner import plan_audio, plan_video
+
+
+def _audio(format_id, acodec, ext, abr):
+    return {
+        "format_id": format_id,
+        "acodec": acodec,
+        "vcodec": "none",
+        "ext": ext,
+        "abr": abr,
+    }
+
+
+INFO = {
+    "duration": 600,
+    "formats": [
+        _audio("139", "mp4a.40.5", "m4a", 48),
+        _audio("140", "mp4a.40.2", "m4a", 128),
+        _audio("251", "opus", "webm", 160),
+        {"format_id": "137", "acodec": "none", "vcodec": "avc1", "ext": "mp4"},
+        {"format_id": "18", "acodec": "mp4a.40.2", "vcodec": "avc1", "ext": "mp4"},
+    ],
+}
+
+
+def test_audio_copy_picks_best_matching_stream():
+    plan = plan_audio(INFO, "m4a")
+    assert plan.action == "copy"
+    assert plan.format_id == "140"
+    assert plan.format == "140/bestaudio/best"
+    assert plan.source_codec == "mp4a.40.2"
+    assert plan.est_cpu_seconds_saved > 0
+    assert plan.postprocessors[0]["preferredcodec"] == "m4a"
+
+
+def test_audio_remux_when_container_differs():
+    plan = plan_audio(INFO, "opus")
+    assert plan.action == "remux"
+    assert plan.format_id == "251"
+
+
+def test_audio_transcodes_without_compatible_codec():
+    plan = plan_audio(INFO, "mp3")
+    assert plan.action == "transcode"
+    assert plan.format == "bestaudio/best"
+    assert plan.format_id is None
+    assert plan.source_codec == "opus"
+
+
+def test_alac_is_not_copied_into_m4a():
+    info = {"formats": [_audio("a", "alac", "m4a", 900)]}
+    assert plan_audio(info, "m4a").action == "transcode"
+
+
+def test_audio_without_info_keeps_generic_selection():
+    plan = plan_audio(None, "mp3")
+    assert plan.action == "transcode"
+    assert plan.reason == "no format list available"
+
+
+def test_video_plans_merge_into_container():
+    assert plan_video("mp4").merge_output_format == "mp4"
+    assert "vcodec^=avc1" in plan_video("MP4").format
+    assert plan_video("webm").merge_output_format == "webm"
+    plan = plan_video("")
+    assert plan.merge_output_format == "mkv"
+    assert plan.format == "bestvideo*+bestaudio/best"
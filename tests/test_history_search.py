@@ -0,0 +1,60 @@
+import pytest
+
+
+@pytest.fixture
+def history(db):
+    for title, url in (
+        ("Harvest moon live", "https://example.com/a"),
+        ("Moonlight sonata", "https://example.com/b"),
+        ("Harvester tutorial", "https://videos.example.org/c"),
+    ):
+        db.add_history(url, None, title, "mp4", None, "ytdlp")
+    return db
+
+
+def _titles(rows):
+    return [row["title"] for row in rows]
+
+
+def test_history_index_is_available(history):
+    assert history.has_fts
+
+
+@pytest.mark.parametrize("fts", [True, False])
+def test_every_word_must_match(history, fts):
+    history.has_fts = history.has_fts and fts
+    assert _titles(history.search_history("harvest moon")) == ["Harvest moon live"]
+
+
+@pytest.mark.parametrize("fts", [True, False])
+def test_words_match_as_prefixes_newest_first(history, fts):
+    history.has_fts = history.has_fts and fts
+    assert _titles(history.search_history("harv")) == [
+        "Harvester tutorial",
+        "Harvest moon live",
+    ]
+
+
+@pytest.mark.parametrize("fts", [True, False])
+def test_url_is_searched_and_paged(history, fts):
+    history.has_fts = history.has_fts and fts
+    rows = history.search_history("example", limit=2)
+    assert len(rows) == 2
+    rest = history.search_history("example", before_id=rows[-1]["id"])
+    assert _titles(rest) == ["Harvest moon live"]
+
+
+def test_quotes_in_the_query_are_not_syntax(history):
+    assert _titles(history.search_history('"sonata')) == ["Moonlight sonata"]
+    assert history.search_history('moon" OR "x') == []
+
+
+def test_empty_query_lists_history(history):
+    assert len(history.search_history("  ")) == 3
+
+
+def test_deleted_rows_leave_the_index(history):
+    with history._connect() as con:
+        con.execute("DELETE FROM history WHERE title LIKE 'Moonlight%'")
+        con.commit()
+    assert _titles(history.search_history("moon")) == ["Harvest moon live"]
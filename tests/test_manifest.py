@@ -0,0 +1,113 @@
+import pytest
+
+from vidharvester.capture.manifest import (
+    DASH,
+    HLS,
+    ManifestError,
+    manifest_protocol,
+    parse_dash,
+    parse_hls,
+)
+
+MASTER = """#EXTM3U
+#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aud",NAME="English",LANGUAGE="en",URI="audio/en.m3u8"
+#EXT-X-MEDIA:TYPE=SUBTITLES,GROUP-ID="subs",NAME="English",URI="subs/en.m3u8"
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e",AUDIO="aud"
+low/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080,FRAME-RATE=29.97,AUDIO="aud"
+https://cdn.example.com/high/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360
+alt/index.m3u8
+"""
+
+MEDIA = """#EXTM3U
+#EXT-X-TARGETDURATION:10
+#EXTINF:10.0,
+seg0.ts
+#EXTINF:5.5,
+seg1.ts
+#EXT-X-ENDLIST
+"""
+
+MPD = """<?xml version="1.0"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static"
+     mediaPresentationDuration="PT1H2M3.5S">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" codecs="avc1.640028" frameRate="30000/1001">
+      <Representation id="v1" bandwidth="4000000" width="1920" height="1080"/>
+      <Representation id="v2" bandwidth="1000000" width="854" height="480"/>
+    </AdaptationSet>
+    <AdaptationSet contentType="audio" mimeType="audio/mp4" lang="de">
+      <Representation id="a1" bandwidth="128000" codecs="mp4a.40.2"/>
+    </AdaptationSet>
+    <AdaptationSet contentType="text" mimeType="application/ttml+xml">
+      <Representation id="t1" bandwidth="1000"/>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+
+URL = "https://example.com/path/master.m3u8"
+
+
+def test_parse_hls_master():
+    manifest = parse_hls(MASTER, URL)
+    assert manifest.protocol == HLS
+    ids = [v.format_id for v in manifest.variants]
+    assert ids == ["hls-aud-English", "hls-800", "hls-5000", "hls-800-1"]
+    audio = manifest.variant("hls-aud-English")
+    assert audio.kind == "audio"
+    assert audio.url == "https://example.com/path/audio/en.m3u8"
+    assert manifest.variant("hls-800").url == "https://example.com/path/low/index.m3u8"
+    best = manifest.best()
+    assert best.format_id == "hls-5000"
+    assert best.resolution == "1920x1080"
+    assert best.frame_rate == pytest.approx(29.97)
+    assert manifest.audio_for(best) is audio
+
+
+def test_parse_hls_media_playlist():
+    manifest = parse_hls(MEDIA, URL)
+    assert manifest.duration == pytest.approx(15.5)
+    assert not manifest.live
+    assert [v.format_id for v in manifest.variants] == ["hls"]
+    live = parse_hls(MEDIA.replace("#EXT-X-ENDLIST\n", ""), URL)
+    assert live.live
+
+
+def test_parse_hls_rejects_other_text():
+    with pytest.raises(ManifestError):
+        parse_hls("<html></html>", URL)
+
+
+def test_parse_dash():
+    manifest = parse_dash(MPD, "https://example.com/stream.mpd")
+    assert manifest.protocol == DASH
+    assert manifest.duration == pytest.approx(3723.5)
+    assert not manifest.live
+    assert [v.format_id for v in manifest.variants] == ["dash-v1", "dash-v2", "dash-a1"]
+    video = manifest.best()
+    assert (video.width, video.height, video.codecs) == (1920, 1080, "avc1.640028")
+    assert video.frame_rate == pytest.approx(29.97, abs=0.01)
+    audio = manifest.best("audio")
+    assert audio.language == "de"
+    assert manifest.estimated_size(audio) == int(128000 / 8 * 3723.5)
+
+
+def test_parse_dash_rejects_other_xml():
+    with pytest.raises(ManifestError):
+        parse_dash("<html/>", "https://example.com/x.mpd")
+    with pytest.raises(ManifestError):
+        parse_dash("not xml", "https://example.com/x.mpd")
+
+
+def test_summary():
+    manifest = parse_dash(MPD, "https://example.com/stream.mpd")
+    assert manifest.summary().startswith("DASH, 2 variants up to 1920x1080, 1:02:03, ~")
+
+
+def test_manifest_protocol():
+    assert manifest_protocol("https://example.com/a.m3u8?x=1") == HLS
+    assert manifest_protocol("https://example.com/a.mpd") == DASH
+    assert manifest_protocol("https://example.com/a", "application/dash+xml") == DASH
+    assert manifest_protocol("https://example.com/a.mp4") is None
@@ -0,0 +1,61 @@
+from vidharvester.download.progress import ProgressThrottle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _event(downloaded, total=1000, filename="a.part"):
+    return {"filename": filename, "downloaded": downloaded, "total": total}
+
+
+def test_events_are_coalesced_to_the_rate():
+    clock = FakeClock()
+    throttle = ProgressThrottle(max_rate_hz=4, clock=clock)
+    assert throttle.feed(_event(0)) is not None
+    clock.now += 0.1
+    assert throttle.feed(_event(10)) is None
+    clock.now += 0.1
+    assert throttle.feed(_event(20)) is None
+    held = throttle.flush()
+    assert held["downloaded"] == 20
+    assert throttle.flush() is None
+    clock.now += 0.1
+    assert throttle.feed(_event(30)) is not None
+
+
+def test_speed_and_eta_are_smoothed_over_the_window():
+    clock = FakeClock()
+    throttle = ProgressThrottle(max_rate_hz=0, window_seconds=5, clock=clock)
+    throttle.feed(_event(0))
+    clock.now += 1
+    throttle.feed(_event(100))
+    clock.now += 1
+    event = throttle.feed(_event(200, total=1200))
+    assert event["speed"] == 100
+    assert event["eta"] == 10
+
+
+def test_old_samples_leave_the_window():
+    clock = FakeClock()
+    throttle = ProgressThrottle(max_rate_hz=0, window_seconds=2, clock=clock)
+    throttle.feed(_event(0))
+    for downloaded in (1000, 1100, 1200):
+        clock.now += 1
+        event = throttle.feed(_event(downloaded))
+    assert event["speed"] == 100
+
+
+def test_new_file_resets_the_samples():
+    clock = FakeClock()
+    throttle = ProgressThrottle(max_rate_hz=0, clock=clock)
+    throttle.feed(_event(0))
+    clock.now += 1
+    throttle.feed(_event(500))
+    clock.now += 1
+    event = throttle.feed(_event(50, filename="b.part"))
+    assert "speed" not in event
@@ -0,0 +1,74 @@
+import threading
+
+from vidharvester.download.bulk import default_queue_item
+
+
+def _queue(db, count):
+    return [
+        db.add_queue_item(default_queue_item(db, f"https://example.com/{n}"))
+        for n in range(count)
+    ]
+
+
+def test_claim_marks_items_running_under_the_lease(db):
+    qids = _queue(db, 3)
+    rows = db.claim_pending("w1", "fifo", 2, 60)
+    assert [row["id"] for row in rows] == qids[:2]
+    for row in rows:
+        assert row["status"] == "running"
+        assert row["worker_id"] == "w1"
+        assert row["lease_expires_at"] is not None
+    assert [row["id"] for row in db.claim_pending("w2", "fifo", 5, 60)] == qids[2:]
+    assert db.claim_pending("w3", "fifo", 5, 60) == []
+    assert db.claim_pending("w3", "fifo", 0, 60) == []
+
+
+def test_concurrent_claims_never_share_an_item(db):
+    _queue(db, 20)
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(name):
+        while True:
+            rows = db.claim_pending(name, "fifo", 1, 60)
+            if not rows:
+                return
+            with lock:
+                claimed.extend(row["id"] for row in rows)
+
+    threads = [threading.Thread(target=worker, args=(f"w{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(set(claimed))
+    assert len(claimed) == 20
+
+
+def test_renew_only_extends_own_leases(db):
+    qids = _queue(db, 2)
+    db.claim_pending("w1", "fifo", 1, 60)
+    db.claim_pending("w2", "fifo", 1, 60)
+    before = db.get_queue_item(qids[0])["lease_expires_at"]
+    assert db.renew_leases("w1", qids, 600) == [qids[0]]
+    assert db.get_queue_item(qids[0])["lease_expires_at"] > before
+    assert db.renew_leases("w1", [], 600) == []
+
+
+def test_expired_leases_return_to_pending(db):
+    qids = _queue(db, 2)
+    db.claim_pending("w1", "fifo", 1, -1)
+    db.claim_pending("w2", "fifo", 1, 600)
+    assert db.reclaim_expired_leases() == [qids[0]]
+    row = db.get_queue_item(qids[0])
+    assert row["status"] == "pending"
+    assert row["worker_id"] is None
+    assert db.get_queue_item(qids[1])["status"] == "running"
+    assert db.renew_leases("w1", [qids[0]], 60) == []
+    with db._connect() as con:
+        attempts = con.execute(
+            "SELECT outcome, error FROM queue_attempts WHERE queue_id=?", (qids[0],)
+        ).fetchall()
+    assert [a["outcome"] for a in attempts] == ["lease_expired"]
+    assert "w1" in attempts[0]["error"]
+    assert db.reclaim_expired_leases() == []
@@ -0,0 +1,69 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from vidharvester.download import retry
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ("ERROR: [Errno 28] No space left on device", retry.FAILURE_DISK_SPACE),
+        ("HTTP Error 429: Too Many Requests", retry.FAILURE_RATE_LIMITED),
+        ("Sign in to confirm your age", retry.FAILURE_AUTH),
+        ("HTTP Error 403: Forbidden", retry.FAILURE_TRANSIENT),
+        ("Read timed out", retry.FAILURE_TRANSIENT),
+        ("ERROR: Unsupported URL: https://example.com", retry.FAILURE_PERMANENT),
+        ("HTTP Error 410: Gone", retry.FAILURE_PERMANENT),
+        (
+            "Timeout 30000ms exceeded. ERROR: Unsupported URL: https://example.com",
+            retry.FAILURE_PERMANENT,
+        ),
+        ("something odd happened", None),
+    ],
+)
+def test_classify_error(message, expected):
+    assert retry.classify_error(message) == expected
+
+
+def test_most_specific_class_wins():
+    messages = ["HTTP Error 404: Not Found", "HTTP Error 429", "connection reset"]
+    assert retry.classify_failure(messages) == retry.FAILURE_RATE_LIMITED
+    assert retry.classify_failure(["Video unavailable", "timed out"]) == (
+        retry.FAILURE_PERMANENT
+    )
+
+
+def test_unknown_failures_count_as_transient():
+    assert retry.classify_failure([]) == retry.FAILURE_TRANSIENT
+    assert retry.classify_failure(["???"]) == retry.FAILURE_TRANSIENT
+
+
+def test_backoff_doubles_within_the_upper_half_of_the_window():
+    rng = random.Random(1)
+    for attempt, window in ((1, 30), (2, 60), (3, 120)):
+        for _ in range(20):
+            delay = retry.backoff_delay(retry.FAILURE_TRANSIENT, attempt, rng)
+            assert window / 2 <= delay <= window
+
+
+def test_backoff_is_capped():
+    rng = random.Random(2)
+    assert retry.backoff_delay(retry.FAILURE_TRANSIENT, 50, rng) <= 3600
+    assert 3 * 3600 <= retry.backoff_delay(retry.FAILURE_RATE_LIMITED, 50, rng)
+    assert retry.backoff_delay(retry.FAILURE_RATE_LIMITED, 1, rng) >= 150
+
+
+def test_next_attempt_at_is_in_the_future():
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    at = datetime.fromisoformat(retry.next_attempt_at(retry.FAILURE_TRANSIENT, 1, now))
+    assert 15 <= (at - now).total_seconds() <= 30
+
+
+def test_max_attempts_setting(db):
+    assert retry.max_attempts(db) == retry.DEFAULT_MAX_ATTEMPTS
+    db.set_setting("max_attempts", "0")
+    assert retry.max_attempts(db) == 1
+    db.set_setting("max_attempts", "many")
+    assert retry.max_attempts(db) == retry.DEFAULT_MAX_ATTEMPTS
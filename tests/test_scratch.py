@@ -0,0 +1,40 @@
+import errno
+import os
+
+from vidharvester.download import scratch
+
+
+def test_move_file_never_replaces_an_existing_file(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "clip.mp4").write_text("old")
+    (out / "clip (2).mp4").write_text("older")
+    src = tmp_path / "clip.mp4"
+    src.write_text("new")
+    dst = scratch.move_file(str(src), str(out / "clip.mp4"))
+    assert dst == str(out / "clip (3).mp4")
+    assert (out / "clip.mp4").read_text() == "old"
+    assert (out / "clip (3).mp4").read_text() == "new"
+    assert not src.exists()
+
+
+def test_move_tree_copies_across_file_systems(tmp_path, monkeypatch):
+    replace = os.replace
+
+    def cross_device(src, dst):
+        if not src.endswith(".vhpart"):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", cross_device)
+    job, out = tmp_path / "job", tmp_path / "out"
+    (job / "sub").mkdir(parents=True)
+    (job / "sub" / "a.mp4").write_bytes(b"x" * 10)
+    (job / "a.mp4.part").write_bytes(b"partial")
+    (out / "sub").mkdir(parents=True)
+    (out / "sub" / "a.mp4").write_bytes(b"kept")
+    moved = scratch.move_tree(str(job), str(out))
+    assert moved == {str(job / "sub" / "a.mp4"): str(out / "sub" / "a (2).mp4")}
+    assert (out / "sub" / "a (2).mp4").read_bytes() == b"x" * 10
+    assert (out / "sub" / "a.mp4").read_bytes() == b"kept"
+    assert (job / "a.mp4.part").exists()
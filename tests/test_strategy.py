@@ -0,0 +1,81 @@
+import pytest
+
+from vidharvester.download import strategy
+from vidharvester.download.engine import DownloadJob, DownloadOptions
+from vidharvester.download.strategy import (
+    DEFAULT_ORDER,
+    PATH_FALLBACK,
+    PATH_HEADLESS,
+    PATH_YTDLP,
+    plan_order,
+    record_outcome,
+)
+
+URL = "https://www.example.com/video/1"
+
+
+def test_default_order_without_history(db):
+    assert plan_order(db, URL) == (DEFAULT_ORDER, None)
+    assert plan_order(None, URL) == (DEFAULT_ORDER, None)
+
+
+def test_working_path_goes_first(db):
+    record_outcome(db, URL, PATH_YTDLP, False, 1.0, ["Unsupported URL"])
+    record_outcome(db, URL, PATH_HEADLESS, True, 12.0)
+    order, reason = plan_order(db, "https://example.com/other")
+    assert order == (PATH_HEADLESS, PATH_YTDLP, PATH_FALLBACK)
+    assert "headless worked for example.com" in reason
+    assert "recent failures: ytdlp 1.0" in reason
+
+
+def test_default_first_path_keeps_the_default_order(db):
+    record_outcome(db, URL, PATH_YTDLP, True, 3.0)
+    record_outcome(db, URL, PATH_YTDLP, True, 3.0)
+    record_outcome(db, URL, PATH_FALLBACK, True, 2.0)
+    assert plan_order(db, URL) == (DEFAULT_ORDER, None)
+
+
+def test_faster_path_wins_a_tie(db):
+    record_outcome(db, URL, PATH_YTDLP, True, 9.0)
+    record_outcome(db, URL, PATH_FALLBACK, True, 2.0)
+    assert plan_order(db, URL)[0] == (PATH_FALLBACK, PATH_YTDLP, PATH_HEADLESS)
+
+
+def test_more_failures_than_successes_do_not_count(db):
+    record_outcome(db, URL, PATH_FALLBACK, True, 2.0)
+    record_outcome(db, URL, PATH_FALLBACK, False, 2.0, ["HTTP Error 404"])
+    record_outcome(db, URL, PATH_FALLBACK, False, 2.0, ["HTTP Error 404"])
+    assert plan_order(db, URL) == (DEFAULT_ORDER, None)
+
+
+def test_site_independent_failures_are_not_recorded(db):
+    record_outcome(db, URL, PATH_YTDLP, False, 1.0, ["HTTP Error 429"])
+    record_outcome(db, URL, PATH_YTDLP, False, 1.0, ["connection reset"])
+    assert db.get_domain_strategies("example.com") == []
+
+
+def test_outcomes_decay(db, monkeypatch):
+    record_outcome(db, URL, PATH_FALLBACK, True, 2.0)
+    assert plan_order(db, URL)[0][0] == PATH_FALLBACK
+    monkeypatch.setattr(strategy, "HALF_LIFE_SECONDS", 1e-6)
+    assert plan_order(db, URL) == (DEFAULT_ORDER, None)
+
+
+@pytest.mark.parametrize("demoted, probes", [(False, 1), (True, 0)])
+def test_probe_follows_the_learned_order(db, tmp_path, monkeypatch, demoted, probes):
+    if demoted:
+        record_outcome(db, URL, PATH_YTDLP, False, 1.0, ["Unsupported URL"])
+        record_outcome(db, URL, PATH_FALLBACK, True, 2.0)
+    calls = []
+    monkeypatch.setattr(DownloadJob, "_probe", lambda self: calls.append(1))
+    monkeypatch.setattr(DownloadJob, "_fallback_links", lambda self: [])
+    monkeypatch.setattr(DownloadJob, "_headless_links", lambda self: [])
+    monkeypatch.setattr(DownloadJob, "_download_with_ytdlp", lambda *args: False)
+    finished = []
+    options = DownloadOptions(str(tmp_path), "audio", "mp3", "", "%(title)s.%(ext)s")
+    job = DownloadJob(
+        URL, options, db, on_finished=lambda ok, message: finished.append(ok)
+    )
+    job.run()
+    assert len(calls) == probes
+    assert finished == [False]